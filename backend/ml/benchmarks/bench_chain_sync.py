@@ -0,0 +1,103 @@
+"""Full re-extraction vs incremental event-log sync of the bidder features.
+
+Builds a FakeNode chain, takes a full checkpoint, applies --changes contract
+mutations (new bonds, payments, disputes, new bidders), then times a fresh
+full extract against ChainSync.sync() and checks both give the same frame.
+A short reorg is replayed at the end.
+
+    python benchmarks/bench_chain_sync.py --bidders 5000 --changes 50 --latency 0.005
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chain_extract import ChainExtractor
+from chain_sync import ChainSync
+from fake_trustchain_node import FakeNode, FakeTrustChain, load_trustchain_abi
+
+
+def mutate(chain, changes, rng):
+    """Spread `changes` random contract writes over a few blocks"""
+    for i in range(changes):
+        kind = i % 4
+        if kind == 0:
+            chain.award_bond(int(rng.integers(1, len(chain.bidders) + 1)))
+        elif kind == 1:
+            chain.release_payment(int(rng.integers(1, len(chain.bonds) + 1)))
+        elif kind == 2:
+            chain.open_dispute(int(rng.integers(1, len(chain.bonds) + 1)))
+        else:
+            chain.add_bidder()
+        if i % 5 == 4:
+            chain.mine()
+    chain.mine()
+
+
+def check(label, synced, node, abi):
+    expected = ChainExtractor(node.url, node.address, abi).extract()
+    pd.testing.assert_frame_equal(synced.reset_index(drop=True), expected.reset_index(drop=True))
+    print(f"  parity ({label}): {len(expected)} bidders match a full extract")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bidders', type=int, default=2000)
+    parser.add_argument('--changes', type=int, default=40)
+    parser.add_argument('--latency', type=float, default=0.005, help='simulated round trip')
+    parser.add_argument('--reorg-depth', type=int, default=12)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    chain = FakeTrustChain(n_bidders=args.bidders)
+    _, abi = load_trustchain_abi()
+
+    with FakeNode(chain, latency=args.latency) as node, tempfile.TemporaryDirectory() as tmp:
+        state_path = os.path.join(tmp, 'chain_state.pkl')
+
+        syncer = ChainSync(node.url, node.address, abi, state_path, reorg_depth=args.reorg_depth)
+        _, summary = syncer.sync()
+        print(f"initial checkpoint          {summary['elapsed_seconds']:8.2f}s  ({summary['mode']})")
+
+        mutate(chain, args.changes, rng)
+
+        start = time.perf_counter()
+        extractor = ChainExtractor(node.url, node.address, abi)
+        extractor.extract()
+        full_seconds = time.perf_counter() - start
+        print(f"full extract                {full_seconds:8.2f}s  {extractor.client.stats['rpc_calls']:>8} calls")
+
+        # Reload from disk, as a restarted process would
+        syncer = ChainSync(node.url, node.address, abi, state_path, reorg_depth=args.reorg_depth)
+        synced, summary = syncer.sync()
+        print(f"incremental sync            {summary['elapsed_seconds']:8.2f}s  {summary['rpc_calls']:>8} calls  "
+              f"{summary['events']} events, {summary['bidders_read']} bidders re-read  "
+              f"({full_seconds / summary['elapsed_seconds']:.1f}x faster)")
+        check('incremental', synced, node, abi)
+
+        # Changes land, then the last blocks are replaced before the next sync
+        mutate(chain, 8, rng)
+        synced, _ = syncer.sync()
+        mutate(chain, 8, rng)
+        chain.reorg(3)
+        chain.mine()
+        synced, summary = syncer.sync()
+        print(f"after 3-block reorg         {summary['elapsed_seconds']:8.2f}s  "
+              f"reorg_detected={summary['reorg_detected']}")
+        check('reorg', synced, node, abi)
+
+        chain.reorg(args.reorg_depth + 5)
+        chain.mine()
+        synced, summary = syncer.sync()
+        print(f"deep reorg                  {summary['elapsed_seconds']:8.2f}s  ({summary['mode']}: {summary['reason']})")
+        check('deep reorg', synced, node, abi)
+
+
+if __name__ == '__main__':
+    main()
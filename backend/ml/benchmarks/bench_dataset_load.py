@@ -0,0 +1,121 @@
+"""Load time and memory of dataset.csv versus its compact columnar copy.
+
+For each size, writes a synthetic CSV in chunks, converts it with
+compact_dataset.convert, then loads it through load_historical_data in a
+fresh interpreter per format, recording wall time, resident-set growth and
+peak RSS. The two loads must produce identical bidder features.
+
+    python benchmarks/bench_dataset_load.py --rows 1000000 10000000
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compact_dataset import compact_dataset_path, convert
+from synthetic import write_csv
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r'''
+import hashlib, json, sys, time
+
+def status(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+import numpy as np
+import pandas
+from ml_service import TrustChainRiskML
+
+risk_ml = TrustChainRiskML()
+rss_before = status('VmRSS')
+start = time.perf_counter()
+index = risk_ml.load_historical_data(sys.argv[1])
+seconds = time.perf_counter() - start
+rss_after = status('VmRSS')
+assert index is not None
+
+digest = hashlib.sha256()
+digest.update(np.ascontiguousarray(index.features).tobytes())
+digest.update(np.ascontiguousarray(index.contract_values).tobytes())
+probe = index.to_json_values('bidder_address', [len(index) - 1])[0]
+print(json.dumps({
+    'seconds': seconds,
+    'rss_growth': rss_after - rss_before,
+    'peak_rss': status('VmHWM'),
+    'rows': len(index),
+    'digest': digest.hexdigest(),
+    'lookup_ok': index.lookup(probe) == len(index) - 1,
+}))
+'''
+
+
+def load(csv_path):
+    result = subprocess.run([sys.executable, '-c', CHILD, csv_path], cwd=ML_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        return {'error': result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f'exit {result.returncode}'}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def directory_bytes(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000])
+    parser.add_argument('--workdir', default=None, help='where to write the datasets (default: a temp dir)')
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='dataset-load-')
+    os.makedirs(workdir, exist_ok=True)
+    failures = 0
+    try:
+        for rows in args.rows:
+            compact_csv = os.path.join(workdir, f'bidders_{rows}.csv')
+            write_csv(compact_csv, rows)
+
+            start = time.perf_counter()
+            convert(compact_csv)
+            convert_seconds = time.perf_counter() - start
+
+            # A second name for the same CSV, without a compact sibling, forces the CSV path
+            plain_csv = os.path.join(workdir, f'bidders_{rows}_plain.csv')
+            os.symlink(compact_csv, plain_csv)
+
+            print(f"{rows:,} rows: CSV {os.path.getsize(compact_csv) / 2**20:,.0f} MiB, "
+                  f"compact {directory_bytes(compact_dataset_path(compact_csv)) / 2**20:,.0f} MiB "
+                  f"(convert {convert_seconds:.1f}s)")
+            results = {'csv': load(plain_csv), 'compact': load(compact_csv)}
+            for label, result in results.items():
+                if 'error' in result:
+                    print(f"  {label:<8} failed: {result['error']}")
+                    continue
+                print(f"  {label:<8} load {result['seconds']:7.2f}s  RSS +{result['rss_growth'] / 2**20:8,.0f} MiB  "
+                      f"peak {result['peak_rss'] / 2**20:8,.0f} MiB  lookup {'ok' if result['lookup_ok'] else 'FAILED'}")
+                failures += not result['lookup_ok']
+
+            if all('error' not in result for result in results.values()):
+                same = results['csv']['digest'] == results['compact']['digest']
+                print(f"  features identical: {same}")
+                failures += not same
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if failures:
+        raise SystemExit(f"{failures} parity failures")
+
+
+if __name__ == '__main__':
+    main()
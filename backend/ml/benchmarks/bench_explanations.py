@@ -0,0 +1,113 @@
+"""Additivity check and throughput benchmark for the risk score explanations.
+
+For every candidate model type, and the rule-based fallback, it trains on
+synthetic bidders, explains bids through predict_risk_batch(explain=True)
+and checks that base_value + contributions + adjustments + clipping is
+each bid's risk_score. Then it times explaining --rows bids, with a cold
+and a warm explanation cache.
+
+    python benchmarks/bench_explanations.py --train-rows 5000 --rows 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bidder_index import BidderIndex
+from ml_service import BID_TYPES, ModelBundle, TrustChainRiskML
+from model_search import CANDIDATE_NAMES, make_candidate
+from synthetic import make_bidders
+
+
+def make_service(train_rows, rows, name):
+    """A service serving rows synthetic bidders, with name's model for every bid type ('rules': none)"""
+    from sklearn.preprocessing import StandardScaler
+
+    service = TrustChainRiskML()
+    frame = make_bidders(rows, seed=3)
+    service.install_bidder_index(BidderIndex.from_frame(frame, service.feature_names), frame)
+    if name == 'rules':
+        # install_models keeps the current models for bid types not given, so swap the bundle directly
+        service.bundle = ModelBundle(service.bundle.version + 1, {}, {})
+        return service, frame
+
+    train = make_bidders(train_rows, seed=1)
+    models, scalers = {}, {}
+    for bid_type in BID_TYPES:
+        type_data = train[train['bid_type'] == bid_type]
+        scalers[bid_type] = StandardScaler().fit(type_data[service.feature_names])
+        models[bid_type] = make_candidate(name).fit(scalers[bid_type].transform(type_data[service.feature_names]),
+                                                    service.calculate_risk_labels(type_data, bid_type))
+    service.install_models(models, scalers)
+    return service, frame
+
+
+def random_bids(frame, n, seed):
+    """Bids on random bidders; every fourth has no bid amount or budget"""
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(frame), n)
+    budgets = rng.uniform(50_000, 150_000, n)
+    amounts = budgets * rng.uniform(0.5, 1.5, n)
+    return [
+        (address, bid_type, None, None) if i % 4 == 0 else (address, bid_type, float(amount), float(budget))
+        for i, (address, bid_type, amount, budget) in enumerate(zip(
+            frame['bidder_address'].to_numpy()[rows], rng.choice(BID_TYPES, n), amounts, budgets))
+    ]
+
+
+def additivity_errors(results):
+    """|base_value + contributions + adjustments + clipping - risk_score| per assessment"""
+    errors = []
+    for result in results:
+        explanation = result['explanation']
+        total = (explanation['base_value'] + sum(explanation['contributions'].values())
+                 + sum(explanation['adjustments'].values()) + explanation['clipping'])
+        errors.append(abs(total - result['risk_score']))
+    return np.array(errors)
+
+
+def check_additivity(train_rows=2000, rows=2000, tolerance=1e-9):
+    """Every explanation must add up to its risk score, for every model type"""
+    failures = []
+    for name in [*CANDIDATE_NAMES, 'rules']:
+        service, frame = make_service(train_rows, rows, name)
+        results = service.predict_risk_batch(random_bids(frame, rows, seed=4), explain=True)
+        errors = additivity_errors(results)
+        print(f"additivity {name:<17} max |sum - risk_score| {errors.max():.2e} over {len(errors)} bids "
+              f"({results[0]['explanation']['method']})")
+        if errors.max() > tolerance:
+            failures.append(f"{name}: {int(np.sum(errors > tolerance))} bids off by up to {errors.max():.2e}")
+    if failures:
+        raise AssertionError("Explanations don't add up to the risk score: " + '; '.join(failures))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--train-rows', type=int, default=5000)
+    parser.add_argument('--rows', type=int, default=10_000, help='bidders in the index and bids explained')
+    parser.add_argument('--tolerance', type=float, default=1e-9)
+    args = parser.parse_args()
+
+    check_additivity(min(args.train_rows, 2000), min(args.rows, 2000), args.tolerance)
+
+    for name in CANDIDATE_NAMES:
+        service, frame = make_service(args.train_rows, args.rows, name)
+        bids = random_bids(frame, args.rows, seed=5)
+        start = time.perf_counter()
+        service.predict_risk_batch(bids)
+        scored = time.perf_counter() - start
+        timings = []
+        for _ in range(2):
+            start = time.perf_counter()
+            service.predict_risk_batch(bids, explain=True)
+            timings.append(time.perf_counter() - start)
+        print(f"{name:<17} {args.rows:,} bids  score {scored:.3f}s  explain cold {timings[0]:.3f}s  "
+              f"warm {timings[1]:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
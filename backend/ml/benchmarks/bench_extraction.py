@@ -0,0 +1,60 @@
+"""Bidders/second for on-chain feature extraction, serial vs batched+concurrent.
+
+By default runs against the in-process FakeNode stand-in:
+
+    python benchmarks/bench_extraction.py --bidders 2000 --latency 0.005
+
+Point it at a local anvil/hardhat node with TrustChain deployed instead:
+
+    python benchmarks/bench_extraction.py --rpc-url http://127.0.0.1:8545 --contract-address 0x...
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chain_extract import ChainExtractor
+from fake_trustchain_node import FakeNode, FakeTrustChain, load_trustchain_abi
+
+
+def run(url, address, abi, label, **options):
+    extractor = ChainExtractor(url, address, abi, **options)
+    start = time.perf_counter()
+    frame = extractor.extract()
+    elapsed = time.perf_counter() - start
+    stats = extractor.client.stats
+    print(f"{label:<28} {len(frame):>7} bidders  {elapsed:8.2f}s  {len(frame) / elapsed:10,.0f} bidders/s  "
+          f"{stats['http_requests']:>7} HTTP requests  {stats['rpc_calls']:>8} calls")
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rpc-url')
+    parser.add_argument('--contract-address')
+    parser.add_argument('--bidders', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.005, help='simulated round trip (FakeNode only)')
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--skip-serial', action='store_true')
+    args = parser.parse_args()
+
+    default_address, abi = load_trustchain_abi()
+
+    def bench(url, address):
+        if not args.skip_serial:
+            run(url, address, abi, 'serial (1 call/request)', batch_size=1, max_concurrency=1)
+        run(url, address, abi, f'batched x{args.batch_size}, {args.concurrency} in flight',
+            batch_size=args.batch_size, max_concurrency=args.concurrency)
+
+    if args.rpc_url:
+        bench(args.rpc_url, args.contract_address or default_address)
+    else:
+        with FakeNode(FakeTrustChain(n_bidders=args.bidders), latency=args.latency) as node:
+            bench(node.url, node.address)
+
+
+if __name__ == '__main__':
+    main()
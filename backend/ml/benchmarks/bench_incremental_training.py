@@ -0,0 +1,125 @@
+"""Wall time and holdout error of incremental model updates versus full retraining.
+
+Each candidate model type is trained on a synthetic history, then a batch
+of new rows arrives whose delays and budget overruns have drifted by
+--drift. Three ways to take them in are compared on a holdout drawn like
+the new rows:
+
+- 'stale': the history-only model, not updated
+- 'incremental': update_model on the new rows only (incremental_training.py)
+- 'refit': a fresh scaler and model of the same type on history + new rows
+
+With --full-search the service's complete retrain (fit_models: candidate
+search with cross-validation on history + new rows) is timed as well.
+
+    python benchmarks/bench_incremental_training.py --history-rows 200000 --update-rows 1000 10000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ML_DIR)
+
+from incremental_training import update_model
+from ml_service import BID_TYPES, TrustChainRiskML
+from model_search import CANDIDATE_NAMES, make_candidate
+from synthetic import make_bidders
+
+
+def drifted(rows, seed, first_id, drift):
+    frame = make_bidders(rows, seed=seed, first_id=first_id)
+    frame['average_delay_days'] = np.round(frame['average_delay_days'] * drift).astype(np.int64)
+    frame['budget_overruns_percent'] = np.round(frame['budget_overruns_percent'] * drift).astype(np.int64)
+    return frame
+
+
+def fit(name, frame, service, bid_type):
+    from sklearn.preprocessing import StandardScaler
+
+    X = frame[service.feature_names]
+    scaler = StandardScaler().fit(X)
+    model = make_candidate(name).fit(scaler.transform(X), service.calculate_risk_labels(frame, bid_type))
+    return model, scaler
+
+
+def holdout_mse(model, scaler, holdout, service, bid_type):
+    predicted = model.predict(scaler.transform(holdout[service.feature_names]))
+    return float(np.mean((predicted - service.calculate_risk_labels(holdout, bid_type)) ** 2))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--history-rows', type=int, default=200_000)
+    parser.add_argument('--update-rows', type=int, nargs='+', default=[1_000, 10_000])
+    parser.add_argument('--holdout-rows', type=int, default=50_000)
+    parser.add_argument('--drift', type=float, default=1.3, help='factor on delays and overruns in new rows')
+    parser.add_argument('--models', nargs='+', choices=CANDIDATE_NAMES, default=list(CANDIDATE_NAMES))
+    parser.add_argument('--trees', type=int, default=10, help='trees or boosting stages added per update')
+    parser.add_argument('--full-search', action='store_true', help='also time fit_models on history + new rows')
+    parser.add_argument('--cv-folds', type=int, default=3)
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    service = TrustChainRiskML()
+    history = make_bidders(args.history_rows, seed=1)
+    holdout = drifted(args.holdout_rows, 3, 10**9, args.drift)
+    report = []
+
+    for update_rows in args.update_rows:
+        new_rows = drifted(update_rows, 2, args.history_rows + 1, args.drift)
+        combined = pd.concat([history, new_rows], ignore_index=True)
+        print(f"{args.history_rows:,} history rows + {update_rows:,} new rows (drift x{args.drift})")
+
+        for name in args.models:
+            result = {'update_rows': update_rows, 'model': name, 'seconds': {}, 'holdout_mse': {}}
+            for bid_type in BID_TYPES:
+                type_history = history[history['bid_type'] == bid_type]
+                type_new = new_rows[new_rows['bid_type'] == bid_type]
+                type_holdout = holdout[holdout['bid_type'] == bid_type]
+                model, scaler = fit(name, type_history, service, bid_type)
+
+                (updated, updated_scaler, _), update_seconds = timed(lambda: update_model(
+                    model, scaler, type_new[service.feature_names], service.calculate_risk_labels(type_new, bid_type),
+                    trees=args.trees))
+                (refit, refit_scaler), refit_seconds = timed(
+                    lambda: fit(name, combined[combined['bid_type'] == bid_type], service, bid_type))
+
+                result['seconds'][bid_type] = {'incremental': update_seconds, 'refit': refit_seconds}
+                result['holdout_mse'][bid_type] = {
+                    'stale': holdout_mse(model, scaler, type_holdout, service, bid_type),
+                    'incremental': holdout_mse(updated, updated_scaler, type_holdout, service, bid_type),
+                    'refit': holdout_mse(refit, refit_scaler, type_holdout, service, bid_type),
+                }
+            report.append(result)
+
+            seconds = {mode: sum(s[mode] for s in result['seconds'].values()) for mode in ('incremental', 'refit')}
+            mse = {mode: np.mean([m[mode] for m in result['holdout_mse'].values()])
+                   for mode in ('stale', 'incremental', 'refit')}
+            print(f"  {name:<16} incremental {seconds['incremental']:7.2f}s  refit {seconds['refit']:7.2f}s  "
+                  f"({seconds['refit'] / seconds['incremental']:.0f}x)   holdout MSE stale {mse['stale']:.2f}  "
+                  f"incremental {mse['incremental']:.2f}  refit {mse['refit']:.2f}")
+
+        if args.full_search:
+            _, seconds = timed(lambda: service.fit_models(combined, n_jobs=1, cv_folds=args.cv_folds))
+            report.append({'update_rows': update_rows, 'model': 'full_search', 'seconds': seconds})
+            print(f"  full search (fit_models, {args.cv_folds}-fold CV) {seconds:.2f}s")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'options': vars(args), 'results': report}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
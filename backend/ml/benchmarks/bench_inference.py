@@ -0,0 +1,105 @@
+"""Parity check and latency benchmark for the compiled model evaluators.
+
+Trains every candidate model on synthetic bidders, then compares the
+compiled NumPy evaluator against scaling + sklearn predict at several
+batch sizes. The crossover for tree ensembles is where
+CompiledTreeEnsemble.max_rows should sit.
+
+    python benchmarks/bench_inference.py --train-rows 5000 --sizes 1 10 100 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compiled_model import compile_model
+from features import calculate_risk_labels
+from model_search import CANDIDATE_NAMES, make_candidate
+from synthetic import make_bidders
+
+FEATURE_NAMES = [
+    'total_projects', 'completed_projects', 'abandoned_projects',
+    'completion_rate', 'average_delay_days', 'budget_overruns_percent',
+    'quality_score', 'reputation_score', 'payment_disputes',
+    'days_since_last_project'
+]
+
+
+def sklearn_single(model, scaler, row):
+    """The original predict_risk path: one-row DataFrame, transform, predict"""
+    features = pd.DataFrame([row], columns=FEATURE_NAMES)
+    return model.predict(scaler.transform(features))[0]
+
+
+def scale(scaler, X):
+    """The service's sklearn path: manual StandardScaler arithmetic, then predict"""
+    return (X - scaler.mean_) / scaler.scale_
+
+
+def per_call_seconds(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def fit_candidates(train_rows):
+    """(scaler, {name: model}) for every candidate, fitted on synthetic MinRate labels"""
+    train = make_bidders(train_rows, seed=1)
+    # Fitted on a frame, as fit_models does, so the original path sees feature names
+    scaler = StandardScaler().fit(train[FEATURE_NAMES])
+    X_train = scale(scaler, train[FEATURE_NAMES].to_numpy(dtype=np.float64))
+    y_train = calculate_risk_labels(train, 'MinRate')
+    return scaler, {name: make_candidate(name).fit(X_train, y_train) for name in CANDIDATE_NAMES}
+
+
+def check_parity(scaler, models, X_test, tolerance=1e-9):
+    """Compiled predictions must match scaling + sklearn predict within tolerance"""
+    failures = []
+    for name, model in models.items():
+        expected = model.predict(scale(scaler, X_test))
+        actual = compile_model(model, scaler).predict(X_test)
+        diff = np.abs(expected - actual)
+        mismatched = int(np.sum(diff > tolerance))
+        print(f"parity {name:<17} max |diff| {diff.max():.2e} over {len(X_test)} rows ({mismatched} > {tolerance:g})")
+        if mismatched:
+            failures.append(f"{name}: {mismatched} predictions")
+    if failures:
+        raise AssertionError(f"Compiled predictions differ from sklearn by more than {tolerance:g}: " + '; '.join(failures))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--train-rows', type=int, default=2000)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 1000, 10_000])
+    parser.add_argument('--repeat', type=int, default=200, help='single-row calls to time')
+    parser.add_argument('--tolerance', type=float, default=1e-9)
+    args = parser.parse_args()
+
+    scaler, models = fit_candidates(args.train_rows)
+    X_test = make_bidders(max(args.sizes), seed=2)[FEATURE_NAMES].to_numpy(dtype=np.float64)
+    check_parity(scaler, models, X_test, args.tolerance)
+
+    for name, model in models.items():
+        compiled = compile_model(model, scaler)
+        row = X_test[0]
+        original = per_call_seconds(lambda: sklearn_single(model, scaler, row), args.repeat)
+        print(f"{name:<17} original predict_risk path (DataFrame + transform + predict): {original * 1e6:9.1f} us/row")
+
+        for size in args.sizes:
+            X = X_test[:size]
+            repeat = max(3, args.repeat // size)
+            sklearn_seconds = per_call_seconds(lambda: model.predict(scale(scaler, X)), repeat)
+            compiled_seconds = per_call_seconds(lambda: compiled.predict(X), repeat)
+            print(f"  {size:>7} rows  sklearn {sklearn_seconds * 1e6:11.1f} us  compiled {compiled_seconds * 1e6:11.1f} us  "
+                  f"({sklearn_seconds / compiled_seconds:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Cold-start timings for the ML service: import, app creation, readiness and first prediction.
+
+Each run is a fresh interpreter, so nothing is warm in sys.modules:
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r'''
+import json, sys, time
+start = time.perf_counter()
+import ml_service
+imported = time.perf_counter()
+heavy = [name for name in ('web3', 'sklearn', 'pandas', 'joblib') if name in sys.modules]
+
+app = ml_service.create_app()
+created = time.perf_counter()
+client = app.test_client()
+assert client.get('/health').status_code == 200
+first_health = time.perf_counter()
+
+while client.get('/ready').status_code != 200:
+    if ml_service.startup['status'] == 'failed':
+        raise SystemExit(ml_service.startup['error'])
+    time.sleep(0.002)
+ready = time.perf_counter()
+
+address = ml_service.risk_ml.bidder_index.to_json_values('bidder_address', [0])[0]
+response = client.post('/assess_risk', json={'bidder_address': address, 'bid_type': 'MinRate',
+                                             'bid_amount': 30000, 'project_budget': 50000})
+assert response.status_code == 200, response.get_json()
+predicted = time.perf_counter()
+
+print(json.dumps({
+    'import_seconds': imported - start,
+    'create_app_seconds': created - imported,
+    'first_health_seconds': first_health - start,
+    'ready_seconds': ready - start,
+    'first_prediction_seconds': predicted - ready,
+    'heavy_modules_at_import': heavy,
+    'models_loaded': sum(model is not None for model in ml_service.risk_ml.models.values()),
+}))
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    runs = []
+    for _ in range(args.runs):
+        output = subprocess.run([sys.executable, '-c', CHILD], cwd=ML_DIR, check=True,
+                                capture_output=True, text=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{args.runs} cold starts, median seconds "
+          f"(models loaded: {runs[0]['models_loaded']}, heavy modules at import: {runs[0]['heavy_modules_at_import'] or 'none'})")
+    for key in ('import_seconds', 'create_app_seconds', 'first_health_seconds', 'ready_seconds',
+                'first_prediction_seconds'):
+        print(f"  {key:<26} {statistics.median(run[key] for run in runs):8.3f}")
+
+
+if __name__ == '__main__':
+    main()
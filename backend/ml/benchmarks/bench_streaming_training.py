@@ -0,0 +1,125 @@
+"""Peak memory, time and holdout error of in-memory versus streaming training.
+
+For each size, writes a synthetic CSV in chunks and trains on it in a
+fresh interpreter per mode: 'memory' (fit_models on the whole frame),
+'reservoir' and 'sgd' (fit_models_streaming). Peak RSS covers the training
+process and its search workers. Each run's models score a separate holdout
+set, so the error columns are comparable across modes.
+
+    python benchmarks/bench_streaming_training.py --rows 200000 2000000
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import write_csv
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = ('memory', 'reservoir', 'sgd')
+
+CHILD = r'''
+import json, os, resource, sys, time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, 'benchmarks')
+from ml_service import BID_TYPES, TrustChainRiskML
+from synthetic import make_bidders
+
+csv_path, mode, options = sys.argv[1], sys.argv[2], json.loads(sys.argv[3])
+trainer = TrustChainRiskML()
+search = {key: options[key] for key in ('n_jobs', 'cv_folds', 'time_budget')}
+
+start = time.perf_counter()
+if mode == 'memory':
+    models, scalers, metrics = trainer.fit_models(pd.read_csv(csv_path), **search)
+else:
+    models, scalers, metrics = trainer.fit_models_streaming(
+        csv_path, method=mode, chunksize=options['chunksize'], sample_size=options['sample_size'],
+        epochs=options['epochs'], **search)
+seconds = time.perf_counter() - start
+
+# VmHWM rather than RUSAGE_SELF, which carries over the parent's peak across exec
+with open('/proc/self/status') as f:
+    own_peak = next(int(line.split()[1]) for line in f if line.startswith('VmHWM:'))
+peak = max(own_peak, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) * 1024
+
+holdout = make_bidders(50_000, seed=999_999)
+holdout_mse = {}
+for bid_type, model in models.items():
+    rows = holdout[holdout['bid_type'] == bid_type]
+    predicted = model.predict(scalers[bid_type].transform(rows[trainer.feature_names]))
+    holdout_mse[bid_type] = float(np.mean((predicted - trainer.calculate_risk_labels(rows, bid_type)) ** 2))
+
+print(json.dumps({
+    'seconds': seconds,
+    'peak_rss': peak,
+    'selected': {bid_type: metrics[bid_type]['selected_model'] for bid_type in models},
+    'holdout_mse': holdout_mse,
+}), flush=True)
+# Stop search workers still finishing candidates past the time budget instead of joining them
+import multiprocessing
+for worker in multiprocessing.active_children():
+    worker.terminate()
+os._exit(0)
+'''
+
+
+def train(csv_path, mode, options):
+    result = subprocess.run([sys.executable, '-c', CHILD, csv_path, mode, json.dumps(options)],
+                            cwd=ML_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        return {'error': result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f'exit {result.returncode}'}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[200_000])
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--sample-size', type=int, default=20_000)
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--n-jobs', type=int, default=2)
+    parser.add_argument('--cv-folds', type=int, default=3)
+    parser.add_argument('--time-budget', type=float, default=120, help='candidate search budget per run (seconds)')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    options = {'chunksize': args.chunksize, 'sample_size': args.sample_size, 'epochs': args.epochs,
+               'n_jobs': args.n_jobs, 'cv_folds': args.cv_folds, 'time_budget': args.time_budget}
+    workdir = tempfile.mkdtemp(prefix='streaming-train-')
+    report = []
+    try:
+        for rows in args.rows:
+            csv_path = os.path.join(workdir, f'bidders_{rows}.csv')
+            write_csv(csv_path, rows)
+            print(f"{rows:,} rows ({os.path.getsize(csv_path) / 2**20:,.0f} MiB CSV)")
+
+            for mode in args.modes:
+                result = train(csv_path, mode, options)
+                report.append({'rows': rows, 'mode': mode, **result})
+                if 'error' in result:
+                    print(f"  {mode:<9} failed: {result['error']}")
+                    continue
+                errors = ', '.join(f"{bid_type} {mse:.2f} ({result['selected'][bid_type]})"
+                                   for bid_type, mse in result['holdout_mse'].items())
+                print(f"  {mode:<9} {result['seconds']:8.1f}s  peak RSS {result['peak_rss'] / 2**20:7,.0f} MiB  "
+                      f"holdout MSE {errors}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'options': options, 'results': report}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Memory across gunicorn workers: per-worker dataset copies vs the shared feature store.
+
+Starts gunicorn on a synthetic dataset twice: once with every worker loading
+its own copy (the dev app factory, no preload) and once with gunicorn.conf.py
+(preload + memory-mapped FeatureStore). It then reports each worker's
+proportional set size (PSS), where shared pages are split between the
+processes that map them. Linux only.
+
+    python benchmarks/bench_worker_memory.py --rows 500000 --workers 4
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import make_bidders
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def pss_mb(pid):
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            if line.startswith('Pss:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def worker_pids(master_pid):
+    with open(f'/proc/{master_pid}/task/{master_pid}/children') as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def wait_until_serving(url, workers, timeout=300):
+    deadline = time.monotonic() + timeout
+    served = 0
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f'{url}/ready', timeout=5) as response:
+                if response.status == 200:
+                    served += 1
+                    # Hit every worker at least once so lazy loads have happened
+                    if served >= workers * 4:
+                        return
+        except Exception:
+            time.sleep(0.2)
+    raise RuntimeError('gunicorn did not become ready')
+
+
+def run(label, args, env, port, workers):
+    url = f'http://127.0.0.1:{port}'
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', str(workers), *args],
+        cwd=ML_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_serving(url, workers)
+        # Touch the feature rows in every worker, as real traffic would
+        for _ in range(workers * 4):
+            urllib.request.urlopen(f'{url}/get_bidder_stats?limit=10000&sort=-reputation_score', timeout=60).read()
+        pids = worker_pids(process.pid)
+        per_worker = [pss_mb(pid) for pid in pids]
+        master = pss_mb(process.pid)
+        print(f"{label:<34} master {master:8.1f} MB  workers {sum(per_worker):8.1f} MB "
+              f"({', '.join(f'{mb:.0f}' for mb in per_worker)})  total {master + sum(per_worker):8.1f} MB")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=300_000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=5091)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset = os.path.join(tmp, 'dataset.csv')
+        make_bidders(args.rows).to_csv(dataset, index=False)
+        env = dict(os.environ, ML_DATASET_PATH=dataset, ML_FEATURE_STORE=os.path.join(tmp, 'feature_store'))
+
+        print(f"{args.rows:,} bidders, {args.workers} workers")
+        run('per-worker copies (no preload)', ['ml_service:create_app(background=False)'],
+            env, args.port, args.workers)
+        run('preload + shared feature store', ['-c', 'gunicorn.conf.py'], env, args.port + 1, args.workers)
+
+
+if __name__ == '__main__':
+    main()
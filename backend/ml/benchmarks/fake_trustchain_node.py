@@ -0,0 +1,235 @@
+"""In-process JSON-RPC stand-in for a node serving the TrustChain contract.
+
+Answers eth_call for the contract's view functions from synthetic state,
+plus eth_blockNumber, eth_getBlockByNumber and eth_getLogs, so chain
+extraction can be exercised and benchmarked without anvil. Each HTTP
+request sleeps `latency` seconds to model the network round trip.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+CONTRACTS_JSON = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'frontend', 'src', 'contracts', 'deployedContracts.json'
+)
+
+
+def load_trustchain_abi():
+    with open(CONTRACTS_JSON) as f:
+        contract = json.load(f)['TrustChain']
+    return contract['address'], contract['abi']
+
+
+class FakeTrustChain:
+    """Synthetic contract state: bidders, projects, bonds and disputes"""
+
+    def __init__(self, n_bidders=1000, bonds_per_bidder=3, dispute_rate=0.1, seed=42):
+        rng = np.random.default_rng(seed)
+        self.now = 1_750_000_000
+        self.block_number = 1_000
+
+        self.bidders = [
+            (i, '0x' + f'{i:040x}', int(rng.integers(0, 50)), int(rng.integers(0, 20)), False)
+            for i in range(1, n_bidders + 1)
+        ]
+        n_bonds = n_bidders * bonds_per_bidder
+        self.projects = {}
+        self.bonds = {}
+        for bond_id in range(1, n_bonds + 1):
+            project_id = bond_id
+            budget = int(rng.integers(10_000, 100_000))
+            deadline = self.now + int(rng.integers(-200, 100)) * 86400
+            self.projects[project_id] = (
+                '0x' + '0' * 39 + '1', project_id, 'description', f'Project {project_id}',
+                30, deadline, budget, True, 0, '0x' + '0' * 40, False
+            )
+            obligor = self.bidders[int(rng.integers(0, n_bidders))][1]
+            self.bonds[bond_id] = (obligor, project_id, int(rng.integers(0, 3)), int(budget * rng.uniform(0.8, 1.3)))
+        self.disputes = [
+            (i, int(bond_id), '0x' + '0' * 40, '0x' + '0' * 40, 'evidence', False, 0)
+            for i, bond_id in enumerate(rng.choice(np.arange(1, n_bonds + 1), int(n_bonds * dispute_rate)), start=1)
+        ]
+
+        # (block_number, event name, args) emitted by the mutation helpers below
+        self.events = []
+        self.fork = 0
+        self.reorged_below = 0
+
+    def block_hash(self, number):
+        # Blocks at or above a reorg point get a new hash
+        salt = self.fork if number > self.reorged_below else 0
+        return '0x' + hashlib.sha256(f'{salt}:{number}'.encode()).hexdigest()
+
+    def mine(self, blocks=1, seconds_per_block=3):
+        self.block_number += blocks
+        self.now += blocks * seconds_per_block
+
+    def add_bidder(self, reputation=10):
+        bidder_id = len(self.bidders) + 1
+        address = '0x' + f'{bidder_id:040x}'
+        self.bidders.append((bidder_id, address, 0, reputation, False))
+        self.events.append((self.block_number, 'BidderCreated', {'bidder': address, 'bidderId': bidder_id}))
+        return address
+
+    def award_bond(self, bidder_id, budget=50_000, amount=55_000, days_to_deadline=30):
+        project_id = max(self.projects) + 1
+        self.projects[project_id] = (
+            '0x' + '0' * 39 + '1', project_id, 'description', f'Project {project_id}',
+            30, self.now + days_to_deadline * 86400, budget, True, 0, '0x' + '0' * 40, False
+        )
+        address = self.bidders[bidder_id - 1][1]
+        self.bonds[len(self.bonds) + 1] = (address, project_id, 0, amount)
+        self.events.append((self.block_number, 'BondAwarded',
+                            {'projectId': project_id, 'bidder': address, 'amount': amount, 'initialPayment': 0}))
+        return len(self.bonds)
+
+    def release_payment(self, bond_id, completed=True):
+        obligor, project_id, _, amount = self.bonds[bond_id]
+        self.bonds[bond_id] = (obligor, project_id, 1 if completed else 0, amount)
+        self.events.append((self.block_number, 'PaymentReleased',
+                            {'bondId': bond_id, 'amount': amount, 'newCompletion': 4 if completed else 2}))
+
+    def open_dispute(self, bond_id):
+        obligor, project_id, _, amount = self.bonds[bond_id]
+        self.bonds[bond_id] = (obligor, project_id, 2, amount)
+        self.disputes.append((len(self.disputes) + 1, bond_id, obligor, '0x' + '0' * 40, 'evidence', False, 0))
+        self.events.append((self.block_number, 'TransparencyLog',
+                            {'projectId': project_id, 'action': 'Dispute created', 'actor': obligor}))
+
+    def reorg(self, depth):
+        """Replace the last `depth` blocks; their events are re-included at the new head"""
+        fork_point = self.block_number - depth
+        self.fork += 1
+        self.reorged_below = fork_point
+        self.events = [(block if block <= fork_point else self.block_number, name, args)
+                       for block, name, args in self.events]
+
+    def view(self, name, args):
+        if name == 'bidderCount':
+            return len(self.bidders)
+        if name == 'bondCount':
+            return len(self.bonds)
+        if name == 'disputeCount':
+            return len(self.disputes)
+        if name == 'bidders':
+            return self.bidders[args[0] - 1]
+        if name == 'projects':
+            return self.projects[args[0]]
+        if name == 'disputes':
+            return self.disputes[args[0] - 1]
+        bond = self.bonds[args[0]]
+        return {
+            'getBondObligor': bond[0],
+            'getBondProjectId': bond[1],
+            'getBondStatus': bond[2],
+            'getBondAmount': bond[3],
+        }[name]
+
+
+class FakeNode:
+    """Threaded HTTP JSON-RPC server backed by a FakeTrustChain"""
+
+    def __init__(self, chain=None, latency=0.0):
+        from web3 import Web3
+        from chain_extract import _abi_type
+
+        self.chain = chain or FakeTrustChain()
+        self.latency = latency
+        self.address, abi = load_trustchain_abi()
+        self.w3 = Web3()
+        self.requests = 0
+
+        # selector -> (name, input types, output types)
+        from eth_utils import event_abi_to_log_topic, function_abi_to_4byte_selector
+        self.events = {
+            entry['name']: {'topic': '0x' + event_abi_to_log_topic(entry).hex(), 'inputs': entry['inputs']}
+            for entry in abi if entry.get('type') == 'event'
+        }
+        self.functions = {}
+        for entry in abi:
+            if entry.get('type') == 'function':
+                self.functions['0x' + function_abi_to_4byte_selector(entry).hex()] = (
+                    entry['name'],
+                    [_abi_type(param) for param in entry['inputs']],
+                    [_abi_type(param) for param in entry['outputs']]
+                )
+
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                node.requests += 1
+                if node.latency:
+                    time.sleep(node.latency)
+                reply = [node.handle(r) for r in body] if isinstance(body, list) else node.handle(body)
+                data = json.dumps(reply).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def handle(self, request):
+        try:
+            return {'jsonrpc': '2.0', 'id': request['id'], 'result': self._dispatch(request['method'], request['params'])}
+        except Exception as e:
+            return {'jsonrpc': '2.0', 'id': request['id'], 'error': {'code': -32000, 'message': str(e)}}
+
+    def _dispatch(self, method, params):
+        if method == 'eth_blockNumber':
+            return hex(self.chain.block_number)
+        if method == 'eth_getBlockByNumber':
+            number = self.chain.block_number if params[0] == 'latest' else int(params[0], 16)
+            timestamp = self.chain.now - (self.chain.block_number - number) * 3
+            return {'number': hex(number), 'hash': self.chain.block_hash(number), 'timestamp': hex(timestamp)}
+        if method == 'eth_getLogs':
+            start, end = int(params[0]['fromBlock'], 16), int(params[0]['toBlock'], 16)
+            return [self._encode_log(block, name, args)
+                    for block, name, args in self.chain.events if start <= block <= end]
+        if method == 'eth_call':
+            data = params[0]['data']
+            name, input_types, types = self.functions[data[:10]]
+            args = self.w3.codec.decode(input_types, bytes.fromhex(data[10:]))
+            values = self.chain.view(name, list(args))
+            encoded = self.w3.codec.encode(types, [values] if len(types) == 1 else list(values))
+            return '0x' + encoded.hex()
+        raise ValueError(f'method {method} not supported')
+
+    def _encode_log(self, block, name, args):
+        event = self.events[name]
+        topics = [event['topic']]
+        data_types, data_values = [], []
+        for param in event['inputs']:
+            if param['indexed']:
+                topics.append('0x' + self.w3.codec.encode([param['type']], [args[param['name']]]).hex())
+            else:
+                data_types.append(param['type'])
+                data_values.append(args[param['name']])
+        return {
+            'address': self.address,
+            'blockNumber': hex(block),
+            'blockHash': self.chain.block_hash(block),
+            'topics': topics,
+            'data': '0x' + self.w3.codec.encode(data_types, data_values).hex(),
+            'removed': False
+        }
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
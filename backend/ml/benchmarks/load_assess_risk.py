@@ -0,0 +1,175 @@
+"""Load test for /assess_risk with and without request coalescing.
+
+Starts the service under gunicorn (one gthread worker) for each
+configuration, then drives it with concurrent keep-alive clients for a
+fixed duration. Every request uses a random bidder and bid amount and the
+assessment cache is disabled, so each call really scores. Reports
+throughput, latency percentiles and the coalescer's mean batch size.
+
+    python benchmarks/load_assess_risk.py --concurrency 1 16 64 --duration 10
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, threads, env):
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', '1', '-k', 'gthread', '--threads', str(threads),
+         '-b', f'127.0.0.1:{port}', '--log-level', 'warning', 'ml_service:create_app(background=False)'],
+        cwd=ML_DIR, env={**os.environ, **env}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            status, _ = request(port, 'GET', '/ready')
+            if status == 200:
+                return server
+        except OSError:
+            pass
+        time.sleep(0.1)
+    server.kill()
+    raise SystemExit('ML service did not become ready')
+
+
+def request(port, method, path, body=None, connection=None):
+    conn = connection or http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                 headers={'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+    if connection is None:
+        conn.close()
+    return response.status, payload
+
+
+def client_process(port, addresses, n_threads, duration, seed, results):
+    """One load-generating process: n_threads keep-alive clients, returns their latencies"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(thread_seed):
+        rng = random.Random(thread_seed)
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        own = []
+        while time.monotonic() < stop_at:
+            body = {'bidder_address': rng.choice(addresses), 'bid_type': rng.choice(['MinRate', 'FixRate']),
+                    'bid_amount': rng.uniform(10_000, 90_000), 'project_budget': 100_000}
+            start = time.perf_counter()
+            try:
+                status, _ = request(port, 'POST', '/assess_risk', body, connection=conn)
+            except (OSError, http.client.HTTPException):
+                status = None
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            own.append(time.perf_counter() - start)
+            if status != 200:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target=client, args=(seed * 1000 + i,)) for i in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put((latencies, errors[0]))
+
+
+def run_load(port, addresses, concurrency, duration, processes):
+    processes = max(1, min(processes, concurrency))
+    results = multiprocessing.Queue()
+    workers = []
+    for p in range(processes):
+        n_threads = concurrency // processes + (p < concurrency % processes)
+        worker = multiprocessing.Process(target=client_process, args=(port, addresses, n_threads, duration, p, results))
+        worker.start()
+        workers.append(worker)
+
+    latencies, errors = [], 0
+    for _ in workers:
+        own, own_errors = results.get()
+        latencies.extend(own)
+        errors += own_errors
+    for worker in workers:
+        worker.join()
+
+    latencies = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': len(latencies) / duration,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 16, 64])
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--threads', type=int, default=64, help='gunicorn worker threads')
+    parser.add_argument('--client-processes', type=int, default=2)
+    parser.add_argument('--window-ms', type=float, default=2)
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--compiled', choices=['on', 'off', 'both'], default='both',
+                        help='ML_COMPILED_INFERENCE setting(s) to test')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    compiled_settings = {'on': ['1'], 'off': ['0'], 'both': ['1', '0']}[args.compiled]
+    report = []
+    for compiled in compiled_settings:
+        for coalesce in ('0', '1'):
+            env = {'ML_CACHE_SIZE': '0', 'ML_COMPILED_INFERENCE': compiled, 'ML_COALESCE': coalesce,
+                   'ML_COALESCE_WINDOW_MS': str(args.window_ms), 'ML_COALESCE_MAX_BATCH': str(args.max_batch)}
+            port = free_port()
+            server = start_server(port, args.threads, env)
+            try:
+                _, stats = request(port, 'GET', f'/get_bidder_stats?fields=bidder_address&limit={10_000}')
+                addresses = [bidder['bidder_address'] for bidder in stats['bidders']]
+                label = f"compiled={'on' if compiled == '1' else 'off'} coalesce={'on' if coalesce == '1' else 'off'}"
+                print(label)
+                for concurrency in args.concurrency:
+                    before = request(port, 'GET', '/health')[1]['coalescer']
+                    result = run_load(port, addresses, concurrency, args.duration, args.client_processes)
+                    coalescer = request(port, 'GET', '/health')[1]['coalescer']
+                    result['mean_batch'] = None
+                    if coalescer and coalescer['batches'] > before['batches']:
+                        result['mean_batch'] = ((coalescer['items'] - before['items'])
+                                                / (coalescer['batches'] - before['batches']))
+                    report.append({'compiled': compiled == '1', 'coalesce': coalesce == '1',
+                                   'concurrency': concurrency, **result})
+                    batch = f"  mean batch {result['mean_batch']:.1f}" if result['mean_batch'] else ''
+                    print(f"  {concurrency:>4} clients  {result['throughput']:8.0f} req/s  p50 {result['p50_ms']:7.2f} ms  "
+                          f"p99 {result['p99_ms']:7.2f} ms  errors {result['errors']}{batch}")
+            finally:
+                server.terminate()
+                server.wait()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'options': vars(args), 'results': report}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
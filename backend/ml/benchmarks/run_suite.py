@@ -0,0 +1,310 @@
+"""End-to-end benchmark suite over synthetic datasets of increasing size.
+
+For every size it writes a synthetic dataset CSV (see synthetic.py) and
+times the pipeline stage by stage: CSV load, bidder-index build, risk
+labels, the model search per bid type and candidate, single and batch
+prediction, and /get_bidder_stats and /assess_risk end to end through
+the Flask test client. Results go to a JSON file; --compare checks them
+against an earlier run and exits non-zero on regressions.
+
+First it runs the correctness checks of the optimized paths, and stops
+with an AssertionError if any fails (--skip-checks skips them): vectorized
+labels against the row-by-row loop (bench_labels.py), compiled models
+against sklearn (bench_inference.py) and explanations adding up to the
+risk score (bench_explanations.py); and that training on too few rows
+per bid type skips them instead of failing; and that malformed requests
+get a 400 or a per-item error, not a 500.
+
+    python benchmarks/run_suite.py --sizes 10000 100000 1000000 --json results.json
+    python benchmarks/run_suite.py --sizes 10000 100000 --compare results.json
+
+Training runs on at most --train-rows rows per size (a random sample),
+since the full search on millions of rows takes hours.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ML_DIR)
+
+# Every /assess_risk call in the suite should score, not hit the result cache
+os.environ.setdefault('ML_CACHE_SIZE', '0')
+
+import pandas as pd
+import sklearn
+
+import bench_explanations
+import bench_inference
+import bench_labels
+import ml_service
+from bidder_index import BidderIndex
+from ml_service import BID_TYPES, TrustChainRiskML
+from synthetic import make_bidders, write_csv
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def latency_stats(fn, calls):
+    """Per-call latency percentiles (ms) over calls invocations of fn(i)"""
+    latencies = np.empty(calls)
+    for i in range(calls):
+        start = time.perf_counter()
+        fn(i)
+        latencies[i] = time.perf_counter() - start
+    latencies *= 1000
+    return {
+        'calls': calls,
+        'mean_ms': float(latencies.mean()),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+    }
+
+
+def check_correctness():
+    """Parity checks of the optimized paths against their references; each raises AssertionError on failure"""
+    bench_labels.check_parity()
+    scaler, models = bench_inference.fit_candidates(2000)
+    bench_inference.check_parity(scaler, models, make_bidders(10_000, seed=2)[bench_inference.FEATURE_NAMES].to_numpy())
+    bench_explanations.check_additivity()
+    check_small_dataset()
+    check_request_validation()
+
+
+def check_small_dataset():
+    """fit_models on fewer than 10 rows per bid type trains nothing, serially, in parallel or on a budget"""
+    frame = make_bidders(20, seed=9)
+    assert frame['bid_type'].value_counts().max() < 10
+    service = TrustChainRiskML()
+    for n_jobs, time_budget in ((1, None), (None, None), (2, 60)):
+        models, scalers, metrics = service.fit_models(frame, n_jobs=n_jobs, cv_folds=2, time_budget=time_budget)
+        assert models == {} and scalers == {} and metrics == {}, (n_jobs, time_budget, sorted(models))
+    print(f"small dataset: no bid type trained on {len(frame)} rows")
+
+
+def check_request_validation():
+    """Malformed values in requests are rejected or reported per item, never a 500"""
+    frame = make_bidders(200, seed=10)
+    risk_ml = ml_service.risk_ml
+    risk_ml.install_bidder_index(BidderIndex.from_frame(frame, risk_ml.feature_names), frame)
+    client = ml_service.create_app(load=False).test_client()
+    address = frame['bidder_address'].iloc[0]
+
+    bids = [
+        {'bidder_address': address, 'bid_type': ['MinRate'], 'bid_amount': 90_000},
+        {'bidder_address': {'a': 1}, 'bid_type': 'MinRate', 'bid_amount': 90_000},
+        {'bidder_address': address, 'bid_type': 'MinRate', 'bid_amount': [1]},
+        {'bidder_address': address, 'bid_type': 'MinRate', 'bid_amount': 90_000},
+    ]
+    response = client.post('/rank_bids', json={'project_budget': 100_000, 'bids': bids})
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    assert [entry['index'] for entry in body['rankings']] == [3], body
+    assert [entry['index'] for entry in body['unscored']] == [0, 1, 2], body
+
+    for query in ('limit=0', 'limit=-5', 'offset=-1'):
+        response = client.get(f'/get_bidder_stats?{query}')
+        assert response.status_code == 400, (query, response.status_code, response.get_json())
+        response = client.get(f'/risk_rankings?{query}')
+        assert response.status_code == 400, (query, response.status_code, response.get_json())
+
+    response = client.post('/assess_risk', json={'bidder_address': address, 'bid_type': 'Foo'})
+    assert response.status_code == 400, (response.status_code, response.get_json())
+    assert risk_ml.get_bidder_risk_assessment(address, 'Foo') == {'error': 'Unknown bid type Foo'}
+
+    risk_ml.bidder_index = None
+    print("request validation: malformed requests rejected without a 500")
+
+
+def random_bids(frame, n, seed):
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(frame), n)
+    return [
+        {'bidder_address': address, 'bid_type': bid_type, 'bid_amount': float(amount), 'project_budget': 100_000}
+        for address, bid_type, amount in zip(
+            frame['bidder_address'].to_numpy()[rows],
+            rng.choice(BID_TYPES, n),
+            rng.uniform(10_000, 90_000, n)
+        )
+    ]
+
+
+def run_size(rows, args, workdir):
+    result = {'rows': rows}
+    csv_path = os.path.join(workdir, f'bidders_{rows}.csv')
+    _, result['generate_seconds'] = timed(lambda: write_csv(csv_path, rows))
+    result['csv_bytes'] = os.path.getsize(csv_path)
+
+    # Loading: the raw CSV read, then the service's load (read + bidder index)
+    frame, result['csv_load_seconds'] = timed(lambda: pd.read_csv(csv_path))
+    service = TrustChainRiskML()
+    _, result['service_load_seconds'] = timed(lambda: service.load_historical_data(csv_path))
+
+    result['labels'] = {}
+    for bid_type in BID_TYPES:
+        type_data = frame[frame['bid_type'] == bid_type]
+        _, seconds = timed(lambda: service.calculate_risk_labels(type_data, bid_type))
+        result['labels'][bid_type] = {'rows': len(type_data), 'seconds': seconds}
+
+    # Training: fit_models on a sample, serially so the per-candidate times don't compete for cores
+    train_frame = frame.sample(n=min(rows, args.train_rows), random_state=0)
+    (models, scalers, metrics), train_seconds = timed(
+        lambda: service.fit_models(train_frame, n_jobs=1, cv_folds=args.cv_folds))
+    result['train'] = {
+        'rows': len(train_frame),
+        'cv_folds': args.cv_folds,
+        'total_seconds': train_seconds,
+        'candidate_fit_seconds': {bid_type: m['candidate_fit_seconds'] for bid_type, m in metrics.items()},
+        'selected_model': {bid_type: m['selected_model'] for bid_type, m in metrics.items()},
+    }
+    service.install_models(models, scalers, metrics)
+
+    # Scoring through the service object, compiled evaluators as configured
+    bids = random_bids(frame, max(args.calls, max(args.batch_sizes)), seed=rows)
+    result['predict_single'] = latency_stats(
+        lambda i: service.get_bidder_risk_assessment(**bids[i]), args.calls)
+    result['predict_batch'] = {}
+    for size in args.batch_sizes:
+        _, seconds = timed(lambda: service.predict_risk_batch(bids[:size]))
+        result['predict_batch'][str(size)] = {'seconds': seconds, 'rows_per_second': size / seconds}
+
+    # HTTP end to end: the real routes through the test client, served by this service object
+    ml_service.risk_ml.bidder_index = service.bidder_index
+    ml_service.risk_ml.data_version += 1
+    ml_service.risk_ml.install_models(models, scalers, metrics)
+    client = ml_service.create_app(load=False).test_client()
+
+    result['get_bidder_stats'] = {
+        name: latency_stats(lambda i: client.get(f'{query}&offset={(i * 997) % max(1, rows - 100)}'), args.http_calls)
+        for name, query in (
+            ('default_page', '/get_bidder_stats?limit=100'),
+            ('sorted_filtered', '/get_bidder_stats?limit=100&sort=-reputation_score&min_completion_rate=0.8'),
+        )
+    }
+    result['assess_risk'] = latency_stats(lambda i: client.post('/assess_risk', json=bids[i]), args.http_calls)
+
+    ml_service.risk_ml.bidder_index = None
+    os.remove(csv_path)
+    return result
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ML_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'compiled_inference': ml_service.COMPILED_INFERENCE,
+    }
+
+
+# Too noisy, or not the service's own work, to flag as regressions
+UNCOMPARED = ('p99_ms', 'rows_per_second', 'generate_seconds')
+
+
+def timings(result, prefix=''):
+    """Flatten a size's results to {path: seconds-or-ms}, lower is better"""
+    flat = {}
+    for key, value in result.items():
+        path = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(timings(value, f'{path}.'))
+        elif isinstance(value, float) and key not in UNCOMPARED:
+            flat[path] = value
+    return flat
+
+
+def compare(report, baseline, tolerance, min_seconds):
+    """Print timings slower than baseline by more than tolerance; returns how many there were"""
+    regressions = 0
+    for rows, result in report['results'].items():
+        if rows not in baseline['results']:
+            continue
+        old = timings(baseline['results'][rows])
+        same_training = (baseline['results'][rows]['train']['rows'], baseline['results'][rows]['train']['cv_folds']) == \
+            (result['train']['rows'], result['train']['cv_folds'])
+        for path, value in timings(result).items():
+            if path not in old or old[path] <= 0 or (path.startswith('train.') and not same_training):
+                continue
+            # Millisecond timings are compared like the rest; ignore ones too small to be stable
+            seconds = old[path] / 1000 if path.endswith('_ms') else old[path]
+            if seconds < min_seconds:
+                continue
+            ratio = value / old[path]
+            if ratio > 1 + tolerance:
+                regressions += 1
+                print(f"REGRESSION {rows} rows {path}: {old[path]:.4g} -> {value:.4g} ({ratio:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--train-rows', type=int, default=20_000, help='training sample cap per size')
+    parser.add_argument('--cv-folds', type=int, default=3)
+    parser.add_argument('--calls', type=int, default=1000, help='single predictions to time')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[100, 1000, 10_000])
+    parser.add_argument('--http-calls', type=int, default=300, help='requests to time per endpoint')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--compare', help='earlier results file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown before flagging')
+    parser.add_argument('--min-seconds', type=float, default=0.0005, help='ignore baseline timings below this')
+    parser.add_argument('--skip-checks', action='store_true', help="don't run the correctness checks first")
+    args = parser.parse_args()
+
+    if not args.skip_checks:
+        check_correctness()
+
+    report = {'environment': environment(), 'options': vars(args), 'results': {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.sizes:
+            print(f"{rows:,} rows")
+            result = report['results'][str(rows)] = run_size(rows, args, workdir)
+            print(f"  csv load {result['csv_load_seconds']:.2f}s  service load {result['service_load_seconds']:.2f}s  "
+                  f"labels {sum(l['seconds'] for l in result['labels'].values()):.3f}s  "
+                  f"train {result['train']['total_seconds']:.1f}s ({result['train']['rows']:,} rows)")
+            for bid_type, fits in result['train']['candidate_fit_seconds'].items():
+                print(f"    {bid_type:<8} " + '  '.join(f"{name} {seconds:.2f}s" for name, seconds in fits.items()))
+            batch = '  '.join(f"{size}: {b['rows_per_second']:,.0f}/s" for size, b in result['predict_batch'].items())
+            print(f"  predict single p50 {result['predict_single']['p50_ms']:.3f} ms  batch {batch}")
+            stats = result['get_bidder_stats']
+            print(f"  /get_bidder_stats p50 {stats['default_page']['p50_ms']:.2f} ms "
+                  f"(sorted+filtered {stats['sorted_filtered']['p50_ms']:.2f} ms)  "
+                  f"/assess_risk p50 {result['assess_risk']['p50_ms']:.2f} ms p99 {result['assess_risk']['p99_ms']:.2f} ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance, args.min_seconds)
+        print(f"{regressions} regression(s) against {args.compare}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
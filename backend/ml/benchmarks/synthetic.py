@@ -0,0 +1,69 @@
+"""Synthetic bidder datasets with the same schema as dataset.csv.
+
+Columns are driven by one latent reliability score per bidder, so the
+correlations look like the real data: reliable bidders have more and
+better-finished projects, higher quality and reputation, fewer delays,
+overruns and disputes, and more recent activity. Money columns are
+log-normal. Magnitudes are calibrated on dataset.csv.
+
+    python benchmarks/synthetic.py --rows 1000000 --out bidders_1m.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+BID_TYPES = np.array(['MinRate', 'MaxRate', 'FixRate'])
+BID_TYPE_SHARES = [0.4, 0.2, 0.4]
+
+
+def make_bidders(n_rows, seed=42, first_id=1):
+    """Generate n_rows synthetic bidders, numbered from first_id"""
+    rng = np.random.default_rng(seed)
+    reliability = rng.standard_normal(n_rows)
+
+    def noise(scale):
+        return rng.normal(0, scale, n_rows)
+
+    total_projects = np.maximum(1, np.round(np.exp(3.0 + 0.35 * reliability + noise(0.35)))).astype(np.int64)
+    abandon_rate = np.clip(0.14 - 0.05 * reliability + noise(0.03), 0, 0.9)
+    abandoned_projects = rng.binomial(total_projects, abandon_rate)
+    completed_projects = total_projects - abandoned_projects - rng.binomial(total_projects - abandoned_projects, 0.03)
+
+    project_budget = np.exp(rng.normal(10.8, 0.4, n_rows)).round(2)
+    bid_ratio = np.exp(rng.normal(np.log(0.75), 0.35, n_rows))
+
+    return pd.DataFrame({
+        'bidder_address': np.char.add('0xBIDDER', np.arange(first_id, first_id + n_rows).astype(str)),
+        'total_projects': total_projects,
+        'completed_projects': completed_projects,
+        'abandoned_projects': abandoned_projects,
+        'completion_rate': (completed_projects / total_projects).round(2),
+        'average_delay_days': np.clip(np.round(28 - 10 * reliability + noise(8)), 0, 180).astype(np.int64),
+        'budget_overruns_percent': np.clip(np.round(47 - 16 * reliability + noise(15)), 0, 200).astype(np.int64),
+        'quality_score': np.clip(7.6 + 0.9 * reliability + noise(0.5), 1, 10).round(2),
+        'reputation_score': np.clip(7.15 + 1.1 * reliability + noise(0.5), 1, 10).round(2),
+        'payment_disputes': rng.poisson(np.exp(0.85 - 0.45 * reliability)),
+        'days_since_last_project': np.round(rng.exponential(240 * np.exp(-0.5 * reliability))).astype(np.int64),
+        'bid_type': BID_TYPES[rng.choice(len(BID_TYPES), n_rows, p=BID_TYPE_SHARES)],
+        'bid_amount': (project_budget * bid_ratio).round(2),
+        'project_budget': project_budget,
+        'total_contract_value': (np.maximum(completed_projects, 1) * np.exp(rng.normal(10.0, 0.5, n_rows))).round(2),
+    })
+
+
+def write_csv(path, rows, chunk_rows=500_000, seed=0):
+    """Write a synthetic dataset CSV of any size in bounded memory"""
+    for first in range(0, rows, chunk_rows):
+        chunk = make_bidders(min(chunk_rows, rows - first), seed=seed + first, first_id=first + 1)
+        chunk.to_csv(path, mode='w' if first == 0 else 'a', header=first == 0, index=False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, required=True)
+    parser.add_argument('--out', required=True)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_csv(args.out, args.rows, seed=args.seed)
+    print(f"Wrote {args.rows:,} bidders to {args.out}")
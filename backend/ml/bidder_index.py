@@ -0,0 +1,104 @@
+import numpy as np
+
+
+def normalize_address(address):
+    """Normalize a bidder address for index lookups (case-insensitive hex)"""
+    return str(address).strip().lower()
+
+
+class BidderIndex:
+    """Address -> row offset index over a contiguous bidder feature matrix.
+
+    Lookups use a dict by default. Given keys (sorted normalized addresses)
+    and key_rows, they binary-search those arrays instead, which lets a
+    memory-mapped FeatureStore segment or compact dataset be shared without
+    per-process dicts. Addresses may then be a fixed-width bytes array.
+    """
+
+    def __init__(self, addresses, features, contract_values, feature_names, integer_columns=(),
+                 keys=None, key_rows=None):
+        self.addresses = addresses
+        self.features = features
+        self.contract_values = contract_values
+        self.feature_names = list(feature_names)
+        self.integer_columns = set(integer_columns)
+        self.keys = keys
+        self.key_rows = key_rows
+        self._address_array = None
+        self._sort_orders = {}
+
+        # First occurrence wins, matching the old `.iloc[0]` lookup
+        self.index = None
+        if keys is None:
+            self.index = {}
+            for row, address in enumerate(addresses):
+                self.index.setdefault(normalize_address(address), row)
+
+    @classmethod
+    def from_frame(cls, df, feature_names):
+        """Build the index from a historical data frame"""
+        import pandas as pd
+
+        addresses = df['bidder_address'].astype(str).tolist()
+        features = np.ascontiguousarray(
+            df.reindex(columns=feature_names, fill_value=0).to_numpy(dtype=np.float64)
+        )
+        if 'total_contract_value' in df.columns:
+            contract_values = df['total_contract_value'].to_numpy(dtype=np.float64)
+        else:
+            contract_values = np.zeros(len(df), dtype=np.float64)
+
+        integer_columns = [name for name in feature_names
+                           if name in df.columns and pd.api.types.is_integer_dtype(df[name])]
+
+        return cls(addresses, features, np.ascontiguousarray(contract_values), feature_names, integer_columns)
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def lookup(self, address):
+        """Return the row offset for an address, or None if unknown"""
+        key = normalize_address(address)
+        if self.index is not None:
+            return self.index.get(key)
+        if self.keys.dtype.kind == 'S':
+            key = key.encode('utf-8')
+
+        pos = int(np.searchsorted(self.keys, key))
+        if pos < len(self.keys) and self.keys[pos] == key:
+            return int(self.key_rows[pos])
+        return None
+
+    def row_dict(self, row):
+        """Return a bidder's features as a plain dict"""
+        data = dict(zip(self.feature_names, self.features[row].tolist()))
+        data['total_contract_value'] = float(self.contract_values[row])
+        return data
+
+    def column(self, name):
+        """Return a whole column as an array (addresses as an object array)"""
+        if name == 'bidder_address':
+            if self._address_array is None:
+                self._address_array = (self.addresses if isinstance(self.addresses, np.ndarray)
+                                       else np.asarray(self.addresses, dtype=object))
+            return self._address_array
+        if name == 'total_contract_value':
+            return self.contract_values
+        return self.features[:, self.feature_names.index(name)]
+
+    def sorted_rows(self, name):
+        """Row offsets ordered by a column (ascending, stable), memoized per column"""
+        order = self._sort_orders.get(name)
+        if order is None:
+            order = np.argsort(self.column(name), kind='stable')
+            self._sort_orders[name] = order
+        return order
+
+    def to_json_values(self, name, rows):
+        """Serialize a column slice to JSON-ready Python values"""
+        values = self.column(name)[rows]
+        if values.dtype.kind == 'S':
+            return np.char.decode(values, 'ascii').tolist()
+        if name in self.integer_columns:
+            return values.astype(np.int64).tolist()
+        return values.tolist()
@@ -0,0 +1,234 @@
+"""Offline bulk scoring: every bidder's risk under every bid type, streamed to disk.
+
+The dataset is read in chunks (from the compact copy when it is fresh), and
+each chunk is scored with vectorized prediction on a pool of worker
+processes, all loading the same model version. Chunks are written in order
+as they complete, to one CSV or to a directory of Parquet part files, with
+at most two chunks per worker in flight, so memory stays bounded whatever
+the dataset size.
+
+After every written chunk, <output>.progress.json records how far the job
+got; running the same command again resumes after the last completed
+chunk (a CSV is truncated back to it first). --restart starts over.
+
+    python bulk_score.py --output scores.csv
+    python bulk_score.py --input big.csv --output scores.parquet --workers 16 --chunksize 500000
+
+Scores are the bid-independent baseline (no bid amount or budget), the
+same as /assess_risk without them.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from streaming_training import iter_chunks
+
+# Set in each worker process by _init_worker
+_scorer = None
+
+
+def _init_worker(model_version):
+    global _scorer
+    from ml_service import TrustChainRiskML
+
+    _scorer = TrustChainRiskML()
+    if model_version is None:
+        _scorer.load_models()
+    else:
+        _scorer.bundle = _scorer.load_registry_bundle(model_version)
+    # The pool provides the parallelism; forests fitted with n_jobs would oversubscribe the cores
+    for model in _scorer.models.values():
+        if model is not None and 'n_jobs' in model.get_params():
+            model.set_params(n_jobs=1)
+
+
+def _score_chunk(features, contract_values, bid_types):
+    """(rows, bid types) baseline risk scores of a chunk"""
+    missing = np.full(len(features), np.nan)
+    return np.column_stack([
+        _scorer._score_matrix(features, contract_values, bid_type, missing, missing) for bid_type in bid_types
+    ])
+
+
+def _category(scores):
+    return np.where(scores < 30, 'Low', np.where(scores < 70, 'Medium', 'High'))
+
+
+class _CsvOutput:
+    """One CSV, appended chunk by chunk; its byte size is the resume point"""
+
+    def __init__(self, path, resume_bytes):
+        self.path = path
+        mode = 'r+b' if resume_bytes else 'wb'
+        if resume_bytes and not os.path.exists(path):
+            raise SystemExit(f"{path} is missing; run with --restart")
+        self.file = open(path, mode)
+        self.file.truncate(resume_bytes)
+        self.file.seek(resume_bytes)
+
+    def write(self, frame, index):
+        frame.to_csv(self.file, header=self.file.tell() == 0, index=False)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetOutput:
+    """A directory of part-NNNNNN.parquet files, one per chunk, each renamed into place when complete"""
+
+    def __init__(self, path, resume_bytes):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow (pip install pyarrow), or write a .csv") from None
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.bytes = resume_bytes
+
+    def write(self, frame, index):
+        part_path = os.path.join(self.path, f'part-{index:06d}.parquet')
+        tmp_path = f'{part_path}.tmp'
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, part_path)
+        self.bytes += os.path.getsize(part_path)
+        return self.bytes
+
+    def close(self):
+        pass
+
+
+class BulkScoringJob:
+    """Scores a dataset chunk by chunk on a process pool, resumably (see the module docstring)"""
+
+    def __init__(self, input_path, output_path, workers=None, chunksize=100_000, output_format=None,
+                 model_version=None):
+        from ml_service import BID_TYPES, TrustChainRiskML
+
+        self.input_path = input_path
+        self.output_path = output_path
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        self.format = output_format or ('parquet' if output_path.endswith('.parquet') else 'csv')
+        self.bid_types = list(BID_TYPES)
+        self.progress_path = f'{output_path}.progress.json'
+
+        # Resolve the version once, so a promotion mid-job can't mix models across chunks
+        service = TrustChainRiskML()
+        self.model_version = model_version if model_version is not None else service.registry.production_version()
+        self.feature_names = service.feature_names
+
+    def settings(self):
+        """What a resumed run has to agree on with the run that wrote the progress file"""
+        stat = os.stat(self.input_path)
+        return {
+            'input': {'path': os.path.abspath(self.input_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns},
+            'output_format': self.format,
+            'chunksize': self.chunksize,
+            'bid_types': self.bid_types,
+            'model_version': self.model_version
+        }
+
+    def load_progress(self, restart=False):
+        """Progress to resume from, or a fresh one"""
+        fresh = {'settings': self.settings(), 'chunks_done': 0, 'rows_done': 0, 'output_bytes': 0, 'finished': False}
+        if restart or not os.path.exists(self.progress_path):
+            return fresh
+        with open(self.progress_path) as f:
+            progress = json.load(f)
+        if progress['settings'] != fresh['settings']:
+            raise SystemExit(f"{self.progress_path} was written for a different input, model version or options; "
+                             f"run with --restart to start over")
+        return progress
+
+    def save_progress(self, progress):
+        progress['updated_at'] = datetime.now().isoformat()
+        tmp_path = f'{self.progress_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(progress, f, indent=2)
+        os.replace(tmp_path, self.progress_path)
+
+    def run(self, restart=False):
+        import pandas as pd
+
+        progress = self.load_progress(restart)
+        if progress['finished']:
+            print(f"{self.output_path} is complete ({progress['rows_done']:,} rows); --restart to score again")
+            return progress
+        if progress['chunks_done']:
+            print(f"Resuming after chunk {progress['chunks_done']} ({progress['rows_done']:,} rows)")
+
+        output_class = _ParquetOutput if self.format == 'parquet' else _CsvOutput
+        output = output_class(self.output_path, progress['output_bytes'])
+        columns = ['bidder_address', *self.feature_names, 'total_contract_value']
+        start = time.perf_counter()
+        rows_at_start = progress['rows_done']
+
+        def write(index, addresses, future):
+            scores = future.result()
+            frame = pd.DataFrame({'bidder_address': addresses})
+            for i, bid_type in enumerate(self.bid_types):
+                frame[f'{bid_type.lower()}_risk_score'] = scores[:, i].round(4)
+                frame[f'{bid_type.lower()}_risk_category'] = _category(scores[:, i])
+            progress['output_bytes'] = output.write(frame, index)
+            progress['chunks_done'] = index + 1
+            progress['rows_done'] += len(frame)
+            self.save_progress(progress)
+
+            elapsed = time.perf_counter() - start
+            rate = (progress['rows_done'] - rows_at_start) / elapsed if elapsed else 0.0
+            print(f"chunk {index + 1}: {progress['rows_done']:,} rows scored, {rate:,.0f} rows/s, {elapsed:,.1f}s")
+
+        pending = {}
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(self.model_version,)) as executor:
+                chunks = iter_chunks(self.input_path, columns, self.chunksize, skip_rows=progress['rows_done'])
+                next_write = progress['chunks_done']
+                for index, chunk in enumerate(chunks, start=progress['chunks_done']):
+                    features = chunk.reindex(columns=self.feature_names, fill_value=0).to_numpy(dtype=np.float64)
+                    contract_values = chunk['total_contract_value'].to_numpy(dtype=np.float64)
+                    pending[index] = (chunk['bidder_address'].astype(str).to_numpy(),
+                                      executor.submit(_score_chunk, features, contract_values, self.bid_types))
+                    # Write finished chunks in order; wait on the oldest while the window is full
+                    while pending and (len(pending) >= 2 * self.workers or pending[next_write][1].done()):
+                        write(next_write, *pending.pop(next_write))
+                        next_write += 1
+                while pending:
+                    write(next_write, *pending.pop(next_write))
+                    next_write += 1
+        finally:
+            output.close()
+
+        progress['finished'] = True
+        self.save_progress(progress)
+        print(f"Wrote {progress['rows_done']:,} rows to {self.output_path} in {time.perf_counter() - start:,.1f}s")
+        return progress
+
+
+def main():
+    from ml_service import DATASET_PATH
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--input', default=DATASET_PATH, help='dataset CSV (its fresh .npcols copy is used if present)')
+    parser.add_argument('--output', required=True, help='.csv file, or .parquet directory of part files')
+    parser.add_argument('--format', choices=('csv', 'parquet'), help='default: from the output extension')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='scoring processes')
+    parser.add_argument('--chunksize', type=int, default=100_000, help='rows per chunk')
+    parser.add_argument('--model-version', type=int, help='model registry version (default: production)')
+    parser.add_argument('--restart', action='store_true', help='ignore earlier progress and start over')
+    args = parser.parse_args()
+
+    job = BulkScoringJob(args.input, args.output, args.workers, args.chunksize, args.format, args.model_version)
+    job.run(restart=args.restart)
+
+
+if __name__ == '__main__':
+    main()
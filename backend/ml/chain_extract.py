@@ -0,0 +1,368 @@
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Mirrors TrustChain.ProjectStatus as returned by getBondStatus(): 0 Approved, 1 Completed, 2 Disputed
+BOND_STATUS = {0: 'Approved', 1: 'Completed', 2: 'Disputed'}
+
+SECONDS_PER_DAY = 86400
+
+
+class RPCError(Exception):
+    """JSON-RPC error returned for a single call"""
+
+    def __init__(self, error):
+        self.code = error.get('code') if isinstance(error, dict) else None
+        message = error.get('message') if isinstance(error, dict) else error
+        super().__init__(f"RPC error {self.code}: {message}")
+
+
+def _abi_type(param):
+    """ABI type string for an input/output entry, expanding tuple components"""
+    abi_type = param['type']
+    if abi_type.startswith('tuple'):
+        inner = ','.join(_abi_type(component) for component in param['components'])
+        return f"({inner}){abi_type[len('tuple'):]}"
+    return abi_type
+
+
+class BatchRPCClient:
+    """JSON-RPC client that sends calls as batches over a pooled HTTP session.
+
+    Batches of up to batch_size calls are posted concurrently (at most
+    max_concurrency in flight). Transport failures, HTTP 429/5xx and
+    rate-limit errors on individual calls are retried with exponential
+    backoff and jitter.
+    """
+
+    RETRYABLE_HTTP_STATUS = {429, 500, 502, 503, 504}
+    # Limit exceeded / resource unavailable, as used by geth, anvil and hosted RPCs
+    RETRYABLE_RPC_CODES = {-32005, -32002, 429}
+
+    def __init__(self, provider_url, batch_size=100, max_concurrency=8, max_retries=5,
+                 backoff=0.25, timeout=30):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.provider_url = provider_url
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self._requests = requests
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_concurrency, pool_maxsize=max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.stats = {'http_requests': 0, 'rpc_calls': 0, 'retries': 0}
+
+    def call(self, calls):
+        """Run [(method, params), ...]; returns results in order, RPCError for failed calls"""
+        chunks = [calls[i:i + self.batch_size] for i in range(0, len(calls), self.batch_size)]
+        if len(chunks) <= 1:
+            return self._call_chunk(chunks[0]) if chunks else []
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            return list(itertools.chain.from_iterable(executor.map(self._call_chunk, chunks)))
+
+    def _call_chunk(self, calls):
+        results = [None] * len(calls)
+        pending = list(range(len(calls)))
+
+        for attempt in range(self.max_retries + 1):
+            ids = {}
+            batch = []
+            for position in pending:
+                method, params = calls[position]
+                with self._lock:
+                    request_id = next(self._ids)
+                ids[request_id] = position
+                batch.append({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params})
+
+            try:
+                replies = self._post(batch)
+            except (self._requests.RequestException, RPCError, ValueError):
+                if attempt == self.max_retries:
+                    raise
+                self._sleep(attempt)
+                continue
+
+            retry = []
+            for reply in replies:
+                position = ids.get(reply.get('id'))
+                if position is None:
+                    continue
+                if 'error' in reply:
+                    error = RPCError(reply['error'])
+                    if error.code in self.RETRYABLE_RPC_CODES and attempt < self.max_retries:
+                        retry.append(position)
+                    results[position] = error
+                else:
+                    results[position] = reply.get('result')
+
+            # Calls the node silently dropped from the batch are retried too
+            answered = {ids[reply.get('id')] for reply in replies if reply.get('id') in ids}
+            retry.extend(position for position in pending if position not in answered)
+
+            if not retry:
+                break
+            pending = retry
+            self._sleep(attempt)
+
+        for position in pending:
+            if results[position] is None:
+                results[position] = RPCError('no response after retries')
+        return results
+
+    def _post(self, batch):
+        with self._lock:
+            self.stats['http_requests'] += 1
+            self.stats['rpc_calls'] += len(batch)
+
+        response = self.session.post(self.provider_url, json=batch, timeout=self.timeout)
+        if response.status_code in self.RETRYABLE_HTTP_STATUS:
+            raise RPCError(f"HTTP {response.status_code}")
+        response.raise_for_status()
+
+        replies = response.json()
+        if isinstance(replies, dict):
+            # Some nodes answer a rejected batch with a single error object
+            raise RPCError(replies.get('error', replies))
+        return replies
+
+    def _sleep(self, attempt):
+        with self._lock:
+            self.stats['retries'] += 1
+        time.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random() / 2))
+
+
+class ContractReader:
+    """Encodes view calls against a contract ABI and decodes batched eth_call results"""
+
+    def __init__(self, client, contract_address, abi):
+        from web3 import Web3
+
+        self.client = client
+        self.w3 = Web3()
+        self.contract = self.w3.eth.contract(address=Web3.to_checksum_address(contract_address), abi=abi)
+        self._signatures = {}
+        self._events = None
+
+    def _signature(self, fn_name):
+        """(selector hex, input types, output types), cached per function"""
+        signature = self._signatures.get(fn_name)
+        if signature is None:
+            from eth_utils import function_abi_to_4byte_selector
+
+            fn_abi = self.contract.get_function_by_name(fn_name).abi
+            signature = (
+                '0x' + function_abi_to_4byte_selector(fn_abi).hex(),
+                [_abi_type(param) for param in fn_abi['inputs']],
+                [_abi_type(param) for param in fn_abi['outputs']]
+            )
+            self._signatures[fn_name] = signature
+        return signature
+
+    def _encode(self, fn_name, args):
+        # Plain eth_abi encoding: web3's encodeABI re-validates the ABI on every call
+        selector, input_types, _ = self._signature(fn_name)
+        return selector + self.w3.codec.encode(input_types, list(args)).hex()
+
+    def _decode(self, fn_name, data):
+        _, _, output_types = self._signature(fn_name)
+        values = self.w3.codec.decode(output_types, bytes.fromhex(data[2:]))
+        return values[0] if len(values) == 1 else values
+
+    def decode_log(self, log):
+        """(event name, args) for a raw log entry, or None for events not in the ABI"""
+        if self._events is None:
+            from eth_utils import event_abi_to_log_topic
+
+            self._events = {
+                '0x' + event_abi_to_log_topic(entry).hex(): entry
+                for entry in self.contract.abi if entry.get('type') == 'event'
+            }
+
+        event = self._events.get(log['topics'][0]) if log.get('topics') else None
+        if event is None:
+            return None
+
+        indexed = [param for param in event['inputs'] if param['indexed']]
+        data_params = [param for param in event['inputs'] if not param['indexed']]
+        args = {
+            param['name']: self.w3.codec.decode([_abi_type(param)], bytes.fromhex(topic[2:]))[0]
+            for param, topic in zip(indexed, log['topics'][1:])
+        }
+        values = self.w3.codec.decode([_abi_type(param) for param in data_params], bytes.fromhex(log['data'][2:]))
+        args.update((param['name'], value) for param, value in zip(data_params, values))
+        return event['name'], args
+
+    def call_many(self, calls, block='latest'):
+        """Run [(fn_name, args), ...] in batches; reverted or failed calls come back as None"""
+        payloads = [
+            ('eth_call', [{'to': self.contract.address, 'data': self._encode(fn_name, args)}, block])
+            for fn_name, args in calls
+        ]
+
+        decoded = []
+        for (fn_name, _), result in zip(calls, self.client.call(payloads)):
+            if isinstance(result, RPCError) or not result or result == '0x':
+                decoded.append(None)
+            else:
+                decoded.append(self._decode(fn_name, result))
+        return decoded
+
+
+class ChainExtractor:
+    """Builds the bidder feature frame from the TrustChain contract in a few batched passes.
+
+    Instead of several serial calls per bidder, every bidder, bond, project
+    and dispute is read with batched eth_calls pinned to one block, and the
+    per-bidder aggregates are computed locally.
+    """
+
+    def __init__(self, web3_provider, contract_address, abi, **client_options):
+        self.client = BatchRPCClient(web3_provider, **client_options)
+        self.reader = ContractReader(self.client, contract_address, abi)
+
+    def extract(self):
+        start = time.perf_counter()
+
+        state = self.read_state()
+        frame = self.aggregate(state)
+
+        elapsed = time.perf_counter() - start
+        self.client.stats['elapsed_seconds'] = elapsed
+        self.client.stats['bidders_per_second'] = len(frame) / elapsed if elapsed > 0 else 0.0
+        return frame
+
+    def head(self, block='latest'):
+        """(number, hash, timestamp) of a block"""
+        block_info, = self.client.call([('eth_getBlockByNumber', [block if isinstance(block, str) else hex(block), False])])
+        if isinstance(block_info, RPCError):
+            raise block_info
+        return int(block_info['number'], 16), block_info['hash'], int(block_info['timestamp'], 16)
+
+    def counts(self, block):
+        """(bidderCount, bondCount, disputeCount) at a block"""
+        return tuple(
+            int(value or 0) for value in self.reader.call_many(
+                [('bidderCount', ()), ('bondCount', ()), ('disputeCount', ())], hex(block)
+            )
+        )
+
+    def read_state(self):
+        """Raw contract tables (bidders, bonds, projects, disputes) at the latest block"""
+        # Pin every read to the same block so counts and entities agree
+        block, block_hash, now = self.head()
+        bidder_count, bond_count, dispute_count = self.counts(block)
+
+        bonds = self.read_bonds(range(1, bond_count + 1), block)
+        return {
+            'block': block,
+            'block_hash': block_hash,
+            'timestamp': now,
+            'counts': (bidder_count, bond_count, dispute_count),
+            'bidders': self.read_bidders(range(1, bidder_count + 1), block),
+            'bonds': bonds,
+            'projects': self.read_projects(sorted(set(bonds['project_id'])), block),
+            'disputes': self.read_disputes(range(1, dispute_count + 1), block),
+        }
+
+    def read_bidders(self, bidder_ids, block):
+        """bidders(id) -> (bidderId, bidderAddress, totalBids, reputationScore, blacklisted)"""
+        bidders = self.reader.call_many([('bidders', (i,)) for i in bidder_ids], hex(block))
+        return pd.DataFrame(
+            [(b[1].lower(), int(b[0]), b[1], float(b[3])) for b in bidders if b is not None],
+            columns=['key', 'bidder_id', 'address', 'reputation']
+        ).set_index('key')
+
+    def read_bonds(self, bond_ids, block):
+        """getBondObligor/ProjectId/Status/Amount(id) for each bond"""
+        bond_ids = list(bond_ids)
+        fields = ['getBondObligor', 'getBondProjectId', 'getBondStatus', 'getBondAmount']
+        values = self.reader.call_many(
+            [(fn_name, (bond_id,)) for bond_id in bond_ids for fn_name in fields], hex(block)
+        )
+        rows = [values[i:i + len(fields)] for i in range(0, len(values), len(fields))]
+        return pd.DataFrame(
+            [(bond_id, row[0].lower(), int(row[1]), int(row[2]), float(row[3]))
+             for bond_id, row in zip(bond_ids, rows) if None not in row],
+            columns=['bond_id', 'obligor', 'project_id', 'status', 'amount']
+        ).set_index('bond_id')
+
+    def read_projects(self, project_ids, block):
+        """projects(id) -> (creator, projectId, description, title, timePeriod, deadline, budget, ...)"""
+        project_ids = list(project_ids)
+        projects = self.reader.call_many([('projects', (pid,)) for pid in project_ids], hex(block))
+        return pd.DataFrame(
+            [(pid, float(p[6]), int(p[5])) for pid, p in zip(project_ids, projects) if p is not None],
+            columns=['project_id', 'budget', 'deadline']
+        ).set_index('project_id')
+
+    def read_disputes(self, dispute_ids, block):
+        """disputes(id) -> (disputeId, bondId, creator, mediator, evidence, resolved, outcome)"""
+        dispute_ids = list(dispute_ids)
+        disputes = self.reader.call_many([('disputes', (i,)) for i in dispute_ids], hex(block))
+        return pd.DataFrame(
+            [(dispute_id, int(d[1])) for dispute_id, d in zip(dispute_ids, disputes) if d is not None],
+            columns=['dispute_id', 'bond_id']
+        ).set_index('dispute_id')
+
+    @staticmethod
+    def aggregate(state):
+        """Per-bidder features from the raw contract tables"""
+        bidders = state['bidders']
+        bonds = state['bonds']
+        now = state['timestamp']
+
+        projects = state['projects'].reindex(bonds['project_id'])
+        disputes = state['disputes']['bond_id'].value_counts()
+        completed = (bonds['status'] == 1).to_numpy()
+        deadline = projects['deadline'].to_numpy(dtype=np.float64)
+        budget = projects['budget'].to_numpy(dtype=np.float64)
+        days_past_deadline = np.maximum(0.0, (now - deadline) / SECONDS_PER_DAY)
+
+        bonds = bonds.assign(
+            completed=completed,
+            disputed=(bonds['status'] == 2).to_numpy(),
+            delay_days=np.where(completed, 0.0, days_past_deadline),
+            overrun_percent=np.maximum(0.0, (bonds['amount'].to_numpy() - budget) / budget * 100),
+            days_since=days_past_deadline,
+            disputes=disputes.reindex(bonds.index, fill_value=0).to_numpy(),
+        )
+        per_bidder = bonds.groupby('obligor').agg(
+            total_projects=('status', 'size'),
+            completed_projects=('completed', 'sum'),
+            abandoned_projects=('disputed', 'sum'),
+            average_delay_days=('delay_days', 'mean'),
+            budget_overruns_percent=('overrun_percent', 'mean'),
+            payment_disputes=('disputes', 'sum'),
+            days_since_last_project=('days_since', 'min'),
+        ).reindex(bidders.index).fillna(0)
+
+        total = per_bidder['total_projects'].to_numpy(dtype=np.int64)
+        completed_count = per_bidder['completed_projects'].to_numpy(dtype=np.int64)
+        return pd.DataFrame({
+            'bidder_address': bidders['address'].to_numpy(),
+            'total_projects': total,
+            'completed_projects': completed_count,
+            'abandoned_projects': per_bidder['abandoned_projects'].to_numpy(dtype=np.int64),
+            'completion_rate': np.divide(completed_count, total, out=np.zeros(len(total)), where=total > 0),
+            'average_delay_days': per_bidder['average_delay_days'].to_numpy(dtype=np.float64),
+            'budget_overruns_percent': per_bidder['budget_overruns_percent'].to_numpy(dtype=np.float64),
+            'quality_score': bidders['reputation'].to_numpy() / 2,  # Normalize reputation to quality score
+            'reputation_score': bidders['reputation'].to_numpy(),
+            'payment_disputes': per_bidder['payment_disputes'].to_numpy(dtype=np.int64),
+            'days_since_last_project': per_bidder['days_since_last_project'].to_numpy(dtype=np.float64),
+        })
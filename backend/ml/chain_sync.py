@@ -0,0 +1,212 @@
+import os
+import time
+
+import joblib
+import pandas as pd
+
+from chain_extract import ChainExtractor, RPCError
+
+# Which entity each event touches, by the argument that names it
+EVENT_TARGETS = {
+    'bidders': {'BidderCreated': 'bidder', 'BondAwarded': 'bidder', 'BidSubmitted': 'bidder',
+                'RiskAssessmentSubmitted': 'bidder'},
+    'bonds': {'PaymentReleased': 'bondId', 'AuditorApproval': 'bondId'},
+    'disputes': {'DisputeResolved': 'disputeId', 'MediatorAssigned': 'disputeId'},
+    'projects': {'BondAwarded': 'projectId', 'TransparencyLog': 'projectId',
+                 'AuditorAssigned': 'projectId', 'WhistleblowerReport': 'projectId'},
+}
+
+
+class ChainSync:
+    """Incremental bidder feature refresh driven by contract event logs.
+
+    The first run does a full ChainExtractor read. Later runs fetch logs from
+    the checkpoint block onwards, re-read only the bidders, bonds, projects
+    and disputes those events (and new ids since the last counts) point at,
+    then re-aggregate the features locally. Every run rescans
+    the last reorg_depth blocks; if the checkpoint block's hash changed, the
+    entities touched in that window are re-read as well, and a reorg deeper
+    than the window falls back to a full resync.
+
+    Raw tables, features and the checkpoint are persisted together at
+    state_path.
+    """
+
+    def __init__(self, web3_provider, contract_address, abi, state_path, reorg_depth=12,
+                 log_chunk_blocks=2000, **client_options):
+        self.extractor = ChainExtractor(web3_provider, contract_address, abi, **client_options)
+        self.reader = self.extractor.reader
+        self.state_path = state_path
+        self.reorg_depth = reorg_depth
+        self.log_chunk_blocks = log_chunk_blocks
+        self.state = joblib.load(state_path) if os.path.exists(state_path) else None
+
+    def sync(self):
+        """Bring the features up to the chain head; returns (features frame, summary)"""
+        start = time.perf_counter()
+        head, head_hash, now = self.extractor.head()
+
+        if self.state is None or head < self.state['block']:
+            return self._full_sync(start, reason='no checkpoint' if self.state is None else 'chain behind checkpoint')
+
+        state = self.state
+        from_block = max(0, state['block'] + 1 - self.reorg_depth)
+        touched = _empty_touched()
+
+        _, checkpoint_hash, _ = self.extractor.head(state['block'])
+        reorged = checkpoint_hash != state['block_hash']
+        if reorged:
+            _, anchor_hash, _ = self.extractor.head(state['anchor_block'])
+            if anchor_hash != state['anchor_hash']:
+                return self._full_sync(start, reason='reorg deeper than reorg_depth')
+            # Events from orphaned blocks may be gone; re-read whatever they touched
+            for block, block_touched in state['recent_touched'].items():
+                if block >= from_block:
+                    _merge_touched(touched, block_touched)
+
+        events = self._fetch_events(from_block, head)
+        touched_by_block = {}
+        for block, name, args in events:
+            block_touched = touched_by_block.setdefault(block, _empty_touched())
+            for kind, event_args in EVENT_TARGETS.items():
+                if name in event_args:
+                    value = args[event_args[name]]
+                    block_touched[kind].add(value.lower() if kind == 'bidders' else int(value))
+            _merge_touched(touched, block_touched)
+
+        refreshed = self._refresh(touched, head, now)
+
+        state['recent_touched'] = {
+            block: block_touched
+            for block, block_touched in {**state['recent_touched'], **touched_by_block}.items()
+            if block > head - self.reorg_depth
+        }
+        self._checkpoint(head, head_hash)
+
+        return state['features'], {
+            'mode': 'incremental',
+            'from_block': from_block,
+            'to_block': head,
+            'events': len(events),
+            'reorg_detected': reorged,
+            **refreshed,
+            'elapsed_seconds': time.perf_counter() - start,
+            **self.extractor.client.stats
+        }
+
+    def _full_sync(self, start, reason):
+        state = self.extractor.read_state()
+        state['features'] = ChainExtractor.aggregate(state)
+        state['recent_touched'] = {}
+        self.state = state
+        self._checkpoint(state['block'], state['block_hash'])
+
+        return state['features'], {
+            'mode': 'full',
+            'reason': reason,
+            'to_block': state['block'],
+            'bidders_read': len(state['bidders']),
+            'elapsed_seconds': time.perf_counter() - start,
+            **self.extractor.client.stats
+        }
+
+    def _fetch_events(self, from_block, to_block):
+        """Decoded (block, name, args) contract events, eth_getLogs ranges sent as one batch"""
+        ranges = [(start, min(start + self.log_chunk_blocks - 1, to_block))
+                  for start in range(from_block, to_block + 1, self.log_chunk_blocks)]
+        results = self.extractor.client.call([
+            ('eth_getLogs', [{'address': self.reader.contract.address, 'fromBlock': hex(start), 'toBlock': hex(end)}])
+            for start, end in ranges
+        ])
+
+        events = []
+        for result in results:
+            if isinstance(result, RPCError):
+                raise result
+            for log in result:
+                if log.get('removed'):
+                    continue
+                decoded = self.reader.decode_log(log)
+                if decoded is not None:
+                    events.append((int(log['blockNumber'], 16),) + decoded)
+        return events
+
+    def _refresh(self, touched, head, now):
+        """Re-read the touched entities plus anything new since the last counts"""
+        state = self.state
+        extractor = self.extractor
+        bond_ids, dispute_ids, project_ids = touched['bonds'], touched['disputes'], touched['projects']
+        keys = set(touched['bidders'])
+
+        bidder_count, bond_count, dispute_count = extractor.counts(head)
+        old_bidders, old_bonds, old_disputes = state['counts']
+        bidder_ids = set(range(old_bidders + 1, bidder_count + 1))
+        bond_ids |= set(range(old_bonds + 1, bond_count + 1))
+        dispute_ids |= set(range(old_disputes + 1, dispute_count + 1))
+        # Retry entities below the old counts whose earlier reads failed
+        bidder_ids |= set(range(1, old_bidders + 1)) - set(state['bidders']['bidder_id'])
+        bond_ids |= set(range(1, old_bonds + 1)) - set(state['bonds'].index)
+        dispute_ids |= set(range(1, old_disputes + 1)) - set(state['disputes'].index)
+        # Counts only shrink when a reorg dropped entities
+        state['bidders'] = state['bidders'][state['bidders']['bidder_id'] <= bidder_count]
+        state['bonds'] = state['bonds'][state['bonds'].index <= bond_count]
+        state['disputes'] = state['disputes'][state['disputes'].index <= dispute_count]
+        state['counts'] = (bidder_count, bond_count, dispute_count)
+
+        # Disputes first: they point at bonds whose status may have changed
+        disputes = extractor.read_disputes(sorted(i for i in dispute_ids if i <= dispute_count), head)
+        state['disputes'] = _upsert(state['disputes'], disputes)
+        bond_ids |= set(disputes['bond_id'])
+
+        bonds = state['bonds']
+        bond_ids |= set(bonds.index[bonds['project_id'].isin(project_ids)])
+        changed_bonds = extractor.read_bonds(sorted(i for i in bond_ids if i <= bond_count), head)
+        state['bonds'] = _upsert(bonds, changed_bonds)
+        keys |= set(changed_bonds['obligor'])
+
+        project_ids |= set(changed_bonds['project_id'])
+        projects = extractor.read_projects(sorted(project_ids), head)
+        state['projects'] = _upsert(state['projects'], projects)
+
+        bidders = state['bidders']
+        bidder_ids |= set(bidders.loc[bidders.index.intersection(sorted(keys)), 'bidder_id'])
+        changed_bidders = extractor.read_bidders(sorted(bidder_ids), head)
+        state['bidders'] = _upsert(bidders, changed_bidders).sort_values('bidder_id', kind='stable')
+
+        # Aggregation is local and cheap; redo it for everyone so the
+        # time-dependent features (delays, days since last project) stay exact
+        state['timestamp'] = now
+        state['features'] = ChainExtractor.aggregate(state)
+
+        return {
+            'bidders_read': len(changed_bidders),
+            'bonds_read': len(changed_bonds),
+            'projects_read': len(projects),
+            'disputes_read': len(disputes)
+        }
+
+    def _checkpoint(self, block, block_hash):
+        """Record the processed block and persist the state atomically"""
+        anchor_block = max(0, block - self.reorg_depth)
+        _, anchor_hash, _ = self.extractor.head(anchor_block)
+        self.state.update(block=block, block_hash=block_hash, anchor_block=anchor_block, anchor_hash=anchor_hash)
+
+        tmp_path = f'{self.state_path}.{os.getpid()}.tmp'
+        joblib.dump(self.state, tmp_path)
+        os.replace(tmp_path, self.state_path)
+
+
+def _empty_touched():
+    return {kind: set() for kind in EVENT_TARGETS}
+
+
+def _merge_touched(into, touched):
+    for kind, values in touched.items():
+        into[kind] |= values
+
+
+def _upsert(table, rows):
+    """Replace rows of table that share an index with rows, append the rest"""
+    if rows.empty:
+        return table
+    return pd.concat([table[~table.index.isin(rows.index)], rows]).sort_index(kind='stable')
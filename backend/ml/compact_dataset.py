@@ -0,0 +1,282 @@
+"""Compact columnar copy of dataset.csv, memory-mapped on load.
+
+    python compact_dataset.py dataset.csv
+
+writes dataset.npcols/ next to the CSV: one .npy file per column in the
+smallest lossless dtype, plus a sorted address dictionary for lookups.
+load_historical_data uses it whenever it is up to date with the CSV and
+falls back to reading the CSV otherwise.
+"""
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+
+from bidder_index import BidderIndex
+
+FORMAT_VERSION = 1
+ADDRESS_COLUMN = 'bidder_address'
+MAX_DECIMALS = 6
+MAX_CATEGORIES = 32767
+
+
+def compact_dataset_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.npcols'
+
+
+def is_fresh(compact_path, csv_path):
+    """True if the compact copy exists and was built from the CSV as it is now (or the CSV is gone)"""
+    try:
+        with open(os.path.join(compact_path, 'meta.json')) as f:
+            meta = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return False
+    if meta.get('format_version') != FORMAT_VERSION:
+        return False
+    try:
+        stat = os.stat(csv_path)
+    except FileNotFoundError:
+        return True
+    return meta['source'] == {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def read_dataset(csv_path, columns=None):
+    """DataFrame of the dataset, from the compact copy when fresh, else from the CSV"""
+    compact_path = compact_dataset_path(csv_path)
+    if is_fresh(compact_path, csv_path):
+        return CompactDataset(compact_path).to_frame(columns)
+
+    import pandas as pd
+    return pd.read_csv(csv_path, usecols=columns)
+
+
+class _ColumnStats:
+    """First-pass summary of one CSV column, used to pick its compact dtype"""
+
+    def __init__(self):
+        self.kind = None
+        self.low = self.high = None
+        # float32_ok[d]: every value has <= d decimals and survives float32 at that rounding
+        self.float32_ok = np.ones(MAX_DECIMALS + 1, dtype=bool)
+        # scaled_ok[d]: every value is exactly round(value * 10**d) / 10**d
+        self.scaled_ok = np.ones(MAX_DECIMALS + 1, dtype=bool)
+        self.categories = {}
+        self.max_length = 1
+        self.ascii = True
+        self.has_nan = False
+
+    def update(self, values):
+        kind = values.dtype.kind
+        if kind == 'O':
+            self.kind = 'O'
+        elif self.kind is None or (self.kind in 'biu' and kind == 'f'):
+            self.kind = kind
+
+        if kind == 'O':
+            strings = values.dropna().astype(str)
+            if len(strings):
+                self.max_length = max(self.max_length, int(strings.str.len().max()))
+                self.ascii = self.ascii and bool(strings.map(str.isascii).all())
+            if self.categories is not None:
+                for value in strings.unique():
+                    self.categories.setdefault(value, len(self.categories))
+                if len(self.categories) > MAX_CATEGORIES:
+                    self.categories = None
+            return
+
+        numbers = values.to_numpy(dtype=np.float64)
+        missing = np.isnan(numbers)
+        self.has_nan = self.has_nan or bool(missing.any())
+        present = numbers[~missing]
+        if len(present):
+            low, high = present.min(), present.max()
+            self.low = low if self.low is None else min(self.low, low)
+            self.high = high if self.high is None else max(self.high, high)
+        if kind != 'b':
+            narrowed = present.astype(np.float32).astype(np.float64)
+            for decimals in np.flatnonzero(self.float32_ok):
+                self.float32_ok[decimals] = (np.array_equal(np.round(present, decimals), present)
+                                             and np.array_equal(np.round(narrowed, decimals), present))
+            for decimals in np.flatnonzero(self.scaled_ok):
+                with np.errstate(over='ignore', invalid='ignore'):
+                    self.scaled_ok[decimals] = np.array_equal(np.round(present * 10 ** decimals) / 10 ** decimals, present)
+
+    def spec(self, name):
+        """Storage description for meta.json"""
+        if self.kind == 'O':
+            if name != ADDRESS_COLUMN and self.categories is not None:
+                codes = 'int8' if len(self.categories) < 128 else 'int16'
+                return {'name': name, 'encoding': 'categorical', 'dtype': codes,
+                        'categories': list(self.categories)}
+            width = f'S{self.max_length}' if self.ascii else f'U{self.max_length}'
+            return {'name': name, 'encoding': 'text', 'dtype': width}
+
+        if self.kind == 'b':
+            return {'name': name, 'encoding': 'numeric', 'dtype': 'bool'}
+        low, high = (self.low or 0), (self.high or 0)
+        if self.kind in 'iu':
+            return {'name': name, 'encoding': 'numeric', 'dtype': _int_dtype(low, high)}
+
+        # Floats: the narrowest of fixed-point integers, float32 or float64 that round-trips
+        candidates = [{'name': name, 'encoding': 'numeric', 'dtype': 'float64'}]
+        decimals = np.flatnonzero(self.float32_ok)
+        if len(decimals):
+            candidates.append({'name': name, 'encoding': 'numeric', 'dtype': 'float32', 'decimals': int(decimals[0])})
+        decimals = np.flatnonzero(self.scaled_ok)
+        if len(decimals) and not self.has_nan:
+            factor = 10 ** int(decimals[0])
+            dtype = _int_dtype(round(low * factor), round(high * factor))
+            if dtype is not None:
+                candidates.append({'name': name, 'encoding': 'fixed_point', 'dtype': dtype, 'decimals': int(decimals[0])})
+        return min(candidates, key=lambda spec: np.dtype(spec['dtype']).itemsize)
+
+
+def _int_dtype(low, high):
+    """Smallest signed integer dtype holding [low, high], or None"""
+    for dtype in ('int8', 'int16', 'int32', 'int64'):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return None
+
+
+def convert(csv_path, out_path=None, chunksize=1_000_000):
+    """Write the compact copy of a CSV in two chunked passes (dtype scan, then fill)"""
+    import pandas as pd
+
+    out_path = out_path or compact_dataset_path(csv_path)
+    source = os.stat(csv_path)
+
+    stats, rows = {}, 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        for name in chunk.columns:
+            stats.setdefault(name, _ColumnStats()).update(chunk[name])
+        rows += len(chunk)
+    specs = [column_stats.spec(name) for name, column_stats in stats.items()]
+
+    tmp_path = f'{out_path}.{os.getpid()}.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    arrays = {spec['name']: np.lib.format.open_memmap(os.path.join(tmp_path, f"{spec['name']}.npy"), mode='w+',
+                                                      dtype=spec['dtype'], shape=(rows,))
+              for spec in specs}
+    start = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        end = start + len(chunk)
+        for spec in specs:
+            values = chunk[spec['name']]
+            if spec['encoding'] == 'categorical':
+                codes = pd.Categorical(values, categories=spec['categories']).codes
+                arrays[spec['name']][start:end] = codes
+            elif spec['encoding'] == 'text':
+                arrays[spec['name']][start:end] = values.fillna('').astype(str).to_numpy(dtype=spec['dtype'])
+            elif spec['encoding'] == 'fixed_point':
+                arrays[spec['name']][start:end] = np.round(values.to_numpy(dtype=np.float64) * 10 ** spec['decimals'])
+            else:
+                arrays[spec['name']][start:end] = values.to_numpy()
+        start = end
+    for array in arrays.values():
+        array.flush()
+
+    # Address dictionary: sorted normalized addresses -> first row, for binary-search lookups
+    if ADDRESS_COLUMN in arrays:
+        keys, key_rows = np.unique(np.char.lower(np.char.strip(arrays[ADDRESS_COLUMN])), return_index=True)
+        np.save(os.path.join(tmp_path, 'keys.npy'), keys)
+        np.save(os.path.join(tmp_path, 'key_rows.npy'), key_rows.astype(np.int64))
+    del arrays
+
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+        json.dump({
+            'format_version': FORMAT_VERSION,
+            'rows': rows,
+            'columns': specs,
+            'source': {'size': source.st_size, 'mtime_ns': source.st_mtime_ns}
+        }, f, indent=2)
+
+    # Swap the finished directory in; readers that already mapped the old files keep them
+    if os.path.exists(out_path):
+        old_path = f'{out_path}.{os.getpid()}.old'
+        os.rename(out_path, old_path)
+        os.rename(tmp_path, out_path)
+        shutil.rmtree(old_path, ignore_errors=True)
+    else:
+        os.rename(tmp_path, out_path)
+    return out_path
+
+
+class CompactDataset:
+    """Read side of the compact format; columns are memory-mapped, never read eagerly"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.specs = {spec['name']: spec for spec in self.meta['columns']}
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def raw(self, name):
+        """The stored array, memory-mapped (zero-copy)"""
+        return np.load(os.path.join(self.path, f'{name}.npy'), mmap_mode='r')
+
+    def values(self, name, out=None, rows=None):
+        """Column values (optionally a slice of rows) as the CSV reader would have produced them"""
+        spec = self.specs[name]
+        raw = self.raw(name)
+        if rows is not None:
+            raw = raw[rows]
+        if spec['encoding'] == 'categorical':
+            categories = np.array(spec['categories'] + [np.nan], dtype=object)
+            return categories[raw]
+        if spec['encoding'] == 'text':
+            return raw.astype(str).astype(object)
+        if spec['encoding'] == 'fixed_point':
+            # Only chosen where this division reproduces every parsed value exactly
+            return np.divide(raw, 10 ** spec['decimals'], out=out, dtype=np.float64)
+        if spec['dtype'] == 'float32':
+            # float32 was only chosen where rounding restores the original float64 exactly
+            return np.round(raw.astype(np.float64), spec['decimals'], out=out)
+        if out is not None:
+            out[:] = raw
+            return out
+        if raw.dtype.kind == 'i':
+            return raw.astype(np.int64)
+        return raw
+
+    def to_frame(self, columns=None, rows=None):
+        import pandas as pd
+        return pd.DataFrame({name: self.values(name, rows=rows) for name in (columns or self.specs)})
+
+    def bidder_index(self, feature_names):
+        """BidderIndex straight from the mapped columns, without building a DataFrame"""
+        features = np.zeros((len(self), len(feature_names)), dtype=np.float64)
+        column = np.empty(len(self), dtype=np.float64)
+        for j, name in enumerate(feature_names):
+            if name in self.specs:
+                features[:, j] = self.values(name, out=column)
+
+        if 'total_contract_value' in self.specs:
+            contract_values = np.ascontiguousarray(self.values('total_contract_value'), dtype=np.float64)
+        else:
+            contract_values = np.zeros(len(self), dtype=np.float64)
+
+        integer_columns = [name for name in feature_names
+                           if name in self.specs and self.specs[name]['encoding'] == 'numeric'
+                           and self.specs[name]['dtype'].startswith('int')]
+
+        return BidderIndex(self.raw(ADDRESS_COLUMN), features, contract_values, feature_names, integer_columns,
+                           keys=self.raw('keys'), key_rows=self.raw('key_rows'))
+
+
+if __name__ == '__main__':
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dataset.csv')
+    out_path = convert(csv_path)
+
+    compact_bytes = sum(os.path.getsize(os.path.join(out_path, name)) for name in os.listdir(out_path))
+    print(f"Wrote {out_path}: {os.path.getsize(csv_path):,} bytes CSV -> {compact_bytes:,} bytes")
+    for spec in CompactDataset(out_path).meta['columns']:
+        print(f"  {spec['name']:<26} {spec['encoding']:<12} {spec['dtype']}")
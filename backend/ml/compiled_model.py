@@ -0,0 +1,219 @@
+import numpy as np
+
+_SIGN_BIT = np.int64(-0x8000000000000000)
+_MAGNITUDE_BITS = np.int64(0x7FFFFFFFFFFFFFFF)
+
+
+class CompiledTreeEnsemble:
+    """Array-backed tree ensemble with the feature scaling folded into the thresholds.
+
+    All trees are flattened into one set of node arrays and every
+    (row, tree) pair walks down together, dropping out once it reaches a
+    leaf. The prediction is base + weight * (sum of the leaf values), which
+    covers forests (weight 1/n_trees) and gradient boosting (base = init
+    constant, weight = learning rate).
+
+    Per-step NumPy overhead makes this the faster path for small requests;
+    above max_rows sklearn's compiled traversal wins, and since split
+    decisions are identical either path gives the same scores.
+    """
+
+    max_rows = 64
+    attribution = 'tree_path'
+
+    def __init__(self, feature, threshold, children, is_leaf, value, roots, base=0.0, weight=1.0):
+        self.feature = feature
+        self.threshold = threshold
+        # children[2 * node] is the left child, children[2 * node + 1] the right one
+        self.children = children
+        self.is_leaf = is_leaf
+        self.value = value
+        self.roots = roots
+        self.base = base
+        self.weight = weight
+
+    @classmethod
+    def from_trees(cls, trees, mean, scale, base=0.0, weight=1.0):
+        """Flatten fitted sklearn Tree objects, mapping thresholds back to raw feature units"""
+        features, thresholds, children, leaves, values, roots = [], [], [], [], [], []
+        offset = 0
+
+        for tree in trees:
+            is_leaf = tree.children_left == -1
+            feature = np.where(is_leaf, 0, tree.feature)
+
+            features.append(feature)
+            thresholds.append(np.where(is_leaf, np.inf, _raw_thresholds(tree.threshold, mean[feature], scale[feature])))
+            children.append(np.where(is_leaf[:, None], -1, np.column_stack([tree.children_left, tree.children_right]) + offset).ravel())
+            leaves.append(is_leaf)
+            values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+            offset += tree.node_count
+
+        return cls(
+            np.concatenate(features).astype(np.intp),
+            np.concatenate(thresholds).astype(np.float64),
+            np.concatenate(children).astype(np.intp),
+            np.concatenate(leaves),
+            np.concatenate(values).astype(np.float64),
+            np.array(roots, dtype=np.intp),
+            base, weight
+        )
+
+    def predict(self, X):
+        """Predictions for rows of raw (unscaled) features"""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        n_rows, n_features = X.shape
+        flat = X.ravel()
+
+        # One entry per (row, tree): current node and the row's offset into flat
+        nodes = np.tile(self.roots, n_rows)
+        active = np.flatnonzero(~self.is_leaf[nodes])
+        offsets = active // len(self.roots) * n_features
+        while active.size:
+            current = nodes[active]
+            # NaN fails the comparison and goes right, as in sklearn
+            go_right = ~(flat[offsets + self.feature[current]] <= self.threshold[current])
+            current = self.children[2 * current + go_right]
+            nodes[active] = current
+
+            inner = ~self.is_leaf[current]
+            active = active[inner]
+            offsets = offsets[inner]
+
+        return self.base + self.weight * self.value[nodes].reshape(n_rows, -1).sum(axis=1)
+
+    def contributions(self, X):
+        """Per-feature contributions along each row's decision paths.
+
+        Returns (bias, contributions) with bias + contributions.sum(axis=1)
+        equal to predict(X): the bias is the ensemble's prediction at the
+        roots, and every split on a path credits the change in node value
+        to the feature it splits on.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        n_rows, n_features = X.shape
+        flat = X.ravel()
+        contributions = np.zeros(n_rows * n_features)
+
+        nodes = np.tile(self.roots, n_rows)
+        active = np.flatnonzero(~self.is_leaf[nodes])
+        offsets = active // len(self.roots) * n_features
+        while active.size:
+            current = nodes[active]
+            feature = self.feature[current]
+            go_right = ~(flat[offsets + feature] <= self.threshold[current])
+            child = self.children[2 * current + go_right]
+            contributions += np.bincount(offsets + feature, weights=self.value[child] - self.value[current],
+                                         minlength=len(contributions))
+            nodes[active] = child
+
+            inner = ~self.is_leaf[child]
+            active = active[inner]
+            offsets = offsets[inner]
+
+        bias = self.base + self.weight * self.value[self.roots].sum()
+        return np.full(n_rows, bias), self.weight * contributions.reshape(n_rows, n_features)
+
+
+class CompiledLinear:
+    """Linear model with the feature scaling folded into the coefficients"""
+
+    max_rows = None
+    attribution = 'linear'
+
+    def __init__(self, coef, intercept, mean=None):
+        self.coef = coef
+        self.intercept = intercept
+        # Training feature means, the reference point for contributions
+        self.mean = np.zeros_like(coef) if mean is None else mean
+
+    def predict(self, X):
+        """Predictions for rows of raw (unscaled) features"""
+        return np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+
+    def contributions(self, X):
+        """(bias, contributions): the prediction at the mean row, and coef * (x - mean) per feature"""
+        X = np.asarray(X, dtype=np.float64)
+        bias = self.intercept + float(self.mean @ self.coef)
+        return np.full(len(X), bias), (X - self.mean) * self.coef
+
+
+def _float_keys(values):
+    """Map float64 values to int64 keys with the same ordering"""
+    bits = values.view(np.int64)
+    return np.where(bits >= 0, bits, -(bits & _MAGNITUDE_BITS))
+
+
+def _key_floats(keys):
+    """Inverse of _float_keys"""
+    return np.where(keys >= 0, keys, -keys | _SIGN_BIT).view(np.float64)
+
+
+def _raw_thresholds(thresholds, mean, scale):
+    """Largest raw x per node with float32((x - mean) / scale) <= threshold.
+
+    sklearn trees compare float32 inputs, so the folded threshold is found by
+    bisecting over float64 values rather than as threshold * scale + mean;
+    that keeps every split decision identical to scaling then predicting.
+    """
+    def goes_left(keys):
+        raw = _key_floats(keys)
+        with np.errstate(invalid='ignore', over='ignore'):
+            return ((raw - mean) / scale).astype(np.float32) <= thresholds
+
+    # goes_left(lo) holds and goes_left(hi) doesn't, for every node
+    lo = np.full(len(thresholds), _float_keys(np.array([-np.inf]))[0])
+    hi = np.full(len(thresholds), _float_keys(np.array([np.inf]))[0])
+    while np.any(lo + 1 < hi):
+        # Halve each bound first; hi - lo can overflow int64
+        mid = (lo >> 1) + (hi >> 1) + (lo & hi & 1)
+        left = goes_left(mid)
+        lo = np.where(left, mid, lo)
+        hi = np.where(left, hi, mid)
+    return _key_floats(lo)
+
+
+def compile_model(model, scaler):
+    """Compile a fitted model and its StandardScaler for fast scoring.
+
+    Returns None for model types without a compiled form; callers should
+    keep using sklearn for those.
+    """
+    if model is None or scaler is None:
+        return None
+
+    from sklearn.ensemble import ExtraTreesRegressor, GradientBoostingRegressor, RandomForestRegressor
+    from sklearn.linear_model import LinearRegression, SGDRegressor
+    from sklearn.tree import DecisionTreeRegressor
+
+    n_features = getattr(model, 'n_features_in_', None)
+    if n_features is None:
+        return None
+    mean = scaler.mean_ if scaler.with_mean else np.zeros(n_features)
+    scale = scaler.scale_ if scaler.with_std else np.ones(n_features)
+
+    if isinstance(model, (RandomForestRegressor, ExtraTreesRegressor)):
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        return CompiledTreeEnsemble.from_trees(trees, mean, scale, weight=1.0 / len(trees))
+
+    if isinstance(model, GradientBoostingRegressor):
+        if model.init_ == 'zero':
+            base = 0.0
+        elif hasattr(model.init_, 'constant_'):
+            base = float(np.ravel(model.init_.constant_)[0])
+        else:
+            return None
+        trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+        return CompiledTreeEnsemble.from_trees(trees, mean, scale, base=base, weight=model.learning_rate)
+
+    if isinstance(model, DecisionTreeRegressor):
+        return CompiledTreeEnsemble.from_trees([model.tree_], mean, scale)
+
+    if isinstance(model, (LinearRegression, SGDRegressor)) and np.ndim(model.coef_) == 1:
+        # (x - mean) / scale . w + b  ==  x . (w / scale) + (b - mean / scale . w)
+        coef = model.coef_ / scale
+        intercept = float(np.ravel(model.intercept_)[0])
+        return CompiledLinear(coef.astype(np.float64), intercept - float(mean @ coef), np.asarray(mean, dtype=np.float64))
+
+    return None
@@ -0,0 +1,231 @@
+import io
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from bidder_index import BidderIndex
+
+
+def _normalized(addresses):
+    """normalize_address over an array of addresses"""
+    return np.char.lower(np.char.strip(np.asarray(addresses, dtype=str)))
+
+
+def _keyed(index):
+    """Copy of a BidderIndex with string addresses and sorted keys instead of a dict"""
+    addresses = np.asarray(index.addresses, dtype=str)
+    # First occurrence per normalized address, like the dict index
+    keys, key_rows = np.unique(_normalized(addresses), return_index=True)
+    return BidderIndex(addresses, index.features, index.contract_values, index.feature_names,
+                       index.integer_columns, keys=keys, key_rows=key_rows)
+
+
+class DatasetWatcher:
+    """Keeps the served bidder index in step with a CSV that is rewritten in place.
+
+    A background thread polls the file's mtime and size every interval
+    seconds and reloads once they have changed and then held still for one
+    interval, so a file being written is not read half way (writers that
+    replace it with an atomic rename are never read half way at all).
+
+    The new file is diffed line by line, by line hash, against the previous
+    one: lines seen before keep their parsed features, only new or edited
+    lines are parsed, and the sorted address keys are patched rather than
+    rebuilt. The result is a new BidderIndex installed in one step, so
+    requests keep using the previous snapshot until then. The first load,
+    or a changed header, parses the whole file.
+    """
+
+    def __init__(self, risk_ml, csv_path, interval=5.0):
+        self.risk_ml = risk_ml
+        self.csv_path = csv_path
+        self.interval = interval
+        self.index = None
+        self.header = None
+        self.line_hashes = None
+        self.signature = None
+        self._settling = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.reloads = {'delta': 0, 'full': 0}
+        self.errors = 0
+        self.last_error = None
+        self.last_reload = None
+        # Called after each new snapshot is installed, on the watcher's thread
+        self.after_install = None
+
+    def start(self):
+        """Start polling in the background (again after a fork, whose child has no thread)"""
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='ml-dataset-watcher', daemon=True)
+            self._thread.start()
+
+    def stats(self):
+        return {
+            'path': self.csv_path,
+            'interval_seconds': self.interval,
+            'rows': len(self.index) if self.index is not None else None,
+            'reloads': dict(self.reloads),
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'last_reload': self.last_reload
+        }
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                print(f"Error reloading dataset: {e}")
+
+    def check(self, force=False):
+        """Reload if the file changed since the last load; True if a new snapshot was installed"""
+        stat = os.stat(self.csv_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if not force:
+            if signature == self.signature:
+                return False
+            # Wait for the file to stay unchanged for one interval, so a half-written file isn't loaded
+            if signature != self._settling:
+                self._settling = signature
+                return False
+
+        with self._lock:
+            start = time.perf_counter()
+            with open(self.csv_path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                data = f.read()
+            signature = (stat.st_mtime_ns, stat.st_size)
+
+            built = self._build(data, force)
+            self.signature = signature
+            if built is None:
+                return False
+            index, kind, changed = built
+            self.risk_ml.install_bidder_index(index)
+
+            self.risk_ml.data_load_seconds = time.perf_counter() - start
+            self.reloads[kind] += 1
+            self.last_reload = {
+                'kind': kind,
+                'rows': len(index),
+                'changed_rows': changed,
+                'seconds': self.risk_ml.data_load_seconds,
+                'at': datetime.now().isoformat()
+            }
+            print(f"Reloaded {self.csv_path} ({kind}, {changed} of {len(index)} rows parsed)")
+
+        if self.after_install is not None:
+            self.after_install()
+        return True
+
+    def _build(self, data, force=False):
+        """(new BidderIndex, 'delta' or 'full', rows parsed) for the file content, None if unchanged"""
+        lines = data.split(b'\n')
+        header, body = lines[0], list(filter(None, lines[1:]))
+        # Python's bytes hash is fixed within a process, which is all these are compared across
+        hashes = np.fromiter(map(hash, body), dtype=np.int64, count=len(body))
+
+        if self.index is None or header != self.header:
+            index = self._parse(data)
+            if len(index) != len(body):
+                # Lines don't map to rows (e.g. quoted newlines); never diff against this load
+                self.index, self.header, self.line_hashes = None, None, None
+                return index, 'full', len(index)
+            index = _keyed(index)
+            self.index, self.header, self.line_hashes = index, header, hashes
+            return index, 'full', len(index)
+
+        old, old_hashes = self.index, self.line_hashes
+
+        # Old row of every new line with identical content, -1 for new or edited lines.
+        # Lines rewritten in place compare by position; when rows were added or
+        # removed (or many lines differ), unmatched lines are looked up by hash
+        old_rows = np.full(len(hashes), -1, dtype=np.intp)
+        if len(hashes) == len(old_hashes):
+            old_rows[hashes == old_hashes] = np.flatnonzero(hashes == old_hashes)
+        missing = np.flatnonzero(old_rows < 0)
+        if len(old_hashes) and (len(hashes) != len(old_hashes) or len(missing) > len(hashes) // 100):
+            order = np.argsort(old_hashes, kind='stable')
+            positions = np.minimum(np.searchsorted(old_hashes[order], hashes[missing]), len(order) - 1)
+            found = old_hashes[order[positions]] == hashes[missing]
+            old_rows[missing[found]] = order[positions[found]]
+
+        keep = np.flatnonzero(old_rows >= 0)
+        changed = np.flatnonzero(old_rows < 0)
+        if not force and not len(changed) and np.array_equal(old_rows, np.arange(len(old_hashes))):
+            return None
+        part = None
+        if len(changed):
+            part = self._parse(header + b'\n' + b'\n'.join(body[i] for i in changed))
+            if len(part) != len(changed):
+                raise ValueError(f"{len(changed)} changed lines parsed into {len(part)} rows")
+
+        index = self._patch(old, old_rows, keep, changed, part)
+        self.index, self.line_hashes = index, hashes
+        return index, 'delta', len(changed)
+
+    def _parse(self, data):
+        import pandas as pd
+
+        return BidderIndex.from_frame(pd.read_csv(io.BytesIO(data)), self.risk_ml.feature_names)
+
+    @staticmethod
+    def _patch(old, old_rows, keep, changed, part):
+        """New index: kept rows gathered from old, changed rows taken from part"""
+        n = len(old_rows)
+        features = np.empty((n, old.features.shape[1]), dtype=np.float64)
+        contract_values = np.empty(n, dtype=np.float64)
+        features[keep] = old.features[old_rows[keep]]
+        contract_values[keep] = old.contract_values[old_rows[keep]]
+
+        new_addresses = np.asarray(part.addresses if part is not None else [], dtype=str)
+        width = max(old.addresses.dtype.itemsize, new_addresses.dtype.itemsize) // 4
+        addresses = np.empty(n, dtype=f'U{max(width, 1)}')
+        addresses[keep] = old.addresses[old_rows[keep]]
+
+        # Keys of kept rows, renumbered; rows that went away drop out
+        # (a line repeated in the new file maps to its first copy, hence the reversed assignment)
+        new_of_old = np.full(len(old), -1, dtype=np.intp)
+        new_of_old[old_rows[keep][::-1]] = keep[::-1]
+        key_rows = new_of_old[old.key_rows]
+        kept_keys = key_rows >= 0
+        keys, key_rows = old.keys[kept_keys], key_rows[kept_keys]
+        integer_columns = old.integer_columns
+
+        if part is not None:
+            features[changed] = part.features
+            contract_values[changed] = part.contract_values
+            addresses[changed] = new_addresses
+            integer_columns = integer_columns & part.integer_columns
+
+            # Insert the changed rows' keys in order; an address already present
+            # keeps its earlier row first, as lookups take the first match
+            new_keys = _normalized(new_addresses)
+            order = np.lexsort((changed, new_keys))
+            new_keys, new_rows = new_keys[order], changed[order]
+            if new_keys.dtype.itemsize > keys.dtype.itemsize:
+                keys = keys.astype(new_keys.dtype)
+            positions = np.searchsorted(keys, new_keys, side='left')
+            ends = np.searchsorted(keys, new_keys, side='right')
+            for i in np.flatnonzero(ends > positions):
+                positions[i] += np.count_nonzero(key_rows[positions[i]:ends[i]] < new_rows[i])
+            keys = np.insert(keys, positions, new_keys)
+            key_rows = np.insert(key_rows, positions, new_rows)
+
+        # Reordered lines can leave a repeated address's rows out of order
+        repeated = keys[1:] == keys[:-1]
+        if repeated.any() and np.any(key_rows[1:][repeated] < key_rows[:-1][repeated]):
+            order = np.lexsort((key_rows, keys))
+            keys, key_rows = keys[order], key_rows[order]
+
+        return BidderIndex(addresses, features, contract_values, old.feature_names, integer_columns,
+                           keys=keys, key_rows=key_rows)
@@ -0,0 +1,109 @@
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+
+from bidder_index import BidderIndex
+
+CURRENT_FILE = 'CURRENT'
+
+
+class FeatureStore:
+    """Versioned bidder feature segments on disk, memory-mapped by every reader.
+
+    publish() writes a BidderIndex's arrays into a new segment directory and
+    then atomically points CURRENT at it. open() maps the current segment
+    read-only, so any number of processes serve from one copy in the page
+    cache. Readers poll current_version() to pick up new segments; old ones
+    are pruned, which is safe on POSIX since mapped files outlive unlinking.
+    """
+
+    def __init__(self, root, keep=3):
+        self.root = root
+        self.keep = keep
+        os.makedirs(root, exist_ok=True)
+
+    def current_version(self):
+        """Version CURRENT points at, or None before the first publish"""
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as f:
+                return int(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def publish(self, index):
+        """Write a new segment from a BidderIndex; returns its version"""
+        addresses = index.addresses if isinstance(index.addresses, np.ndarray) else np.asarray(index.addresses, dtype=str)
+
+        # First occurrence per normalized address, sorted for searchsorted lookups
+        if index.keys is not None:
+            keys, key_rows = index.keys, index.key_rows
+        else:
+            keys, key_rows = np.unique(np.char.lower(np.char.strip(addresses)), return_index=True)
+
+        version, path = self._claim_segment()
+        np.save(os.path.join(path, 'features.npy'), index.features)
+        np.save(os.path.join(path, 'contract_values.npy'), index.contract_values)
+        np.save(os.path.join(path, 'addresses.npy'), addresses)
+        np.save(os.path.join(path, 'keys.npy'), keys)
+        np.save(os.path.join(path, 'key_rows.npy'), key_rows.astype(np.int64))
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({
+                'version': version,
+                'rows': len(index),
+                'feature_names': index.feature_names,
+                'integer_columns': sorted(index.integer_columns),
+                'created_at': datetime.now().isoformat()
+            }, f)
+
+        tmp_path = os.path.join(self.root, f'{CURRENT_FILE}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            f.write(str(version))
+        os.replace(tmp_path, os.path.join(self.root, CURRENT_FILE))
+
+        self._prune(version)
+        return version
+
+    def open(self, version=None):
+        """Map a segment (the current one by default); returns (version, BidderIndex)"""
+        version = self.current_version() if version is None else version
+        if version is None:
+            return None, None
+
+        path = self._segment_path(version)
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+
+        def load(name):
+            return np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+
+        index = BidderIndex(
+            load('addresses'), load('features'), load('contract_values'),
+            meta['feature_names'], meta['integer_columns'],
+            keys=load('keys'), key_rows=load('key_rows')
+        )
+        return version, index
+
+    def _segment_path(self, version):
+        return os.path.join(self.root, f'v{version:06d}')
+
+    def _claim_segment(self):
+        """Create the next segment directory; mkdir is atomic, so concurrent publishers get distinct versions"""
+        version = max(self._versions(), default=0) + 1
+        while True:
+            path = self._segment_path(version)
+            try:
+                os.mkdir(path)
+                return version, path
+            except FileExistsError:
+                version += 1
+
+    def _versions(self):
+        return [int(name[1:]) for name in os.listdir(self.root) if name.startswith('v') and name[1:].isdigit()]
+
+    def _prune(self, current):
+        for version in sorted(self._versions())[:-self.keep]:
+            if version != current:
+                shutil.rmtree(self._segment_path(version), ignore_errors=True)
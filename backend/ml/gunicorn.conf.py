@@ -0,0 +1,39 @@
+"""Production serving for the ML service: gunicorn -c gunicorn.conf.py
+
+The app is built once in the master (preload_app) before workers fork, so
+the models are shared copy-on-write and the bidder features are served from
+one memory-mapped FeatureStore segment (ML_FEATURE_STORE). Reloads publish a
+new segment, and workers switch to it on their next request.
+"""
+import os
+
+bind = os.environ.get('ML_BIND', '0.0.0.0:5001')
+workers = int(os.environ.get('ML_WORKERS', 4))
+threads = int(os.environ.get('ML_THREADS', 4))
+preload_app = True
+wsgi_app = 'ml_service:create_production_app()'
+
+
+def post_fork(server, worker):
+    """Run the dataset watcher and scheduled retrain in exactly one worker.
+
+    Threads started in the master would not survive the fork, so the
+    workers compete for a lock file instead; the winner holds it for its
+    lifetime, and when it exits the worker that replaces it takes over.
+    """
+    import fcntl
+
+    import ml_service
+
+    if not ml_service.WATCH_DATASET and ml_service.FULL_RETRAIN_HOURS <= 0:
+        return
+    os.makedirs(ml_service.FEATURE_STORE_DIR, exist_ok=True)
+    lock = open(os.path.join(ml_service.FEATURE_STORE_DIR, 'background_tasks.lock'), 'w')
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.close()
+        return
+    worker.background_tasks_lock = lock
+    server.log.info("Worker %s runs the background tasks", worker.pid)
+    ml_service.start_background_tasks()
@@ -0,0 +1,110 @@
+"""Incremental model updates from new outcome rows, without a full retrain.
+
+The scaler absorbs the new rows with partial_fit, which leaves it with the
+statistics a fit on old and new rows together would give. The model is
+first re-expressed for the updated scaling, so its predictions don't move,
+and then learns from the new rows only:
+
+- RandomForest grows extra trees on them (warm start); past max_trees the
+  oldest trees are dropped, so the forest slides towards recent data.
+- GradientBoosting adds boosting stages fitted to its residuals on them.
+- SGDRegressor takes partial_fit passes over them.
+- LinearRegression moves to the sample-weighted average of its
+  coefficients and a least-squares fit on the new rows, which is the fit
+  on all rows when old and new share the same feature covariance.
+
+The cost depends on the new rows and the model size, not on the history.
+The models and scalers passed in are never modified; copies are updated.
+Updates drift from what a fresh search would pick (model type,
+hyperparameters, stale trees), hence the scheduled full retrain.
+"""
+import copy
+import time
+
+import numpy as np
+
+
+def update_model(model, scaler, X, y, trees=10, max_trees=200, epochs=1, seed=None):
+    """(model, scaler, info) updated with new rows X (raw features) and labels y"""
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+    from sklearn.linear_model import LinearRegression, SGDRegressor
+
+    start = time.perf_counter()
+    y = np.asarray(y, dtype=np.float64)
+    model, scaler = copy.deepcopy(model), copy.deepcopy(scaler)
+    old_mean, old_scale = _scaler_terms(scaler)
+    seen = int(np.max(scaler.n_samples_seen_))
+    mse_before = float(np.mean((model.predict(scaler.transform(X)) - y) ** 2))
+
+    scaler.partial_fit(X)
+    new_mean, new_scale = _scaler_terms(scaler)
+    X_scaled = scaler.transform(X)
+    info = {'rows': len(y), 'previous_rows': seen}
+
+    if isinstance(model, RandomForestRegressor):
+        _rescale_trees(model.estimators_, old_mean, old_scale, new_mean, new_scale)
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + trees)
+        model.fit(X_scaled, y)
+        dropped = max(0, len(model.estimators_) - max_trees)
+        if dropped:
+            model.estimators_ = model.estimators_[dropped:]
+            model.n_estimators = len(model.estimators_)
+        info.update(method='warm_start_trees', trees_added=trees, trees_dropped=dropped)
+
+    elif isinstance(model, GradientBoostingRegressor):
+        _rescale_trees(model.estimators_[:, 0], old_mean, old_scale, new_mean, new_scale)
+        model.set_params(warm_start=True, n_estimators=model.estimators_.shape[0] + trees)
+        model.fit(X_scaled, y)
+        info.update(method='boosting_stages', stages_added=trees)
+
+    elif isinstance(model, SGDRegressor):
+        model.coef_, model.intercept_ = _rescale_linear(model.coef_, model.intercept_, old_mean, old_scale,
+                                                        new_mean, new_scale)
+        rng = np.random.default_rng(seed)
+        for _ in range(epochs):
+            order = rng.permutation(len(y))
+            model.partial_fit(X_scaled[order], y[order])
+        info.update(method='partial_fit', epochs=epochs)
+
+    elif isinstance(model, LinearRegression):
+        coef, intercept = _rescale_linear(model.coef_, model.intercept_, old_mean, old_scale, new_mean, new_scale)
+        recent = LinearRegression().fit(X_scaled, y)
+        weight = len(y) / (seen + len(y))
+        model.coef_ = (1 - weight) * coef + weight * recent.coef_
+        model.intercept_ = (1 - weight) * intercept + weight * recent.intercept_
+        info.update(method='weighted_least_squares', new_rows_weight=weight)
+
+    else:
+        raise ValueError(f"No incremental update for {type(model).__name__}; run a full retrain")
+
+    info.update(
+        mse_before=mse_before,
+        mse_after=float(np.mean((model.predict(X_scaled) - y) ** 2)),
+        seconds=time.perf_counter() - start
+    )
+    return model, scaler, info
+
+
+def _scaler_terms(scaler):
+    """(mean, scale) a StandardScaler applies, with identity terms for disabled steps"""
+    n_features = scaler.n_features_in_
+    mean = scaler.mean_ if scaler.with_mean else np.zeros(n_features)
+    scale = scaler.scale_ if scaler.with_std else np.ones(n_features)
+    return np.array(mean, dtype=np.float64), np.array(scale, dtype=np.float64)
+
+
+def _rescale_trees(trees, old_mean, old_scale, new_mean, new_scale):
+    """Move split thresholds from the old scaled units to the new ones, in place"""
+    for tree in trees:
+        threshold, feature = tree.tree_.threshold, tree.tree_.feature
+        split = feature >= 0
+        f = feature[split]
+        threshold[split] = (threshold[split] * old_scale[f] + old_mean[f] - new_mean[f]) / new_scale[f]
+
+
+def _rescale_linear(coef, intercept, old_mean, old_scale, new_mean, new_scale):
+    """Coefficients and intercept giving the same predictions on the new scaling"""
+    raw_coef = coef / old_scale
+    new_coef = raw_coef * new_scale
+    new_intercept = intercept + np.sum(raw_coef * (new_mean - old_mean))
+    return new_coef, new_intercept
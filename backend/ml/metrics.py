@@ -0,0 +1,206 @@
+"""Minimal Prometheus metrics: counters, gauges and histograms rendered in the text exposition format.
+
+Hot-path updates are a lock plus a dict update. Values that already live
+elsewhere (cache stats, model metrics, dataset size) are read by callbacks
+at scrape time instead of being updated per request.
+
+With several worker processes, give the registry a snapshot_dir: each
+process writes its counters and histograms there at most every
+snapshot_interval seconds, and render() sums them across processes.
+Gauges always come from the process serving the scrape.
+"""
+import json
+import math
+import os
+import shutil
+import threading
+import time
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        self._callback = None
+
+    def set_callback(self, callback):
+        """Compute the values at scrape time: callback() returns {label values tuple: value}"""
+        self._callback = callback
+        return self
+
+    def samples(self):
+        """[(suffix, labels dict, value)] for the exposition"""
+        if self._callback is not None:
+            values = self._callback()
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [('', dict(zip(self.labelnames, labels)), value) for labels, value in values.items()]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, labels=()):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels=()):
+        # Per label set: [count per bucket (last is +Inf), sum]
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    def samples(self):
+        with self._lock:
+            values = {labels: (list(counts), total) for labels, (counts, total) in self._values.items()}
+
+        samples = []
+        for labels, (counts, total) in values.items():
+            labels = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append(('_bucket', dict(labels, le=_format_value(bound)), cumulative))
+            samples.append(('_count', labels, cumulative))
+            samples.append(('_sum', labels, total))
+        return samples
+
+
+class MetricsRegistry:
+    """Named metrics plus rendering, optionally aggregated across processes"""
+
+    def __init__(self, snapshot_dir=None, snapshot_interval=1.0):
+        self._metrics = []
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_interval = snapshot_interval
+        self._snapshot_at = 0.0
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def use_snapshot_dir(self, snapshot_dir, clear=False):
+        """Aggregate across processes through snapshot_dir (clear it when starting a fresh server)"""
+        if clear:
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+        os.makedirs(snapshot_dir, exist_ok=True)
+        self.snapshot_dir = snapshot_dir
+
+    def maybe_snapshot(self, force=False):
+        """Write this process's counters and histograms, at most every snapshot_interval seconds"""
+        now = time.monotonic()
+        if self.snapshot_dir is None or (not force and now - self._snapshot_at < self.snapshot_interval):
+            return
+        self._snapshot_at = now
+
+        snapshot = {metric.name: [[suffix, labels, value] for suffix, labels, value in metric.samples()]
+                    for metric in self._metrics if metric.kind != 'gauge'}
+        path = os.path.join(self.snapshot_dir, f'metrics_{os.getpid()}.json')
+        tmp_path = f'{path}.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing metrics snapshot: {e}")
+
+    def render(self):
+        """All metrics in the Prometheus text format"""
+        shared = self._load_snapshots()
+        lines = []
+        for metric in self._metrics:
+            if shared is not None and metric.kind != 'gauge':
+                samples = shared.get(metric.name, [])
+            else:
+                samples = metric.samples()
+
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for suffix, labels, value in samples:
+                lines.append(f'{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def _load_snapshots(self):
+        """Counter/histogram samples summed over every process's snapshot, or None without a snapshot_dir"""
+        if self.snapshot_dir is None:
+            return None
+        self.maybe_snapshot(force=True)
+
+        totals = {}
+        for name in sorted(os.listdir(self.snapshot_dir)):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.snapshot_dir, name)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for metric_name, samples in snapshot.items():
+                merged = totals.setdefault(metric_name, {})
+                for suffix, labels, value in samples:
+                    key = (suffix, tuple(sorted(labels.items())))
+                    merged[key] = merged.get(key, 0) + value
+
+        return {
+            metric_name: [(suffix, dict(labels), value) for (suffix, labels), value in merged.items()]
+            for metric_name, merged in totals.items()
+        }
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return '{' + ','.join(escaped) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value):
+    if value is None:
+        return 'NaN'
+    value = float(value)
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if math.isnan(value):
+        return 'NaN'
+    return str(int(value)) if value.is_integer() and abs(value) < 2 ** 53 else repr(value)
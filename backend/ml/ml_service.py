@@ -1,87 +1,663 @@
-import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import mean_squared_error, r2_score
-import joblib
 import json
-from web3 import Web3
 from datetime import datetime
 import os
-from flask import Flask, request, jsonify
+import base64
+import hashlib
+import hmac
+import threading
+import time
+from flask import Flask, Blueprint, g, request, jsonify, make_response
 from flask_cors import CORS
+from bidder_index import BidderIndex, normalize_address
+from features import calculate_risk_labels
+from result_cache import AssessmentCache
+from training_jobs import RetrainScheduler, TrainingJobManager
+from compiled_model import compile_model
+from feature_store import FeatureStore
+from compact_dataset import CompactDataset, compact_dataset_path, is_fresh
+from request_coalescer import RequestCoalescer
+from metrics import MetricsRegistry
+from profiling import RequestProfiler
+from risk_index import RiskPercentileIndex
+from dataset_watcher import DatasetWatcher
+from model_registry import ModelRegistry, frame_sha256
+from incremental_training import update_model
+from shadow_scoring import ShadowScorer
+
+# pandas, joblib and sklearn are imported where they are used, so importing
+# this module (and the health/readiness routes) stays fast on cold start
+
+# Assessment result cache settings
+CACHE_SIZE = int(os.environ.get('ML_CACHE_SIZE', 10000))
+CACHE_TTL_SECONDS = float(os.environ.get('ML_CACHE_TTL', 60))
+
+# /rank_bids memoizes whole rankings per project snapshot (bid list + budget + sort order)
+RANKING_CACHE_SIZE = int(os.environ.get('ML_RANKING_CACHE_SIZE', 256))
+RANKING_CACHE_TTL_SECONDS = float(os.environ.get('ML_RANKING_CACHE_TTL', 300))
+RANK_SORT_KEYS = ('risk_adjusted_amount', 'risk_score', 'bid_amount')
+
+# Score every bidder per bid type after training and start-up for percentile queries
+# (set to 0 to build the index on the first percentile query instead)
+RISK_INDEX_PRECOMPUTE = os.environ.get('ML_RISK_INDEX_PRECOMPUTE', '1') != '0'
+RISK_HISTOGRAM_MAX_BINS = 1000
+
+# Per-bidder feature attributions of the model score, keyed by (bid type, row) and stamped with
+# the model and data versions; they only go stale with those, hence the long TTL
+EXPLAIN_CACHE_SIZE = int(os.environ.get('ML_EXPLAIN_CACHE_SIZE', 100_000))
+EXPLAIN_CACHE_TTL_SECONDS = float(os.environ.get('ML_EXPLAIN_CACHE_TTL', 3600))
+EXPLAIN_CHUNK_ROWS = 10_000
+
+# /get_bidder_stats paging defaults
+STATS_DEFAULT_FIELDS = ['bidder_address', 'total_projects', 'completion_rate', 'reputation_score', 'quality_score']
+STATS_DEFAULT_LIMIT = 1000
+STATS_MAX_LIMIT = 10000
+
+# Training search settings (time budget in seconds; unset means no limit)
+TRAIN_N_JOBS = int(os.environ['ML_TRAIN_N_JOBS']) if os.environ.get('ML_TRAIN_N_JOBS') else None
+TRAIN_CV_FOLDS = int(os.environ.get('ML_TRAIN_CV_FOLDS', 5))
+TRAIN_TIME_BUDGET = float(os.environ['ML_TRAIN_TIME_BUDGET']) if os.environ.get('ML_TRAIN_TIME_BUDGET') else None
+
+# Streaming training for datasets larger than memory: read in chunks, fit a
+# 'reservoir' sample with the usual search or an 'sgd' model over every row
+TRAIN_STREAMING = os.environ.get('ML_TRAIN_STREAMING', '0') == '1'
+TRAIN_STREAMING_METHOD = os.environ.get('ML_TRAIN_STREAMING_METHOD', 'reservoir')
+TRAIN_CHUNKSIZE = int(os.environ.get('ML_TRAIN_CHUNKSIZE', 100_000))
+TRAIN_SAMPLE_SIZE = int(os.environ.get('ML_TRAIN_SAMPLE_SIZE', 100_000))
+TRAIN_EPOCHS = int(os.environ.get('ML_TRAIN_EPOCHS', 5))
+
+# Incremental updates (/update_models): trees or boosting stages added per update, forest size cap,
+# and the period of the full retrain that corrects their drift (0 disables it)
+INCREMENTAL_TREES = int(os.environ.get('ML_INCREMENTAL_TREES', 10))
+INCREMENTAL_MAX_TREES = int(os.environ.get('ML_INCREMENTAL_MAX_TREES', 200))
+INCREMENTAL_MIN_ROWS = 10
+FULL_RETRAIN_HOURS = float(os.environ.get('ML_FULL_RETRAIN_HOURS', 0))
+
+BID_TYPES = ['MinRate', 'MaxRate', 'FixRate']
+
+DATASET_PATH = os.environ.get('ML_DATASET_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dataset.csv'))
+
+# Watch the dataset file and apply changed rows in the background (opt-in, set ML_WATCH_DATASET=1)
+WATCH_DATASET = os.environ.get('ML_WATCH_DATASET', '0') == '1'
+WATCH_INTERVAL_SECONDS = float(os.environ.get('ML_WATCH_INTERVAL', 5))
+
+# Production serving: shared memory-mapped feature store, and how often workers poll it (seconds)
+FEATURE_STORE_DIR = os.environ.get('ML_FEATURE_STORE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'feature_store'))
+SHARED_REFRESH_SECONDS = float(os.environ.get('ML_SHARED_REFRESH', 1.0))
+
+# Coalesce concurrent /assess_risk calls into one batch per window (opt-in, set ML_COALESCE=1)
+COALESCE = os.environ.get('ML_COALESCE', '0') == '1'
+COALESCE_WINDOW_MS = float(os.environ.get('ML_COALESCE_WINDOW_MS', 2))
+COALESCE_MAX_BATCH = int(os.environ.get('ML_COALESCE_MAX_BATCH', 64))
+
+# Versioned model bundles; the promoted version is served (loose .pkl files only until the first promotion)
+MODEL_REGISTRY_DIR = os.environ.get('ML_MODEL_REGISTRY', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model_registry'))
+SHADOW_QUEUE_SIZE = int(os.environ.get('ML_SHADOW_QUEUE_SIZE', 10000))
+
+# Score with the compiled NumPy evaluators instead of sklearn's predict (set to 0 to disable)
+COMPILED_INFERENCE = os.environ.get('ML_COMPILED_INFERENCE', '1') != '0'
+
+# Admin endpoints (/admin/...) are disabled unless a token is set; send it as X-Admin-Token
+ADMIN_TOKEN = os.environ.get('ML_ADMIN_TOKEN')
+
+# Production serving: where workers leave metric snapshots so /metrics covers all of them
+METRICS_DIR = os.environ.get('ML_METRICS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'metrics'))
+
+# Prometheus metrics served at /metrics; scrape-time values are registered below risk_ml
+metrics = MetricsRegistry()
+HTTP_REQUESTS = metrics.counter('ml_http_requests_total', 'HTTP requests by endpoint, method and status',
+                                ('endpoint', 'method', 'status'))
+HTTP_LATENCY = metrics.histogram('ml_http_request_duration_seconds', 'HTTP request latency', ('endpoint',))
+PREDICT_STAGE_LATENCY = metrics.histogram(
+    'ml_predict_stage_duration_seconds',
+    'Time per scoring stage: bidder lookup, feature scaling, model prediction (compiled models fold scaling in)',
+    ('stage',)
+)
+FALLBACK_PREDICTIONS = metrics.counter('ml_fallback_predictions_total',
+                                       'Rows scored by the rule-based fallback because no model was loaded', ('bid_type',))
+
+class ModelBundle:
+    """Immutable set of per-bid-type models and scalers served together.
+    
+    TrustChainRiskML swaps whole bundles by rebinding one attribute, so a
+    request never sees a model from one training run with a scaler from another.
+    Each model is also compiled, with its scaler folded in, when supported.
+    """
+    def __init__(self, version, models, scalers, metrics=None, registry_version=None):
+        self.version = version
+        # Model registry version the bundle was loaded from or saved as, None for loose files
+        self.registry_version = registry_version
+        self.models = {bid_type: models.get(bid_type) for bid_type in BID_TYPES}
+        self.scalers = {bid_type: scalers.get(bid_type) for bid_type in BID_TYPES}
+        self.compiled = {
+            bid_type: compile_model(self.models[bid_type], self.scalers[bid_type]) if COMPILED_INFERENCE else None
+            for bid_type in BID_TYPES
+        }
+        self.metrics = metrics or {}
+        self.created_at = datetime.now().isoformat()
+        self._explainers = {}
+
+    def explainer(self, bid_type):
+        """Compiled model for feature attribution, compiled on first use when inference doesn't compile"""
+        explainer = self.compiled[bid_type] or self._explainers.get(bid_type)
+        if explainer is None and self.models[bid_type] is not None and self.scalers[bid_type] is not None:
+            explainer = self._explainers[bid_type] = compile_model(self.models[bid_type], self.scalers[bid_type])
+        return explainer
 
 class TrustChainRiskML:
     def __init__(self):
         self.historical_data = None
-        self.models = {
-            'MinRate': None,
-            'MaxRate': None,
-            'FixRate': None
-        }
-        self.scalers = {
-            'MinRate': None,
-            'MaxRate': None,
-            'FixRate': None
-        }
+        self.bidder_index = None
+        self.bundle = ModelBundle(0, {}, {})
         self.feature_names = [
             'total_projects', 'completed_projects', 'abandoned_projects',
             'completion_rate', 'average_delay_days', 'budget_overruns_percent',
             'quality_score', 'reputation_score', 'payment_disputes',
             'days_since_last_project'
         ]
+        self._feature_pos = {name: i for i, name in enumerate(self.feature_names)}
+        
+        # Bumped whenever data changes; cached results are stamped with this and the bundle version
+        self.data_version = 0
+        self.assessment_cache = AssessmentCache(CACHE_SIZE, CACHE_TTL_SECONDS)
+        self.ranking_cache = AssessmentCache(RANKING_CACHE_SIZE, RANKING_CACHE_TTL_SECONDS)
+        self.explanation_cache = AssessmentCache(EXPLAIN_CACHE_SIZE, EXPLAIN_CACHE_TTL_SECONDS)
+        
+        # Sorted baseline scores of every bidder, rebuilt incrementally by refresh_risk_index
+        self.risk_index = None
+        self.risk_index_seconds = None
+        self._risk_index_lock = threading.Lock()
+        self._update_lock = threading.Lock()
         
-        # Load models if they exist
-        self.load_models()
+        # Cache misses are scored through this when set, batched with concurrent requests
+        self.coalescer = None
+        self.data_load_seconds = None
+        
+        # Set in production serving; features then come from shared segments, see refresh_shared_state
+        self.feature_store = None
+        self.registry = ModelRegistry(MODEL_REGISTRY_DIR)
+        self._models_signature = None
+        self._shared_checked_at = 0.0
+
+    @property
+    def models(self):
+        return self.bundle.models
+
+    @property
+    def scalers(self):
+        return self.bundle.scalers
+
+    @property
+    def model_version(self):
+        return self.bundle.version
 
     def load_models(self):
-        """Load pre-trained models"""
+        """Load the registry's production models, or the loose pre-trained model files before any promotion"""
+        import joblib
+        
         model_dir = os.path.dirname(os.path.abspath(__file__))
+        models, scalers = {}, {}
+        self._models_signature = self._model_files_signature()
+        
+        version = self._models_signature[0]
+        if version is not None:
+            self.bundle = self.load_registry_bundle(version, self.bundle.version + 1)
+            print(f"Loaded registry version {version} ({', '.join(t for t, m in self.bundle.models.items() if m is not None)})")
+            return
         
-        for bid_type in ['MinRate', 'MaxRate', 'FixRate']:
+        for bid_type in BID_TYPES:
             try:
                 model_path = os.path.join(model_dir, f'risk_model_{bid_type.lower()}.pkl')
                 scaler_path = os.path.join(model_dir, f'scaler_{bid_type.lower()}.pkl')
                 
                 if os.path.exists(model_path) and os.path.exists(scaler_path):
-                    self.models[bid_type] = joblib.load(model_path)
-                    self.scalers[bid_type] = joblib.load(scaler_path)
+                    model = joblib.load(model_path)
+                    scalers[bid_type] = joblib.load(scaler_path)
+                    models[bid_type] = model
                     print(f"Loaded model for {bid_type}")
                 else:
                     print(f"Model files not found for {bid_type}")
             except Exception as e:
                 print(f"Error loading model for {bid_type}: {e}")
+        
+        self.bundle = ModelBundle(self.bundle.version + 1, models, scalers)
+
+    def load_registry_bundle(self, version, bundle_version=0):
+        """ModelBundle of a registry version, without installing it"""
+        models, scalers, meta = self.registry.load(version)
+        if meta['feature_names'] != self.feature_names:
+            raise ValueError(f"Model version {version} was trained on features {meta['feature_names']}")
+        return ModelBundle(bundle_version, models, scalers, meta['metrics'], registry_version=version)
+
+    def _model_files_signature(self):
+        """Production registry version and modification times of the loose model files,
+        to notice models saved or promoted by another process"""
+        model_dir = os.path.dirname(os.path.abspath(__file__))
+        signature = [self.registry.production_version()]
+        for bid_type in BID_TYPES:
+            for prefix in ('risk_model', 'scaler'):
+                try:
+                    signature.append(os.stat(os.path.join(model_dir, f'{prefix}_{bid_type.lower()}.pkl')).st_mtime_ns)
+                except FileNotFoundError:
+                    signature.append(None)
+        return tuple(signature)
+
+    def install_models(self, models, scalers, metrics=None, registry_version=None):
+        """Atomically swap in newly trained models; bid types not given keep their current model and metrics"""
+        current = self.bundle
+        merged_models = dict(current.models)
+        merged_scalers = dict(current.scalers)
+        merged_models.update(models)
+        merged_scalers.update(scalers)
+        merged_metrics = {**current.metrics, **(metrics or {})}
+        
+        self.bundle = ModelBundle(current.version + 1, merged_models, merged_scalers, merged_metrics, registry_version)
+        return self.bundle
 
     def load_historical_data(self, csv_path):
-        """Load and store historical data for user lookups"""
+        """Load and store historical data for user lookups.
+        
+        Reads the compact columnar copy (compact_dataset.py) when it is up to
+        date with the CSV, and the CSV itself otherwise. Returns the bidder
+        index, or None if loading failed.
+        """
         try:
-            self.historical_data = pd.read_csv(csv_path)
-            return self.historical_data
+            start = time.perf_counter()
+            compact_path = compact_dataset_path(csv_path)
+            if is_fresh(compact_path, csv_path):
+                historical_data = None
+                index = CompactDataset(compact_path).bidder_index(self.feature_names)
+            else:
+                import pandas as pd
+                historical_data = pd.read_csv(csv_path)
+                index = BidderIndex.from_frame(historical_data, self.feature_names)
+            
+            self.data_load_seconds = time.perf_counter() - start
+            return self.install_bidder_index(index, historical_data)
         except Exception as e:
             print(f"Error loading historical data: {e}")
             return None
 
-    def get_bidder_risk_assessment(self, bidder_address, bid_type, bid_amount=None, project_budget=None):
-        """Complete risk assessment for a bidder by their address"""
+    def install_bidder_index(self, index, historical_data=None):
+        """Serve a new bidder index; requests in flight finish on the previous one"""
+        if self.feature_store is not None:
+            # Publish a new shared segment; every process (this one included) maps it
+            self.feature_store.publish(index)
+            self.refresh_shared_state(force=True)
+            return self.bidder_index
+        
+        self.historical_data = historical_data
+        self.bidder_index = index
+        self.data_version += 1
+        return self.bidder_index
+
+    def refresh_shared_state(self, force=False):
+        """Pick up feature segments and model files published by other processes.
+        
+        Only active with a feature store; polls at most every SHARED_REFRESH_SECONDS.
+        The data version is the segment version, so it agrees across workers.
+        """
+        now = time.monotonic()
+        if self.feature_store is None or (not force and now - self._shared_checked_at < SHARED_REFRESH_SECONDS):
+            return
+        self._shared_checked_at = now
+        
+        try:
+            version = self.feature_store.current_version()
+            if version is not None and version != self.data_version:
+                version, index = self.feature_store.open(version)
+                self.bidder_index = index
+                self.data_version = version
+            
+            if self._model_files_signature() != self._models_signature:
+                self.load_models()
+        except Exception as e:
+            # Keep serving the current data; the next poll retries
+            print(f"Error refreshing shared state: {e}")
+
+    def get_bidder_risk_assessment(self, bidder_address, bid_type, bid_amount=None, project_budget=None, explain=False):
+        """Complete risk assessment for a bidder by their address, with feature attributions if explain"""
         
-        # Step 1: Lookup bidder data
-        if self.historical_data is None:
+        # Step 1: Lookup bidder data (in one index snapshot, which a reload may replace meanwhile)
+        bidder_index = self.bidder_index
+        if bidder_index is None:
             return {"error": "Historical data not loaded"}
+        if bid_type not in BID_TYPES:
+            return {"error": f"Unknown bid type {bid_type}"}
+        
+        try:
+            bid_amount = None if bid_amount is None else float(bid_amount)
+            project_budget = None if project_budget is None else float(project_budget)
+        except (TypeError, ValueError):
+            return {"error": "bid_amount and project_budget must be numeric"}
+        
+        cache_key = (normalize_address(bidder_address), bid_type, bid_amount, project_budget)
+        cache_version = (self.model_version, self.data_version)
+        cached = self.assessment_cache.get(cache_key, cache_version)
+        if cached is not None:
+            assessment = dict(cached, bidder_address=bidder_address)
+            return self._explained(assessment, bidder_index, bid_amount, project_budget) if explain else assessment
+        
+        if self.coalescer is not None:
+            assessment = self.coalescer.submit((bidder_address, bid_type, bid_amount, project_budget))
+            if 'error' not in assessment:
+                self.assessment_cache.put(cache_key, cache_version, assessment)
+                if explain:
+                    return self._explained(dict(assessment), bidder_index, bid_amount, project_budget)
+            return dict(assessment)
         
-        bidder_row = self.historical_data[self.historical_data['bidder_address'] == bidder_address]
+        lookup_start = time.perf_counter()
+        row = bidder_index.lookup(bidder_address)
+        PREDICT_STAGE_LATENCY.observe(time.perf_counter() - lookup_start, ('lookup',))
         
-        if bidder_row.empty:
+        if row is None:
             return {"error": f"Bidder {bidder_address} not found in dataset"}
         
-        # Step 2: Convert to dictionary format
-        bidder_data = bidder_row.iloc[0].to_dict()
+        # Step 2: Take the bidder's row from the feature matrix
+        features = bidder_index.features[row]
+        contract_value = bidder_index.contract_values[row]
         
         # Step 3: Predict risk using trained model
-        risk_score = self.predict_risk(bidder_data, bid_type, bid_amount, project_budget)
+        risk_score = self._score_features(features, contract_value, bid_type, bid_amount, project_budget)
         
         # Step 4: Return complete assessment
+        assessment = self._build_assessment(bidder_address, bid_type, risk_score, features)
+        self.assessment_cache.put(cache_key, cache_version, assessment)
+        if explain:
+            return self._explained(dict(assessment), bidder_index, bid_amount, project_budget, row)
+        return dict(assessment)
+
+    def _explained(self, assessment, bidder_index, bid_amount, project_budget, row=None):
+        """The assessment with an 'explanation' of its risk score added"""
+        if row is None:
+            row = bidder_index.lookup(assessment['bidder_address'])
+        assessment['explanation'] = self._explanations(
+            bidder_index, assessment['bid_type'], np.array([row], dtype=np.intp),
+            np.array([np.nan if bid_amount is None else bid_amount], dtype=np.float64),
+            np.array([np.nan if project_budget is None else project_budget], dtype=np.float64)
+        )[0]
+        return assessment
+
+    def predict_risk_batch(self, bids, explain=False):
+        """Assess many (bidder_address, bid_type, bid_amount, project_budget) bids at once.
+        
+        Rows are grouped by bid type so each group costs one scaler transform and
+        one model.predict call. Items that cannot be scored get an error entry.
+        With explain, each assessment also gets its feature attributions.
+        """
+        results = [None] * len(bids)
+        
+        bidder_index = self.bidder_index
+        if bidder_index is None:
+            return [{"error": "Historical data not loaded"} for _ in bids]
+        
+        # Step 1: Resolve bidders and group valid rows by bid type
+        groups = {}
+        for i, bid in enumerate(bids):
+            if isinstance(bid, dict):
+                bid = (bid.get('bidder_address'), bid.get('bid_type'),
+                       bid.get('bid_amount'), bid.get('project_budget'))
+            bidder_address, bid_type, bid_amount, project_budget = bid
+            
+            if not bidder_address or not bid_type:
+                results[i] = {"error": "Missing required fields: bidder_address, bid_type"}
+                continue
+            if bid_type not in self.models:
+                results[i] = {"error": f"Unknown bid type {bid_type}"}
+                continue
+            
+            lookup_start = time.perf_counter()
+            row = bidder_index.lookup(bidder_address)
+            PREDICT_STAGE_LATENCY.observe(time.perf_counter() - lookup_start, ('lookup',))
+            if row is None:
+                results[i] = {"error": f"Bidder {bidder_address} not found in dataset"}
+                continue
+            
+            try:
+                bid_amount = np.nan if bid_amount is None else float(bid_amount)
+                project_budget = np.nan if project_budget is None else float(project_budget)
+            except (TypeError, ValueError):
+                results[i] = {"error": "bid_amount and project_budget must be numeric"}
+                continue
+            
+            groups.setdefault(bid_type, []).append((i, bidder_address, row, bid_amount, project_budget))
+        
+        # Step 2: Score each bid type group in a single pass
+        for bid_type, items in groups.items():
+            rows = np.fromiter((item[2] for item in items), dtype=np.intp, count=len(items))
+            features = bidder_index.features[rows]
+            bid_amounts = np.fromiter((item[3] for item in items), dtype=np.float64, count=len(items))
+            project_budgets = np.fromiter((item[4] for item in items), dtype=np.float64, count=len(items))
+            scores = self._score_matrix(
+                features,
+                bidder_index.contract_values[rows],
+                bid_type,
+                bid_amounts,
+                project_budgets
+            )
+            
+            for (i, bidder_address, _, _, _), x, score in zip(items, features, scores):
+                results[i] = self._build_assessment(bidder_address, bid_type, score, x)
+            
+            if explain:
+                explanations = self._explanations(bidder_index, bid_type, rows, bid_amounts, project_budgets)
+                for (i, _, _, _, _), explanation in zip(items, explanations):
+                    results[i]['explanation'] = explanation
+        
+        return results
+
+    def rank_bids(self, project_budget, bids, sort='risk_adjusted_amount', top_k=None):
+        """Score every bid on one tender and rank them, lowest first by sort.
+        
+        bids are dicts with bidder_address, bid_type and bid_amount; all are
+        scored against project_budget in one predict_risk_batch call. The
+        risk-adjusted amount is bid_amount * (1 + risk_score / 100). The
+        ranking is memoized per snapshot of the bids, budget and sort order
+        (and model/data version); top_k only marks the shortlist, so views
+        with different cutoffs share one cached ranking.
+        """
+        if self.bidder_index is None:
+            return {"error": "Historical data not loaded"}
+        if sort not in RANK_SORT_KEYS:
+            return {"error": f"Unknown sort {sort}; expected one of {', '.join(RANK_SORT_KEYS)}"}
+        
+        # Validate the bids first, so the snapshot only holds hashable values
+        amounts, errors = [], []
+        for bid in bids:
+            amount, error = bid.get('bid_amount'), None
+            if any(bid.get(field) is not None and not isinstance(bid.get(field), str)
+                   for field in ('bidder_address', 'bid_type')):
+                amount, error = None, 'bidder_address and bid_type must be strings'
+            elif amount is None:
+                error = 'Missing required field: bid_amount'
+            else:
+                try:
+                    amount = float(amount)
+                except (TypeError, ValueError):
+                    amount, error = None, 'bid_amount must be numeric'
+            amounts.append(amount)
+            errors.append(error)
+        
+        snapshot = (float(project_budget), sort, tuple(
+            (normalize_address(bid.get('bidder_address')), bid.get('bid_type'), amount) if error is None
+            else (error, repr(bid.get('bidder_address')))
+            for bid, amount, error in zip(bids, amounts, errors)
+        ))
+        cache_version = (self.model_version, self.data_version)
+        cached = self.ranking_cache.get(snapshot, cache_version)
+        if cached is None:
+            cached = self._rank_snapshot(project_budget, bids, amounts, errors, sort)
+            self.ranking_cache.put(snapshot, cache_version, cached)
+        ranked, unscored = cached
+        
+        return {
+            'project_budget': float(project_budget),
+            'sort': sort,
+            'total_bids': len(bids),
+            'top_k': top_k,
+            'rankings': [dict(entry, shortlisted=top_k is None or entry['rank'] <= top_k) for entry in ranked],
+            'unscored': [dict(entry) for entry in unscored]
+        }
+
+    def _rank_snapshot(self, project_budget, bids, amounts, errors, sort):
+        """(ranked entries, unscored entries) for one tender's bids, given their validated amounts"""
+        scorable, unscored = [], []
+        for i, (bid, error) in enumerate(zip(bids, errors)):
+            if error is not None:
+                unscored.append({'index': i, 'bidder_address': bid.get('bidder_address'), 'error': error})
+            else:
+                scorable.append(i)
+        
+        assessments = self.predict_risk_batch([
+            (bids[i].get('bidder_address'), bids[i].get('bid_type'), amounts[i], project_budget)
+            for i in scorable
+        ])
+        
+        scored = []
+        for i, assessment in zip(scorable, assessments):
+            if 'error' in assessment:
+                unscored.append({'index': i, 'bidder_address': bids[i].get('bidder_address'), 'error': assessment['error']})
+            else:
+                scored.append((i, assessment))
+        unscored.sort(key=lambda entry: entry['index'])
+        
+        amounts = np.array([amounts[i] for i, _ in scored], dtype=np.float64)
+        risk_scores = np.array([assessment['risk_score'] for _, assessment in scored], dtype=np.float64)
+        adjusted = amounts * (1 + risk_scores / 100)
+        sort_values = {'risk_adjusted_amount': adjusted, 'risk_score': risk_scores, 'bid_amount': amounts}[sort]
+        # Stable, so ties keep submission order
+        order = np.argsort(sort_values, kind='stable')
+        
+        ranked = []
+        for rank, position in enumerate(order, start=1):
+            i, assessment = scored[position]
+            ranked.append({
+                'rank': rank,
+                'index': i,
+                'bidder_address': assessment['bidder_address'],
+                'bid_type': assessment['bid_type'],
+                'bid_amount': float(amounts[position]),
+                'bid_ratio': float(amounts[position] / project_budget),
+                'risk_score': assessment['risk_score'],
+                'risk_category': assessment['risk_category'],
+                'risk_adjusted_amount': float(adjusted[position]),
+                'recommendation': assessment['recommendation']
+            })
+        return ranked, unscored
+
+    def refresh_risk_index(self):
+        """Bring the risk percentile index up to date with the served data and models.
+        
+        Only bidders whose features changed, and bid types whose model
+        changed, are rescored. Returns the index, or None without data.
+        """
+        with self._risk_index_lock:
+            bundle, bidder_index, data_version = self.bundle, self.bidder_index, self.data_version
+            current = self.risk_index
+            if bidder_index is None:
+                return None
+            if current is not None and (current.data_version, current.model_version) == (data_version, bundle.version):
+                return current
+            
+            start = time.perf_counter()
+            models = {bid_type: (bundle.models[bid_type], bundle.scalers[bid_type]) for bid_type in BID_TYPES}
+            score = lambda bid_type, rows: self._baseline_scores(bundle, bidder_index, bid_type, rows)
+            if current is None:
+                index = RiskPercentileIndex.build(bidder_index, data_version, bundle.version, models, score)
+            else:
+                index = current.refreshed(bidder_index, data_version, bundle.version, models, score)
+            
+            self.risk_index = index
+            self.risk_index_seconds = time.perf_counter() - start
+            return index
+
+    def _baseline_scores(self, bundle, bidder_index, bid_type, rows, chunk_rows=100_000):
+        """Risk scores of index rows without bid-specific adjustments, scored in chunks"""
+        model, scaler = bundle.models[bid_type], bundle.scalers[bid_type]
+        scores = np.empty(len(rows), dtype=np.float64)
+        for start in range(0, len(rows), chunk_rows):
+            features = bidder_index.features[rows[start:start + chunk_rows]]
+            if model is None or scaler is None:
+                chunk = self._fallback_risk_matrix(features)
+            else:
+                chunk = model.predict(self._scale_features(scaler, features))
+            scores[start:start + chunk_rows] = np.clip(chunk, 0, 100)
+        return scores
+
+    def risk_percentile(self, bidder_address, bid_type):
+        """Where a bidder's baseline risk sits among all bidders for a bid type"""
+        index = self.refresh_risk_index()
+        if index is None:
+            return {"error": "Historical data not loaded"}
+        if bid_type not in BID_TYPES:
+            return {"error": f"Unknown bid type {bid_type}"}
+        
+        row = index.bidder_index.lookup(bidder_address)
+        if row is None:
+            return {"error": f"Bidder {bidder_address} not found in dataset"}
+        
+        score, percentile, rank = index.percentile(bid_type, row)
+        return {
+            'bidder_address': bidder_address,
+            'bid_type': bid_type,
+            'risk_score': score,
+            'risk_category': 'Low' if score < 30 else 'Medium' if score < 70 else 'High',
+            'percentile': percentile,
+            'rank': rank,
+            'population': index.population(bid_type)
+        }
+
+    def risk_extremes(self, bid_type, limit, riskiest=True, offset=0, percent=None):
+        """Page of the riskiest (or safest) bidders for a bid type.
+        
+        With percent the ranking stops after the top percent of bidders,
+        paged through by offset and limit like the full ranking.
+        """
+        index = self.refresh_risk_index()
+        if index is None:
+            return {"error": "Historical data not loaded"}
+        if bid_type not in BID_TYPES:
+            return {"error": f"Unknown bid type {bid_type}"}
+        
+        population = index.population(bid_type)
+        selected = population if percent is None else int(np.ceil(population * percent / 100))
+        rows = index.extremes(bid_type, max(0, min(limit, selected - offset)), riskiest, offset)
+        
+        scores = index.scores[bid_type][rows]
+        addresses = index.bidder_index.to_json_values('bidder_address', rows)
+        percentiles = 100.0 * np.searchsorted(index.sorted_scores[bid_type], scores, side='right') / population
+        return {
+            'bid_type': bid_type,
+            'order': 'riskiest' if riskiest else 'safest',
+            'population': population,
+            'selected': selected,
+            'offset': offset,
+            'limit': limit,
+            'next_offset': offset + limit if offset + limit < selected else None,
+            'bidders': [
+                {'bidder_address': address, 'risk_score': score, 'percentile': percentile}
+                for address, score, percentile in zip(addresses, scores.tolist(), percentiles.tolist())
+            ]
+        }
+
+    def risk_histogram(self, bid_type, bins=10):
+        """Bidder counts per equal-width risk score bin over 0-100 for a bid type"""
+        index = self.refresh_risk_index()
+        if index is None:
+            return {"error": "Historical data not loaded"}
+        if bid_type not in BID_TYPES:
+            return {"error": f"Unknown bid type {bid_type}"}
+        
+        edges = np.linspace(0, 100, bins + 1)
+        return {
+            'bid_type': bid_type,
+            'population': index.population(bid_type),
+            'edges': edges.tolist(),
+            'counts': index.histogram(bid_type, edges).tolist()
+        }
+
+    def _build_assessment(self, bidder_address, bid_type, risk_score, features):
+        """Format a scored bidder as an assessment response"""
         return {
             'bidder_address': bidder_address,
             'bid_type': bid_type,
@@ -89,9 +665,9 @@ class TrustChainRiskML:
             'risk_category': 'Low' if risk_score < 30 else 'Medium' if risk_score < 70 else 'High',
             'recommendation': self._get_recommendation(risk_score, bid_type),
             'bidder_stats': {
-                'total_projects': int(bidder_data['total_projects']),
-                'completion_rate': float(bidder_data['completion_rate']),
-                'reputation_score': float(bidder_data['reputation_score'])
+                'total_projects': int(features[self._feature_pos['total_projects']]),
+                'completion_rate': float(features[self._feature_pos['completion_rate']]),
+                'reputation_score': float(features[self._feature_pos['reputation_score']])
             }
         }
 
@@ -107,147 +683,687 @@ class TrustChainRiskML:
     def predict_risk(self, bidder_data, bid_type, bid_amount=None, project_budget=None):
         """Predict risk score for a specific bidder and bid type"""
         
-        if self.models[bid_type] is None or self.scalers[bid_type] is None:
-            return self._fallback_risk_calculation(bidder_data, bid_type)
-        
         # Prepare features
-        features = {feature: bidder_data.get(feature, 0) for feature in self.feature_names}
-        features_df = pd.DataFrame([features])
+        features = np.array([bidder_data.get(feature, 0) for feature in self.feature_names], dtype=np.float64)
+        contract_value = bidder_data.get('total_contract_value', 0)
+        
+        return self._score_features(features, contract_value, bid_type, bid_amount, project_budget)
+
+    def _score_features(self, features, contract_value, bid_type, bid_amount=None, project_budget=None):
+        """Predict risk score from a bidder's raw feature vector"""
+        return float(self._score_matrix(
+            features.reshape(1, -1),
+            np.array([contract_value], dtype=np.float64),
+            bid_type,
+            np.array([np.nan if bid_amount is None else bid_amount], dtype=np.float64),
+            np.array([np.nan if project_budget is None else project_budget], dtype=np.float64)
+        )[0])
 
-        # Scale features
-        features_scaled = self.scalers[bid_type].transform(features_df)
+    def _score_matrix(self, features, contract_values, bid_type, bid_amounts, project_budgets, bundle=None):
+        """Vectorized risk scores for rows of raw features; NaN amounts mean 'not given'.
         
-        # Predict
-        risk_score = self.models[bid_type].predict(features_scaled)[0]
+        bundle scores with other models than the served ones (shadow scoring), outside the serving metrics.
+        """
+        
+        # Read the bundle once so a concurrent hot-swap can't mix model and scaler
+        served = bundle is None
+        if served:
+            bundle = self.bundle
+        model, scaler = bundle.models[bid_type], bundle.scalers[bid_type]
+        if model is None or scaler is None:
+            if served:
+                FALLBACK_PREDICTIONS.inc((bid_type,), len(features))
+            return self._fallback_risk_matrix(features)
+        
+        # Predict, with the compiled evaluator when the model has one and the batch is small enough
+        compiled = bundle.compiled[bid_type]
+        start = time.perf_counter()
+        if compiled is not None and (compiled.max_rows is None or len(features) <= compiled.max_rows):
+            risk_scores = compiled.predict(features)
+        else:
+            scaled = self._scale_features(scaler, features)
+            scaled_at = time.perf_counter()
+            if served:
+                PREDICT_STAGE_LATENCY.observe(scaled_at - start, ('scaling',))
+            start = scaled_at
+            risk_scores = model.predict(scaled).astype(np.float64)
+        if served:
+            PREDICT_STAGE_LATENCY.observe(time.perf_counter() - start, ('prediction',))
         
         # Add bid-specific adjustments
-        if bid_type == 'MinRate' and bid_amount and project_budget:
-            bid_ratio = bid_amount / project_budget
-            if bid_ratio < 0.6:
-                risk_score += 25  # Unrealistically low bid
-            elif bid_ratio < 0.75:
-                risk_score += 10  # Suspiciously low bid
-               
-        elif bid_type == 'MaxRate' and bid_amount:
+        for adjustment in self._bid_adjustments(contract_values, bid_type, bid_amounts, project_budgets).values():
+            risk_scores += adjustment
+        
+        return np.clip(risk_scores, 0, 100)
+
+    @staticmethod
+    def _bid_adjustments(contract_values, bid_type, bid_amounts, project_budgets):
+        """Bid-specific score adjustments by name (a missing or zero amount skips the adjustment)"""
+        has_amount = ~np.isnan(bid_amounts) & (bid_amounts != 0)
+        if bid_type == 'MinRate':
+            has_budget = ~np.isnan(project_budgets) & (project_budgets != 0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                bid_ratio = bid_amounts / project_budgets
+            applies = has_amount & has_budget
+            return {'bid_ratio': np.where(applies & (bid_ratio < 0.6), 25,  # Unrealistically low bid
+                                          np.where(applies & (bid_ratio < 0.75), 10, 0))}  # Suspiciously low bid
+        
+        if bid_type == 'MaxRate':
             # High bid without payment history increases risk
-            if bid_amount > bidder_data.get('total_contract_value', 0) * 2:
-                risk_score += 20
+            return {'bid_amount_vs_contract_value': np.where(has_amount & (bid_amounts > contract_values * 2), 20, 0)}
         
-        return max(0, min(100, risk_score))
+        return {}
+
+    def _explanations(self, bidder_index, bid_type, rows, bid_amounts, project_budgets):
+        """Attribution of each row's risk score, vectorized across the rows.
+        
+        base_value plus the feature contributions is the model's score; the bid
+        adjustments and the clipping to 0-100 then add up to risk_score.
+        """
+        method, bias, contributions = self._model_attributions(bidder_index, bid_type, rows)
+        if method is None:
+            return [{'error': f'No feature attribution for the {bid_type} model type'}] * len(rows)
+        
+        # The rule-based fallback doesn't apply bid adjustments
+        adjustments = {} if method == 'rules' else self._bid_adjustments(
+            bidder_index.contract_values[rows], bid_type, bid_amounts, project_budgets)
+        unclipped = bias + contributions.sum(axis=1) + sum(adjustments.values())
+        clipping = np.clip(unclipped, 0, 100) - unclipped
+        
+        return [
+            {
+                'method': method,
+                'base_value': float(bias[i]),
+                'contributions': dict(zip(self.feature_names, contributions[i].tolist())),
+                'adjustments': {name: float(values[i]) for name, values in adjustments.items()},
+                'clipping': float(clipping[i])
+            }
+            for i in range(len(rows))
+        ]
+
+    def _model_attributions(self, bidder_index, bid_type, rows):
+        """(method, bias, contributions) of the model score for index rows, through the explanation cache"""
+        bundle = self.bundle
+        cache_version = (bundle.version, self.data_version)
+        bias = np.empty(len(rows))
+        contributions = np.empty((len(rows), len(self.feature_names)))
+        method = None
+        
+        misses = []
+        for i, row in enumerate(rows.tolist()):
+            cached = self.explanation_cache.get((bid_type, row), cache_version)
+            if cached is None:
+                misses.append(i)
+            else:
+                method, bias[i], contributions[i] = cached
+        
+        for start in range(0, len(misses), EXPLAIN_CHUNK_ROWS):
+            chunk = np.array(misses[start:start + EXPLAIN_CHUNK_ROWS], dtype=np.intp)
+            method, chunk_bias, chunk_contributions = self._attribute(bundle, bid_type, bidder_index.features[rows[chunk]])
+            if method is None:
+                return None, None, None
+            bias[chunk], contributions[chunk] = chunk_bias, chunk_contributions
+            for i, row_bias, row_contributions in zip(chunk.tolist(), chunk_bias, chunk_contributions):
+                self.explanation_cache.put((bid_type, int(rows[i])), cache_version, (method, row_bias, row_contributions))
+        
+        return method, bias, contributions
+
+    def _attribute(self, bundle, bid_type, features):
+        """(method, bias, contributions) splitting the model (or fallback) score over the features"""
+        if bundle.models[bid_type] is None or bundle.scalers[bid_type] is None:
+            return ('rules',) + self._fallback_attributions(features)
+        explainer = bundle.explainer(bid_type)
+        if explainer is None:
+            return None, None, None
+        return (explainer.attribution,) + explainer.contributions(features)
+
+    @staticmethod
+    def _scale_features(scaler, X):
+        """Apply a fitted StandardScaler without sklearn's per-call input validation"""
+        if scaler.with_mean:
+            X = X - scaler.mean_
+        if scaler.with_std:
+            X = X / scaler.scale_
+        return X
 
     def _fallback_risk_calculation(self, bidder_data, bid_type):
         """Fallback rule-based calculation if ML model not available"""
-        base_risk = 0
-        base_risk += bidder_data.get('abandoned_projects', 0) * 30
-        base_risk += min(30, bidder_data.get('average_delay_days', 0) * 0.5)
-        base_risk += bidder_data.get('payment_disputes', 0) * 15
-        base_risk -= bidder_data.get('reputation_score', 0) * 2
+        FALLBACK_PREDICTIONS.inc((bid_type,))
+        features = np.array([[bidder_data.get(feature, 0) for feature in self.feature_names]], dtype=np.float64)
+        return float(self._fallback_risk_matrix(features)[0])
+
+    def _fallback_risk_matrix(self, features):
+        """Vectorized rule-based risk for rows of raw features"""
+        pos = self._feature_pos
+        base_risk = features[:, pos['abandoned_projects']] * 30
+        base_risk += np.minimum(30, features[:, pos['average_delay_days']] * 0.5)
+        base_risk += features[:, pos['payment_disputes']] * 15
+        base_risk -= features[:, pos['reputation_score']] * 2
         
-        return max(0, min(100, base_risk))
+        return np.clip(base_risk, 0, 100)
+
+    def _fallback_attributions(self, features):
+        """(bias, contributions) of the unclipped rule-based risk"""
+        pos = self._feature_pos
+        contributions = np.zeros_like(features, dtype=np.float64)
+        contributions[:, pos['abandoned_projects']] = features[:, pos['abandoned_projects']] * 30
+        contributions[:, pos['average_delay_days']] = np.minimum(30, features[:, pos['average_delay_days']] * 0.5)
+        contributions[:, pos['payment_disputes']] = features[:, pos['payment_disputes']] * 15
+        contributions[:, pos['reputation_score']] = features[:, pos['reputation_score']] * -2
+        return np.zeros(len(features)), contributions
 
-    def train_models(self, historical_data):
-        """Train separate ML models for each bid type"""
+    def get_bidder_stats(self, fields, sort=None, descending=False, filters=(), offset=0, limit=STATS_DEFAULT_LIMIT):
+        """Page of bidder statistics served from the bidder index's column arrays.
+        
+        filters is a list of (field, 'min'|'max', value) bounds. Returns the
+        page as a list of dicts plus the filtered total and the next offset.
+        """
+        if self.bidder_index is None:
+            return {"error": "Historical data not loaded"}
+        
+        index = self.bidder_index
+        allowed = ['bidder_address'] + self.feature_names
+        unknown = [f for f in list(fields) + [f for f, _, _ in filters] + ([sort] if sort else []) if f not in allowed]
+        if unknown:
+            return {"error": f"Unknown field(s): {', '.join(unknown)}"}
+        if sort == 'bidder_address' or any(f == 'bidder_address' for f, _, _ in filters):
+            return {"error": "bidder_address cannot be sorted or filtered on"}
         
-        for bid_type in ['MinRate']:
+        # Row order: precomputed per-column sort order, or dataset order
+        rows = index.sorted_rows(sort) if sort else np.arange(len(index))
+        if descending:
+            rows = rows[::-1]
+        
+        if filters:
+            mask = np.ones(len(index), dtype=bool)
+            for field, bound, value in filters:
+                column = index.column(field)
+                mask &= (column >= value) if bound == 'min' else (column <= value)
+            rows = rows[mask[rows]]
+        
+        total = len(rows)
+        page = rows[offset:offset + limit]
+        
+        columns = [index.to_json_values(field, page) for field in fields]
+        bidders = [dict(zip(fields, values)) for values in zip(*columns)]
+        
+        return {
+            'total_bidders': total,
+            'offset': offset,
+            'limit': limit,
+            'next_offset': offset + limit if offset + limit < total else None,
+            'bidders': bidders
+        }
+
+    def train_models(self, historical_data, **options):
+        """Train separate ML models for each bid type, register and promote them and swap them in"""
+        models, scalers, metrics = self.fit_models(historical_data, **options)
+        version = self.save_models(models, scalers, metrics, frame_sha256(historical_data))
+        self.install_models(models, scalers, metrics, version)
+        return metrics
+
+    def update_models(self, new_data, promote=True, trees=INCREMENTAL_TREES, max_trees=INCREMENTAL_MAX_TREES, epochs=1):
+        """Update the served models with new outcome rows instead of retraining from scratch.
+        
+        Bid types with at least INCREMENTAL_MIN_ROWS new rows and a served
+        model are updated (see incremental_training.py); the result is
+        registered as a new version, and promoted and swapped in unless
+        promote is False. Returns (registry version or None, metrics of the updated bid types).
+        """
+        with self._update_lock:
+            bundle = self.bundle
+            models, scalers, metrics = {}, {}, {}
+            
+            for bid_type in BID_TYPES:
+                type_data = new_data[new_data['bid_type'] == bid_type]
+                model, scaler = bundle.models[bid_type], bundle.scalers[bid_type]
+                if len(type_data) < INCREMENTAL_MIN_ROWS or model is None or scaler is None:
+                    continue
+                
+                models[bid_type], scalers[bid_type], update = update_model(
+                    model, scaler, type_data[self.feature_names], self.calculate_risk_labels(type_data, bid_type),
+                    trees=trees, max_trees=max_trees, epochs=epochs
+                )
+                print(f"Updated {bid_type} model with {update['rows']} rows ({update['method']}, "
+                      f"MSE on them {update['mse_before']:.2f} -> {update['mse_after']:.2f})")
+                
+                previous = bundle.metrics.get(bid_type, {})
+                metrics[bid_type] = dict(
+                    previous,
+                    rows=previous.get('rows', update['previous_rows']) + update['rows'],
+                    incremental_updates=previous.get('incremental_updates', 0) + 1,
+                    last_update=update
+                )
+            
+            if not models:
+                return None, {}
+            
+            version = self.save_models(models, scalers, metrics, frame_sha256(new_data), promote)
+            if promote:
+                self.install_models(models, scalers, metrics, version)
+            return version, metrics
+
+    def fit_models(self, historical_data, n_jobs=None, cv_folds=5, time_budget=None):
+        """Fit models for each bid type without touching the served models.
+        
+        Every (bid type, candidate) pair is cross-validated in parallel on
+        n_jobs processes and the lowest k-fold MSE wins. time_budget (seconds)
+        caps the search; bid types with no finished candidate are skipped.
+        Returns (models, scalers, metrics) for the bid types that were trained.
+        """
+        from sklearn.preprocessing import StandardScaler
+        
+        scalers, datasets = {}, {}
+        
+        for bid_type in BID_TYPES:
             print(f"Training model for {bid_type}...")
             
             # Filter data for specific bid type
-            type_data = historical_data[historical_data['bid_type'] == bid_type].copy()
+            type_data = historical_data[historical_data['bid_type'] == bid_type]
             
             if len(type_data) < 10:
                 print(f"Insufficient data for {bid_type}, using general model")
                 continue
             
-            # Prepare features
-            type_data['risk_score'] = self.calculate_risk_labels(type_data, bid_type)
-            
-            # Select features
+            # Select features and compute labels without copying the frame
             X = type_data[self.feature_names]
-            y = type_data['risk_score']
+            y = self.calculate_risk_labels(type_data, bid_type)
             
             # Scale features
             scaler = StandardScaler()
-            X_scaled = scaler.fit_transform(X)
-            
-            # Split data
-            X_train, X_test, y_train, y_test = train_test_split(
-                X_scaled, y, test_size=0.2, random_state=42
-            )
-            
-            # Try different models and select best
-            models_to_try = {
-                'RandomForest': RandomForestRegressor(n_estimators=100, random_state=42),
-                'GradientBoosting': GradientBoostingRegressor(n_estimators=100, random_state=42),
-                'Linear': LinearRegression()
+            datasets[bid_type] = (scaler.fit_transform(X), y)
+            scalers[bid_type] = scaler
+        
+        models, metrics = self._select_models(datasets, scalers, n_jobs, cv_folds, time_budget)
+        return models, scalers, metrics
+
+    def fit_models_streaming(self, csv_path, method='reservoir', chunksize=100_000, sample_size=100_000,
+                             epochs=5, n_jobs=None, cv_folds=5, time_budget=None):
+        """Fit models for each bid type from a dataset read in chunks.
+        
+        Memory stays bounded by chunksize (plus sample_size rows per bid
+        type for 'reservoir'), so the dataset may be larger than RAM. The
+        scalers see every row; 'reservoir' runs the usual candidate search on
+        a uniform sample, 'sgd' trains an SGDRegressor over epochs passes.
+        Returns (models, scalers, metrics) like fit_models.
+        """
+        from streaming_training import STREAMING_METHODS, stream_statistics, train_sgd
+        
+        if method not in STREAMING_METHODS:
+            raise ValueError(f"Unknown streaming method {method}; expected one of {', '.join(STREAMING_METHODS)}")
+        
+        print(f"Streaming {csv_path} in chunks of {chunksize} rows ({method})...")
+        scalers, reservoirs, counts = stream_statistics(
+            csv_path, self.feature_names, BID_TYPES, chunksize,
+            sample_size=sample_size if method == 'reservoir' else None
+        )
+        for bid_type in BID_TYPES:
+            if counts.get(bid_type, 0) < 10:
+                print(f"Insufficient data for {bid_type}, using general model")
+                scalers.pop(bid_type, None)
+                reservoirs.pop(bid_type, None)
+        
+        if method == 'sgd':
+            models, mse = train_sgd(csv_path, self.feature_names, scalers, chunksize, epochs)
+            metrics = {
+                bid_type: {
+                    'selected_model': 'SGD',
+                    'mse': mse.get(bid_type),
+                    'epochs': epochs,
+                    'rows': counts[bid_type]
+                }
+                for bid_type in models
             }
+        else:
+            import pandas as pd
             
-            best_score = float('inf')
-            best_model = None
-            
-            for name, model in models_to_try.items():
-                model.fit(X_train, y_train)
-                y_pred = model.predict(X_test)
-                mse = mean_squared_error(y_test, y_pred)
-                
-                if mse < best_score:
-                    best_score = mse
-                    best_model = model
-                    
-                print(f"{bid_type} - {name}: MSE = {mse:.2f}")
+            datasets = {
+                bid_type: (scalers[bid_type].transform(pd.DataFrame(reservoir.X, columns=self.feature_names)), reservoir.y)
+                for bid_type, reservoir in reservoirs.items()
+            }
+            models, metrics = self._select_models(datasets, scalers, n_jobs, cv_folds, time_budget)
+            for bid_type in metrics:
+                metrics[bid_type]['rows'] = counts[bid_type]
+                metrics[bid_type]['sample_rows'] = int(len(reservoirs[bid_type].y))
+        
+        for bid_type in metrics:
+            metrics[bid_type].update(streaming=True, method=method, chunksize=chunksize)
+        return models, scalers, metrics
+
+    def _select_models(self, datasets, scalers, n_jobs, cv_folds, time_budget):
+        """Run the candidate search and keep the best model per bid type.
+        
+        Bid types where nothing finished within the budget lose their scaler.
+        """
+        from model_search import search_models
+        
+        models, metrics = {}, {}
+        results, budget_exhausted = search_models(datasets, n_jobs, cv_folds, time_budget)
+        
+        for bid_type, candidates in results.items():
+            for result in candidates:
+                print(f"{bid_type} - {result['name']}: CV MSE = {result['cv_mse']:.2f}")
             
-            self.models[bid_type] = best_model
-            self.scalers[bid_type] = scaler
+            if not candidates:
+                print(f"No candidate finished within the time budget for {bid_type}")
+                del scalers[bid_type]
+                continue
             
-            # Save model and scaler
-            model_dir = os.path.dirname(os.path.abspath(__file__))
-            joblib.dump(best_model, os.path.join(model_dir, f'risk_model_{bid_type.lower()}.pkl'))
-            joblib.dump(scaler, os.path.join(model_dir, f'scaler_{bid_type.lower()}.pkl'))
+            best = min(candidates, key=lambda result: result['cv_mse'])
+            models[bid_type] = best['model']
+            metrics[bid_type] = {
+                'selected_model': best['name'],
+                'mse': best['cv_mse'],
+                'candidate_mse': {result['name']: result['cv_mse'] for result in candidates},
+                'candidate_fit_seconds': {result['name']: result['fit_seconds'] for result in candidates},
+                'cv_folds': best['folds'],
+                'rows': int(len(datasets[bid_type][1])),
+                'budget_exhausted': budget_exhausted
+            }
+        
+        return models, metrics
+
+    def save_models(self, models, scalers, metrics=None, dataset_hash=None, promote=True):
+        """Register the models as a new registry version, promoted to production unless promote is False.
+        
+        Bid types without a new model keep the production version's, or before
+        any promotion the loaded bundle's (the loose model files). Returns the new version.
+        """
+        base_version = self.registry.production_version()
+        if base_version is None:
+            bundle = self.bundle
+            carried = [bid_type for bid_type in BID_TYPES if bid_type not in models
+                       and bundle.models[bid_type] is not None and bundle.scalers[bid_type] is not None]
+            models = {**{bid_type: bundle.models[bid_type] for bid_type in carried}, **models}
+            scalers = {**{bid_type: bundle.scalers[bid_type] for bid_type in carried}, **scalers}
+            metrics = {**{bid_type: bundle.metrics[bid_type] for bid_type in carried if bid_type in bundle.metrics},
+                       **(metrics or {})}
+        version = self.registry.register(models, scalers, self.feature_names, metrics, dataset_hash,
+                                         base_version=base_version)
+        if promote:
+            self.registry.promote(version)
+        return version
 
     def calculate_risk_labels(self, df, bid_type):
         """Calculate risk scores based on bid type specific factors"""
-        risk_scores = []
+        return calculate_risk_labels(df, bid_type)
+
+# Initialize ML model (empty until warm_up loads models and data)
+risk_ml = TrustChainRiskML()
+training_jobs = TrainingJobManager(risk_ml)
+
+# Off (and not wrapping anything) until enabled through /admin/profile. _score_matrix is the
+# scoring step of every path: single and batch assessments, coalesced requests and rankings
+profiler = RequestProfiler(risk_ml, ('get_bidder_risk_assessment', '_score_matrix', 'rank_bids', 'train_models',
+                                     'update_models'))
+training_jobs.profiler = profiler
+
+# Loads the dataset and then patches in changed rows when ML_WATCH_DATASET is set
+dataset_watcher = DatasetWatcher(risk_ml, DATASET_PATH, WATCH_INTERVAL_SECONDS)
+if RISK_INDEX_PRECOMPUTE:
+    dataset_watcher.after_install = risk_ml.refresh_risk_index
+    training_jobs.after_install = risk_ml.refresh_risk_index
+
+# Scores sampled /assess_risk traffic with a candidate registry version, started through /admin/models/shadow
+shadow = ShadowScorer(risk_ml, SHADOW_QUEUE_SIZE)
+
+# Periodic full retrain on the dataset, when ML_FULL_RETRAIN_HOURS is set
+retrain_scheduler = RetrainScheduler(training_jobs, DATASET_PATH, FULL_RETRAIN_HOURS * 3600,
+                                     lambda: training_options({}))
+
+def _last_training_timings():
+    job = training_jobs.get(training_jobs.last_finished) if training_jobs.last_finished else None
+    return {(phase,): seconds for phase, seconds in job['timings'].items()} if job else {}
+
+def _bundle_metric(key):
+    return lambda: {(bid_type,): values[key] for bid_type, values in risk_ml.bundle.metrics.items()
+                    if values.get(key) is not None}
+
+# Read at scrape time, so they cost nothing per request
+metrics.counter('ml_training_jobs_total', 'Finished training jobs by outcome', ('status',)).set_callback(
+    lambda: {(status,): count for status, count in training_jobs.finished.items()})
+metrics.gauge('ml_training_last_duration_seconds', 'Phase timings of the last finished training job',
+              ('phase',)).set_callback(_last_training_timings)
+metrics.gauge('ml_model_mse', 'Cross-validated MSE of the served model per bid type',
+              ('bid_type',)).set_callback(_bundle_metric('mse'))
+metrics.gauge('ml_model_training_rows', 'Rows the served model was trained on per bid type',
+              ('bid_type',)).set_callback(_bundle_metric('rows'))
+metrics.gauge('ml_model_loaded', 'Whether a model is loaded per bid type', ('bid_type',)).set_callback(
+    lambda: {(bid_type,): int(model is not None) for bid_type, model in risk_ml.models.items()})
+metrics.gauge('ml_model_version', 'Version of the served model bundle').set_callback(
+    lambda: {(): risk_ml.model_version})
+metrics.gauge('ml_data_version', 'Version of the served bidder data').set_callback(
+    lambda: {(): risk_ml.data_version})
+metrics.gauge('ml_dataset_rows', 'Bidder rows in the served dataset').set_callback(
+    lambda: {(): len(risk_ml.bidder_index)} if risk_ml.bidder_index is not None else {})
+metrics.gauge('ml_dataset_load_seconds', 'Duration of the last dataset load in this process').set_callback(
+    lambda: {(): risk_ml.data_load_seconds} if risk_ml.data_load_seconds is not None else {})
+metrics.counter('ml_assessment_cache_events_total', 'Assessment cache lookups and removals by event',
+                ('event',)).set_callback(
+    lambda: {(event,): count for event, count in risk_ml.assessment_cache.stats().items()
+             if event in ('hits', 'misses', 'evictions', 'expirations', 'invalidations')})
+metrics.counter('ml_dataset_reloads_total', 'Dataset reloads by the file watcher, full parses or row deltas',
+                ('kind',)).set_callback(lambda: {(kind,): count for kind, count in dataset_watcher.reloads.items()})
+metrics.gauge('ml_dataset_reload_changed_rows', 'Rows parsed by the last dataset reload').set_callback(
+    lambda: {(): dataset_watcher.last_reload['changed_rows']} if dataset_watcher.last_reload else {})
+metrics.gauge('ml_risk_index_build_seconds', 'Duration of the last risk percentile index refresh').set_callback(
+    lambda: {(): risk_ml.risk_index_seconds} if risk_ml.risk_index_seconds is not None else {})
+metrics.counter('ml_ranking_cache_events_total', 'Ranking cache lookups and removals by event',
+                ('event',)).set_callback(
+    lambda: {(event,): count for event, count in risk_ml.ranking_cache.stats().items()
+             if event in ('hits', 'misses', 'evictions', 'expirations', 'invalidations')})
+metrics.counter('ml_explanation_cache_events_total', 'Feature attribution cache lookups and removals by event',
+                ('event',)).set_callback(
+    lambda: {(event,): count for event, count in risk_ml.explanation_cache.stats().items()
+             if event in ('hits', 'misses', 'evictions', 'expirations', 'invalidations')})
+metrics.counter('ml_shadow_compared_total', 'Live assessments scored by the shadow candidate, by bid type',
+                ('bid_type',)).set_callback(
+    lambda: {(bid_type,): totals['compared'] for bid_type, totals in shadow.stats()['by_bid_type'].items()})
+metrics.gauge('ml_shadow_mean_abs_diff', 'Mean absolute risk score difference between the shadow candidate and served models',
+              ('bid_type',)).set_callback(
+    lambda: {(bid_type,): totals['mean_abs_diff'] for bid_type, totals in shadow.stats()['by_bid_type'].items()})
+metrics.counter('ml_shadow_dropped_total', 'Sampled assessments dropped because the shadow queue was full').set_callback(
+    lambda: {(): shadow.dropped})
+metrics.counter('ml_coalesced_batches_total', 'Micro-batches scored by the request coalescer').set_callback(
+    lambda: {(): risk_ml.coalescer.batches} if risk_ml.coalescer is not None else {})
+metrics.counter('ml_coalesced_requests_total', 'Requests scored through the request coalescer').set_callback(
+    lambda: {(): risk_ml.coalescer.items} if risk_ml.coalescer is not None else {})
+
+# Background start-up progress, reported by /ready
+startup = {'status': 'pending', 'error': None, 'training_job': None, 'timings': {}}
+
+api = Blueprint('ml', __name__)
+
+def training_options(data):
+    """Training job options from a request body, defaulting to the ML_TRAIN_* settings.
+    
+    Search settings: n_jobs, cv_folds, time_budget (seconds). With
+    streaming=true also method ('reservoir' or 'sgd'), chunksize,
+    sample_size and epochs. promote=false registers the models as a
+    candidate version without serving them.
+    """
+    options = {
+        'n_jobs': data.get('n_jobs', TRAIN_N_JOBS),
+        'cv_folds': data.get('cv_folds', TRAIN_CV_FOLDS),
+        'time_budget': data.get('time_budget', TRAIN_TIME_BUDGET)
+    }
+    if data.get('streaming', TRAIN_STREAMING):
+        options.update(
+            streaming=True,
+            method=data.get('method', TRAIN_STREAMING_METHOD),
+            chunksize=int(data.get('chunksize', TRAIN_CHUNKSIZE)),
+            sample_size=int(data.get('sample_size', TRAIN_SAMPLE_SIZE)),
+            epochs=int(data.get('epochs', TRAIN_EPOCHS))
+        )
+    if 'promote' in data:
+        options['promote'] = bool(data['promote'])
+    return options
+
+def warm_up(train_if_missing=False, background_tasks=True):
+    """Load models and the dataset, then score once so the first request is fast.
+    
+    background_tasks also starts the dataset watcher and scheduled retrain (see start_background_tasks).
+    """
+    timings = startup['timings']
+    start = time.perf_counter()
+    startup['status'] = 'loading'
+    
+    try:
+        risk_ml.load_models()
+        timings['load_models_seconds'] = time.perf_counter() - start
         
-        for _, row in df.iterrows():
-            base_risk = 0
-            
-            # Common risk factors
-            base_risk += row['abandoned_projects'] * 25
-            base_risk += min(30, row['average_delay_days'] * 0.5)
-            base_risk += min(25, row['budget_overruns_percent'] * 0.3)
-            base_risk += row['payment_disputes'] * 8
-            base_risk -= row['reputation_score'] * 1.5
-            
-            # Bid-type specific adjustments
-            if bid_type == 'MinRate':
-                # Higher penalty for delivery issues
-                base_risk += (10 - row['quality_score']) * 3
-                if row['completion_rate'] < 0.8:
-                    base_risk += 20
-            
-            risk_scores.append(max(0, min(100, base_risk)))
+        if WATCH_DATASET:
+            dataset_watcher.check(force=True)
+        else:
+            risk_ml.load_historical_data(DATASET_PATH)
+        timings['load_data_seconds'] = time.perf_counter() - start - timings['load_models_seconds']
+        
+        # Train models if they don't exist
+        if train_if_missing and all(v is None for v in risk_ml.models.values()):
+            print("Training models...")
+            startup['status'] = 'training'
+            job = training_jobs.submit(DATASET_PATH, **training_options({}))
+            startup['training_job'] = job['job_id']
+            job = training_jobs.wait(job['job_id'])
+            timings['training_seconds'] = job['timings'].get('total_seconds')
+        
+        first_prediction = time.perf_counter()
+        for bid_type in BID_TYPES:
+            risk_ml.predict_risk({}, bid_type, 1.0, 1.0)
+        timings['first_prediction_seconds'] = time.perf_counter() - first_prediction
+        
+        if RISK_INDEX_PRECOMPUTE:
+            risk_ml.refresh_risk_index()
+            timings['risk_index_seconds'] = risk_ml.risk_index_seconds
+        
+        if background_tasks:
+            start_background_tasks()
         
-        return risk_scores
+        startup['status'] = 'ready'
+    except Exception as e:
+        print(f"Error during start-up: {e}")
+        startup['status'] = 'failed'
+        startup['error'] = str(e)
+    
+    timings['total_seconds'] = time.perf_counter() - start
 
-# Initialize Flask app
-app = Flask(__name__)
-CORS(app)
+def start_background_tasks():
+    """Start the dataset watcher and the scheduled full retrain, where configured.
+    
+    They run in one process only: this one, or under gunicorn.conf.py a
+    single worker, whose reloads and promotions reach the other workers
+    through the feature store and model registry.
+    """
+    if WATCH_DATASET:
+        dataset_watcher.start()
+    if FULL_RETRAIN_HOURS > 0:
+        retrain_scheduler.start()
 
-# Initialize ML model
-risk_ml = TrustChainRiskML()
+def create_app(load=True, background=True, train_if_missing=False, feature_store_dir=None, background_tasks=True):
+    """Build the Flask app.
+    
+    Models and the dataset are loaded by warm_up, on a background thread by
+    default so the server binds straight away; /ready reports when it is done.
+    With feature_store_dir the dataset is published to a shared FeatureStore.
+    background_tasks=False leaves start_background_tasks to the caller.
+    """
+    app = Flask(__name__)
+    CORS(app)
+    app.register_blueprint(api)
+    
+    if feature_store_dir:
+        risk_ml.feature_store = FeatureStore(feature_store_dir)
+        # Training jobs are shared by every process serving from the store
+        training_jobs.state_dir = os.path.join(feature_store_dir, 'training_jobs')
+    
+    if COALESCE and risk_ml.coalescer is None:
+        risk_ml.coalescer = RequestCoalescer(risk_ml.predict_risk_batch, COALESCE_WINDOW_MS / 1000, COALESCE_MAX_BATCH)
+    
+    if load and background:
+        threading.Thread(target=warm_up, args=(train_if_missing, background_tasks), name='ml-warm-up', daemon=True).start()
+    elif load:
+        warm_up(train_if_missing, background_tasks)
+    
+    return app
+
+def create_production_app():
+    """App for gunicorn with preload_app (see gunicorn.conf.py).
+    
+    Loads synchronously in the master before workers fork, so the models
+    are shared copy-on-write and the feature matrix is one mapped segment.
+    Workers leave metric snapshots in METRICS_DIR for /metrics to sum.
+    No threads are started here, since they would not survive the fork:
+    the post_fork hook starts the background tasks in one worker.
+    """
+    metrics.use_snapshot_dir(METRICS_DIR, clear=True)
+    return create_app(background=False, feature_store_dir=FEATURE_STORE_DIR, background_tasks=False)
+
+@api.before_request
+def refresh_shared_state():
+    risk_ml.refresh_shared_state()
 
-@app.route('/health', methods=['GET'])
+@api.before_app_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@api.after_app_request
+def record_request_metrics(response):
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    HTTP_REQUESTS.inc((endpoint, request.method, str(response.status_code)))
+    if 'request_start' in g:
+        HTTP_LATENCY.observe(time.perf_counter() - g.request_start, (endpoint,))
+    metrics.maybe_snapshot()
+    return response
+
+@api.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus metrics in the text exposition format"""
+    response = make_response(metrics.render())
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    return response
+
+@api.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'OK',
         'service': 'TrustChain ML Service',
         'models_loaded': {k: v is not None for k, v in risk_ml.models.items()},
+        'model_version': risk_ml.model_version,
+        'model_registry_version': risk_ml.bundle.registry_version,
+        'data_version': risk_ml.data_version,
+        'cache': risk_ml.assessment_cache.stats(),
+        'ranking_cache': risk_ml.ranking_cache.stats(),
+        'explanation_cache': risk_ml.explanation_cache.stats(),
+        'dataset_watcher': dataset_watcher.stats() if WATCH_DATASET else None,
+        'retrain_schedule': retrain_scheduler.stats() if FULL_RETRAIN_HOURS > 0 else None,
+        'coalescer': risk_ml.coalescer.stats() if risk_ml.coalescer is not None else None,
+        'shadow': shadow.stats() if shadow.active else None,
+        'startup': startup['status'],
         'timestamp': datetime.now().isoformat()
     })
 
-@app.route('/assess_risk', methods=['POST'])
+@api.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe: 200 once models and data are loaded, 503 until then"""
+    ready = startup['status'] == 'ready'
+    return jsonify({
+        'ready': ready,
+        'status': startup['status'],
+        'models_loaded': {k: v is not None for k, v in risk_ml.models.items()},
+        'training_job': startup['training_job'],
+        'error': startup['error'],
+        'timings': startup['timings']
+    }), 200 if ready else 503
+
+def _explain_requested(data):
+    """Whether a scoring request asked for feature attributions ("explain": true or ?explain=true)"""
+    explain = data.get('explain', request.args.get('explain', 'false'))
+    return explain is True or str(explain).lower() in ('true', '1')
+
+@api.route('/assess_risk', methods=['POST'])
 def assess_risk():
-    """Assess risk for a bidder"""
+    """Assess risk for a bidder; with explain, includes per-feature contributions to the score"""
     try:
         data = request.json
         
@@ -261,81 +1377,503 @@ def assess_risk():
         
         if not bidder_address or not bid_type:
             return jsonify({'error': 'Missing required fields: bidder_address, bid_type'}), 400
+        if bid_type not in BID_TYPES:
+            return jsonify({'error': f"Unknown bid type {bid_type}; expected one of {', '.join(BID_TYPES)}"}), 400
+        
+        try:
+            bid_amount = None if bid_amount is None else float(bid_amount)
+            project_budget = None if project_budget is None else float(project_budget)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'bid_amount and project_budget must be numeric'}), 400
         
         # Load historical data if not loaded
-        if risk_ml.historical_data is None:
-            csv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dataset.csv')
-            risk_ml.load_historical_data(csv_path)
+        if risk_ml.bidder_index is None:
+            risk_ml.load_historical_data(DATASET_PATH)
         
         # Get risk assessment
         result = risk_ml.get_bidder_risk_assessment(
-            bidder_address, bid_type, bid_amount, project_budget
+            bidder_address, bid_type, bid_amount, project_budget, explain=_explain_requested(data)
         )
+        shadow.offer(result, bid_amount, project_budget)
         
         return jsonify(result)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/train_models', methods=['POST'])
+@api.route('/assess_risk_batch', methods=['POST'])
+def assess_risk_batch():
+    """Assess risk for many bidders in one request"""
+    try:
+        data = request.json
+        
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        bids = data.get('bids') if isinstance(data, dict) else data
+        
+        if not isinstance(bids, list):
+            return jsonify({'error': 'Expected a list of bids'}), 400
+        
+        # Load historical data if not loaded
+        if risk_ml.bidder_index is None:
+            risk_ml.load_historical_data(DATASET_PATH)
+        
+        results = risk_ml.predict_risk_batch(
+            [bid if isinstance(bid, dict) else {} for bid in bids],
+            explain=_explain_requested(data if isinstance(data, dict) else {})
+        )
+        
+        return jsonify({
+            'total_assessed': len(results),
+            'results': results
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/rank_bids', methods=['POST'])
+def rank_bids():
+    """Score and rank every bid on one tender.
+    
+    Body: {"project_budget": 100000, "bids": [{"bidder_address": ..., "bid_type": ...,
+    "bid_amount": ...}, ...], "sort": "risk_adjusted_amount", "top_k": 3}
+    """
+    try:
+        data = request.get_json(silent=True)
+        
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        bids = data.get('bids')
+        if not isinstance(bids, list) or not all(isinstance(bid, dict) for bid in bids):
+            return jsonify({'error': 'Expected a list of bids'}), 400
+        
+        try:
+            project_budget = float(data.get('project_budget'))
+            top_k = int(data['top_k']) if data.get('top_k') is not None else None
+        except (TypeError, ValueError):
+            return jsonify({'error': 'project_budget must be numeric and top_k an integer'}), 400
+        
+        if not project_budget > 0 or (top_k is not None and top_k < 0):
+            return jsonify({'error': 'project_budget must be positive and top_k non-negative'}), 400
+        
+        # Load historical data if not loaded
+        if risk_ml.bidder_index is None:
+            risk_ml.load_historical_data(DATASET_PATH)
+        
+        result = risk_ml.rank_bids(project_budget, bids, data.get('sort', 'risk_adjusted_amount'), top_k)
+        if 'error' in result:
+            return jsonify(result), 400
+        
+        if data.get('project_id') is not None:
+            result['project_id'] = data['project_id']
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/train_models', methods=['POST'])
 def train_models():
-    """Train ML models with historical data"""
+    """Start a background training job with historical data"""
     try:
-        csv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dataset.csv')
-        historical_data = risk_ml.load_historical_data(csv_path)
+        data = request.get_json(silent=True) or {}
+        job = training_jobs.submit(DATASET_PATH, **training_options(data))
         
-        if historical_data is None:
-            return jsonify({'error': 'Failed to load historical data'}), 500
+        return jsonify({
+            'message': 'Model training started',
+            'job_id': job['job_id'],
+            'status': job['status'],
+            'status_url': f"/train_models/{job['job_id']}"
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/update_models', methods=['POST'])
+def update_models():
+    """Update the served models with new outcome rows, without a full retrain.
+    
+    Body: {"rows": [{dataset columns incl. bid_type}, ...]}, optional "promote"
+    (default true), "trees" (trees or boosting stages added) and "max_trees".
+    The rows should also reach the dataset, so the next full retrain has them.
+    """
+    try:
+        import pandas as pd
+        
+        data = request.get_json(silent=True) or {}
+        rows = data.get('rows')
+        if not isinstance(rows, list) or not rows or not all(isinstance(row, dict) for row in rows):
+            return jsonify({'error': 'Expected a non-empty list of rows'}), 400
+        
+        new_data = pd.DataFrame.from_records(rows)
+        missing = [column for column in ['bid_type', *risk_ml.feature_names] if column not in new_data]
+        if missing:
+            return jsonify({'error': f"Rows are missing columns: {', '.join(missing)}"}), 400
+        
+        promote = bool(data.get('promote', True))
+        version, updated = risk_ml.update_models(
+            new_data,
+            promote=promote,
+            trees=int(data.get('trees', INCREMENTAL_TREES)),
+            max_trees=int(data.get('max_trees', INCREMENTAL_MAX_TREES))
+        )
+        if version is None:
+            return jsonify({'error': f'No bid type with a served model has {INCREMENTAL_MIN_ROWS} or more new rows'}), 400
         
-        risk_ml.train_models(historical_data)
+        if promote and RISK_INDEX_PRECOMPUTE:
+            # Rescoring the population is proportional to the dataset, so keep it off the response
+            threading.Thread(target=risk_ml.refresh_risk_index, name='ml-risk-index', daemon=True).start()
         
         return jsonify({
-            'message': 'Models trained successfully',
-            'models_loaded': {k: v is not None for k, v in risk_ml.models.items()}
+            'message': 'Models updated',
+            'registry_version': version,
+            'model_version': risk_ml.model_version,
+            'metrics': updated
         })
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/get_bidder_stats', methods=['GET'])
+@api.route('/train_models/<job_id>', methods=['GET'])
+def training_job_status(job_id):
+    """Status, timings and metrics of a training job"""
+    job = training_jobs.get(job_id)
+    
+    if job is None:
+        return jsonify({'error': f'Training job {job_id} not found'}), 404
+    
+    return jsonify(job)
+
+@api.route('/get_bidder_stats', methods=['GET'])
 def get_bidder_stats():
-    """Get statistics for all bidders"""
+    """Get a page of bidder statistics.
+    
+    Query parameters: limit, offset or cursor, fields (comma separated),
+    sort (a field, prefix with '-' for descending) and min_<field>/max_<field>
+    filters, e.g. ?min_reputation_score=7&sort=-completion_rate&limit=50
+    """
     try:
-        if risk_ml.historical_data is None:
-            csv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dataset.csv')
-            risk_ml.load_historical_data(csv_path)
+        if risk_ml.bidder_index is None:
+            risk_ml.load_historical_data(DATASET_PATH)
         
-        if risk_ml.historical_data is None:
+        if risk_ml.bidder_index is None:
             return jsonify({'error': 'Failed to load historical data'}), 500
         
-        # Get basic stats for all bidders
-        stats = []
-        for _, row in risk_ml.historical_data.iterrows():
-            stats.append({
-                'bidder_address': row['bidder_address'],
-                'total_projects': int(row['total_projects']),
-                'completion_rate': float(row['completion_rate']),
-                'reputation_score': float(row['reputation_score']),
-                'quality_score': float(row['quality_score'])
-            })
+        # Unchanged data + identical query -> same page, answer 304 before doing any work
+        etag = hashlib.sha1(
+            repr((risk_ml.data_version, sorted(request.args.items(multi=True)))).encode()
+        ).hexdigest()
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
         
-        return jsonify({
-            'total_bidders': len(stats),
-            'bidders': stats
-        })
+        try:
+            limit = min(int(request.args.get('limit', STATS_DEFAULT_LIMIT)), STATS_MAX_LIMIT)
+            if 'cursor' in request.args:
+                offset = _decode_stats_cursor(request.args['cursor'])
+            else:
+                offset = int(request.args.get('offset', 0))
+            
+            fields = request.args.get('fields')
+            fields = fields.split(',') if fields else STATS_DEFAULT_FIELDS
+            
+            sort = request.args.get('sort')
+            descending = bool(sort) and sort.startswith('-')
+            sort = sort.lstrip('-') if sort else None
+            
+            filters = []
+            for key, value in request.args.items():
+                if key.startswith(('min_', 'max_')):
+                    filters.append((key[4:], key[:3], float(value)))
+        except ValueError as e:
+            return jsonify({'error': f'Invalid query parameter: {e}'}), 400
+        
+        if limit < 1 or offset < 0:
+            return jsonify({'error': 'limit must be positive and offset non-negative'}), 400
+        
+        result = risk_ml.get_bidder_stats(fields, sort, descending, filters, offset, limit)
+        if 'error' in result:
+            return jsonify(result), 400
+        
+        next_offset = result.pop('next_offset')
+        result['next_cursor'] = _encode_stats_cursor(next_offset) if next_offset is not None else None
+        
+        response = jsonify(result)
+        response.set_etag(etag)
+        return response
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-if __name__ == '__main__':
-    # Load historical data on startup
-    csv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dataset.csv')
-    risk_ml.load_historical_data(csv_path)
+@api.route('/risk_percentile', methods=['GET'])
+def risk_percentile():
+    """A bidder's baseline risk relative to all bidders: ?bidder_address=...&bid_type=MinRate"""
+    try:
+        bidder_address = request.args.get('bidder_address')
+        bid_type = request.args.get('bid_type')
+        if not bidder_address or not bid_type:
+            return jsonify({'error': 'Missing required parameters: bidder_address, bid_type'}), 400
+        
+        if risk_ml.bidder_index is None:
+            risk_ml.load_historical_data(DATASET_PATH)
+        
+        result = risk_ml.risk_percentile(bidder_address, bid_type)
+        if 'error' in result:
+            return jsonify(result), 404 if 'not found' in result['error'] else 400
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/risk_rankings', methods=['GET'])
+def risk_rankings():
+    """Riskiest or safest bidders for a bid type.
     
-    # Train models if they don't exist
-    if all(v is None for v in risk_ml.models.values()):
-        print("Training models...")
-        risk_ml.train_models(risk_ml.historical_data)
+    Query parameters: bid_type, order (riskiest or safest), limit, offset
+    and percent to stop after the top percent, e.g. ?bid_type=MinRate&percent=5
+    """
+    try:
+        bid_type = request.args.get('bid_type')
+        if not bid_type:
+            return jsonify({'error': 'Missing required parameter: bid_type'}), 400
+        
+        order = request.args.get('order', 'riskiest')
+        if order not in ('riskiest', 'safest'):
+            return jsonify({'error': 'order must be riskiest or safest'}), 400
+        
+        try:
+            limit = min(int(request.args.get('limit', STATS_DEFAULT_LIMIT)), STATS_MAX_LIMIT)
+            offset = int(request.args.get('offset', 0))
+            percent = float(request.args['percent']) if 'percent' in request.args else None
+        except ValueError as e:
+            return jsonify({'error': f'Invalid query parameter: {e}'}), 400
+        
+        if limit < 1 or offset < 0 or (percent is not None and not 0 <= percent <= 100):
+            return jsonify({'error': 'limit must be positive, offset non-negative and percent within 0-100'}), 400
+        
+        if risk_ml.bidder_index is None:
+            risk_ml.load_historical_data(DATASET_PATH)
+        
+        result = risk_ml.risk_extremes(bid_type, limit, order == 'riskiest', offset, percent)
+        if 'error' in result:
+            return jsonify(result), 400
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/risk_histogram', methods=['GET'])
+def risk_histogram():
+    """Distribution of baseline risk scores for a bid type: ?bid_type=MinRate&bins=10"""
+    try:
+        bid_type = request.args.get('bid_type')
+        if not bid_type:
+            return jsonify({'error': 'Missing required parameter: bid_type'}), 400
+        
+        try:
+            bins = int(request.args.get('bins', 10))
+        except ValueError as e:
+            return jsonify({'error': f'Invalid query parameter: {e}'}), 400
+        
+        if not 1 <= bins <= RISK_HISTOGRAM_MAX_BINS:
+            return jsonify({'error': f'bins must be between 1 and {RISK_HISTOGRAM_MAX_BINS}'}), 400
+        
+        if risk_ml.bidder_index is None:
+            risk_ml.load_historical_data(DATASET_PATH)
+        
+        result = risk_ml.risk_histogram(bid_type, bins)
+        if 'error' in result:
+            return jsonify(result), 400
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _admin_denied():
+    """Error response unless admin access is configured and the request carries the token"""
+    if not ADMIN_TOKEN:
+        return jsonify({'error': 'Admin endpoints are disabled (set ML_ADMIN_TOKEN)'}), 404
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN):
+        return jsonify({'error': 'Invalid admin token'}), 403
+    return None
+
+@api.route('/admin/profile', methods=['GET', 'POST', 'DELETE'])
+def admin_profile():
+    """Control request profiling.
+    
+    POST {"mode": "cprofile"|"sampling", "requests": N, "sample_rate": 0.1,
+    "methods": [...], "interval_ms": 1} starts profiling; GET returns its
+    status; DELETE stops it (?reset=true also drops the results).
+    """
+    denied = _admin_denied()
+    if denied:
+        return denied
+    
+    try:
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            requests = data.get('requests')
+            profiler.enable(
+                mode=data.get('mode', 'cprofile'),
+                requests=int(requests) if requests is not None else None,
+                sample_rate=float(data.get('sample_rate', 1.0)),
+                methods=data.get('methods'),
+                interval_ms=float(data.get('interval_ms', 1.0))
+            )
+        elif request.method == 'DELETE':
+            profiler.disable()
+            if request.args.get('reset') == 'true':
+                profiler.reset()
+        
+        return jsonify(profiler.status())
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/admin/profile/download', methods=['GET'])
+def admin_profile_download():
+    """Profiling results: ?format=pstats (binary, for pstats/snakeviz), text or collapsed (flamegraph stacks)"""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    
+    output_format = request.args.get('format', 'pstats')
+    if output_format == 'pstats':
+        body, content_type, filename = profiler.pstats_bytes(), 'application/octet-stream', 'ml_service.pstats'
+    elif output_format == 'text':
+        body, content_type, filename = profiler.pstats_text(), 'text/plain; charset=utf-8', None
+    elif output_format == 'collapsed':
+        body, content_type, filename = profiler.collapsed_stacks() or None, 'text/plain; charset=utf-8', 'ml_service.collapsed'
+    else:
+        return jsonify({'error': f'Unknown format {output_format}; expected pstats, text or collapsed'}), 400
+    
+    if body is None:
+        return jsonify({'error': 'No profiling data collected in this mode yet'}), 404
+    
+    response = make_response(body)
+    response.headers['Content-Type'] = content_type
+    if filename:
+        response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+def _models_overview():
+    return {
+        'production_version': risk_ml.registry.production_version(),
+        'serving_version': risk_ml.bundle.registry_version,
+        'versions': risk_ml.registry.versions(),
+        'promotions': risk_ml.registry.history(),
+        'shadow': shadow.stats()
+    }
+
+def _install_production_models():
+    """Serve the registry's production version, as after a training job"""
+    risk_ml.load_models()
+    if RISK_INDEX_PRECOMPUTE:
+        risk_ml.refresh_risk_index()
+
+@api.route('/admin/models', methods=['GET'])
+def admin_models():
+    """Registered model versions with their metrics and dataset hashes, promotions and shadow status"""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    
+    try:
+        return jsonify(_models_overview())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/admin/models/promote', methods=['POST'])
+def admin_models_promote():
+    """Promote a registered version ({"version": N}) to production and serve it"""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        if data.get('version') is None:
+            return jsonify({'error': 'Missing required field: version'}), 400
+        version = int(data['version'])
+        risk_ml.registry.promote(version)
+        if shadow.candidate_version == version:
+            shadow.stop()
+        _install_production_models()
+        return jsonify(_models_overview())
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/admin/models/rollback', methods=['POST'])
+def admin_models_rollback():
+    """Return production to the previously promoted version and serve it"""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    
+    try:
+        risk_ml.registry.rollback()
+        _install_production_models()
+        return jsonify(_models_overview())
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/admin/models/shadow', methods=['GET', 'POST', 'DELETE'])
+def admin_models_shadow():
+    """Control shadow scoring.
+    
+    POST {"version": N, "sample_rate": 0.1} scores that fraction of
+    /assess_risk traffic with registry version N on a background worker;
+    GET returns the disagreement and latency stats; DELETE stops it.
+    """
+    denied = _admin_denied()
+    if denied:
+        return denied
+    
+    try:
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            if data.get('version') is None:
+                return jsonify({'error': 'Missing required field: version'}), 400
+            shadow.start(risk_ml.load_registry_bundle(int(data['version'])), float(data.get('sample_rate', 0.1)))
+        elif request.method == 'DELETE':
+            shadow.stop()
+        
+        return jsonify(shadow.stats())
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _encode_stats_cursor(offset):
+    """Opaque pagination cursor tied to the current dataset version"""
+    return base64.urlsafe_b64encode(f'{risk_ml.data_version}:{offset}'.encode()).decode()
+
+def _decode_stats_cursor(cursor):
+    try:
+        data_version, offset = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+        data_version, offset = int(data_version), int(offset)
+    except Exception:
+        raise ValueError('malformed cursor')
+    if data_version != risk_ml.data_version:
+        raise ValueError('cursor is from an older dataset version, restart from offset 0')
+    return offset
+
+if __name__ == '__main__':
+    # The debug reloader re-runs this file in a child process; only that one serves requests
+    app = create_app(load=os.environ.get('WERKZEUG_RUN_MAIN') == 'true', train_if_missing=True)
     
     print("ML Service starting on port 5001...")
     app.run(debug=True, host='0.0.0.0', port=5001)
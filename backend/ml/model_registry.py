@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+HISTORY_FILE = 'promotions.json'
+
+
+def file_sha256(path, chunk_bytes=1 << 20):
+    """Hex SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_bytes), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def frame_sha256(frame):
+    """Hex SHA-256 of a DataFrame's contents (row hashes, so column dtypes and order count)"""
+    import pandas as pd
+
+    return hashlib.sha256(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes()).hexdigest()
+
+
+class ModelRegistry:
+    """Versioned model bundles on disk, one of which is promoted to production.
+
+    register() writes every bid type's model and scaler with a meta.json
+    (feature list, training metrics, dataset hash) into a new version
+    directory; versions are never modified afterwards. The promotion
+    history is a stack in promotions.json, replaced atomically: promote()
+    pushes a version, rollback() pops back to the one before, and the top
+    is the production version every serving process loads.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def register(self, models, scalers, feature_names, metrics=None, dataset_hash=None, base_version=None):
+        """Write a new version; bid types not given are carried over from base_version. Returns the version"""
+        import joblib
+
+        os.makedirs(self.root, exist_ok=True)
+        inherited = {}
+        if base_version is not None:
+            base_path = self._version_path(base_version)
+            for bid_type, base_from in self.meta(base_version)['bid_types'].items():
+                if bid_type not in models:
+                    inherited[bid_type] = base_from
+        version, path = self._claim_version()
+
+        for bid_type, model in models.items():
+            for prefix, obj in (('model', model), ('scaler', scalers[bid_type])):
+                joblib.dump(obj, os.path.join(path, f'{prefix}_{bid_type.lower()}.pkl'))
+        for bid_type in inherited:
+            for prefix in ('model', 'scaler'):
+                name = f'{prefix}_{bid_type.lower()}.pkl'
+                shutil.copyfile(os.path.join(base_path, name), os.path.join(path, name))
+
+        metrics = dict(metrics or {})
+        if base_version is not None:
+            base_metrics = self.meta(base_version)['metrics']
+            metrics.update({bid_type: base_metrics[bid_type] for bid_type in inherited if bid_type in base_metrics})
+        meta = {
+            'version': version,
+            # Version each bid type's model was trained in (itself, or inherited from an earlier one)
+            'bid_types': {**{bid_type: version for bid_type in models}, **inherited},
+            'feature_names': list(feature_names),
+            'metrics': metrics,
+            'dataset_hash': dataset_hash,
+            'created_at': datetime.now().isoformat()
+        }
+        self._write_json(os.path.join(path, 'meta.json'), meta)
+        return version
+
+    def load(self, version):
+        """(models, scalers, meta) of a version"""
+        import joblib
+
+        meta = self.meta(version)
+        path = self._version_path(version)
+        models, scalers = {}, {}
+        for bid_type in meta['bid_types']:
+            models[bid_type] = joblib.load(os.path.join(path, f'model_{bid_type.lower()}.pkl'))
+            scalers[bid_type] = joblib.load(os.path.join(path, f'scaler_{bid_type.lower()}.pkl'))
+        return models, scalers, meta
+
+    def meta(self, version):
+        try:
+            with open(os.path.join(self._version_path(version), 'meta.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"Model version {version} not found in the registry") from None
+
+    def versions(self):
+        """meta of every version, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        found = sorted(int(name[1:]) for name in os.listdir(self.root) if name.startswith('v') and name[1:].isdigit())
+        # A version whose meta.json isn't written yet is still being registered
+        return [self.meta(version) for version in found
+                if os.path.exists(os.path.join(self._version_path(version), 'meta.json'))]
+
+    def history(self):
+        """Promotions still in effect, oldest first; the last one is production"""
+        try:
+            with open(os.path.join(self.root, HISTORY_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def production_version(self):
+        history = self.history()
+        return history[-1]['version'] if history else None
+
+    def promote(self, version):
+        """Make a registered version production"""
+        self.meta(version)
+        history = self.history()
+        if history and history[-1]['version'] == version:
+            return version
+        history.append({'version': version, 'promoted_at': datetime.now().isoformat()})
+        self._write_json(os.path.join(self.root, HISTORY_FILE), history)
+        return version
+
+    def rollback(self):
+        """Return production to the previously promoted version; returns that version"""
+        history = self.history()
+        if len(history) < 2:
+            raise ValueError("No earlier promoted version to roll back to")
+        history.pop()
+        self._write_json(os.path.join(self.root, HISTORY_FILE), history)
+        return history[-1]['version']
+
+    def _version_path(self, version):
+        return os.path.join(self.root, f'v{version:06d}')
+
+    def _claim_version(self):
+        """Create the next version directory; mkdir is atomic, so concurrent writers get distinct versions"""
+        version = max((int(name[1:]) for name in os.listdir(self.root) if name.startswith('v') and name[1:].isdigit()),
+                      default=0) + 1
+        while True:
+            path = self._version_path(version)
+            try:
+                os.mkdir(path)
+                return version, path
+            except FileExistsError:
+                version += 1
+
+    def _write_json(self, path, data):
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
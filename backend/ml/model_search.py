@@ -0,0 +1,108 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.model_selection import KFold, cross_val_score
+
+# Cheapest first, so a tight time budget still yields a model per bid type
+CANDIDATE_NAMES = ['Linear', 'GradientBoosting', 'RandomForest']
+
+
+def make_candidate(name, forest_jobs=1):
+    """Fresh, unfitted candidate regressor"""
+    if name == 'RandomForest':
+        return RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=forest_jobs)
+    if name == 'GradientBoosting':
+        return GradientBoostingRegressor(n_estimators=100, random_state=42)
+    if name == 'Linear':
+        return LinearRegression()
+    raise ValueError(f"Unknown candidate model {name}")
+
+
+def evaluate_candidate(bid_type, name, X, y, cv_folds, forest_jobs=1):
+    """k-fold CV MSE for one candidate, then refit it on all rows"""
+    start = time.perf_counter()
+    folds = KFold(n_splits=max(2, min(cv_folds, len(y))), shuffle=True, random_state=42)
+
+    model = make_candidate(name, forest_jobs)
+    scores = -cross_val_score(model, X, y, cv=folds, scoring='neg_mean_squared_error')
+    model.fit(X, y)
+
+    return {
+        'bid_type': bid_type,
+        'name': name,
+        'model': model,
+        'cv_mse': float(scores.mean()),
+        'cv_mse_std': float(scores.std()),
+        'folds': folds.n_splits,
+        'fit_seconds': time.perf_counter() - start
+    }
+
+
+def search_models(datasets, n_jobs=None, cv_folds=5, time_budget=None):
+    """Evaluate every candidate for every bid type, in parallel.
+
+    datasets maps bid_type -> (X_scaled, y). Each (bid_type, candidate) pair
+    is one task on a process pool of n_jobs workers. With a time_budget
+    (seconds) the search stops at the deadline and keeps whatever finished;
+    candidates still fitting then are killed with their worker processes,
+    so nothing keeps using the cores after the search returns.
+
+    Returns (results, budget_exhausted) where results maps bid_type to the
+    list of finished candidate results.
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    tasks = [(bid_type, name) for name in CANDIDATE_NAMES for bid_type in datasets]
+    # Leftover cores go to the forests' own n_jobs
+    forest_jobs = max(1, n_jobs // max(1, len(tasks)))
+    deadline = time.monotonic() + time_budget if time_budget else None
+
+    results = {bid_type: [] for bid_type in datasets}
+    budget_exhausted = False
+    if not tasks:
+        # No bid type had enough rows to train on
+        return results, budget_exhausted
+
+    # In-process fits can't be stopped, so a budgeted search always uses the pool
+    if n_jobs == 1 and deadline is None:
+        for bid_type, name in tasks:
+            X, y = datasets[bid_type]
+            results[bid_type].append(evaluate_candidate(bid_type, name, X, y, cv_folds, forest_jobs))
+        return results, budget_exhausted
+
+    executor = ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks)))
+    try:
+        pending = {
+            executor.submit(evaluate_candidate, bid_type, name, *datasets[bid_type], cv_folds, forest_jobs)
+            for bid_type, name in tasks
+        }
+        while pending:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                results[result['bid_type']].append(result)
+            if pending and deadline is not None and time.monotonic() >= deadline:
+                budget_exhausted = True
+                break
+    finally:
+        if budget_exhausted:
+            _terminate_workers(executor)
+        executor.shutdown(wait=not budget_exhausted, cancel_futures=True)
+
+    return results, budget_exhausted
+
+
+def _terminate_workers(executor):
+    """Kill a ProcessPoolExecutor's workers, abandoning the candidates they are fitting"""
+    if hasattr(executor, 'terminate_workers'):
+        # Python 3.14+
+        executor.terminate_workers()
+        return
+    processes = list((executor._processes or {}).values())
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join(timeout=5)
@@ -0,0 +1,208 @@
+"""On-demand profiling of scoring and training, switched on through the admin API.
+
+While disabled nothing is wrapped: enable() installs profiling wrappers as
+instance attributes over the target methods and disable() deletes them,
+so the class methods are called directly again and the hot path pays
+nothing. Profiling stops by itself after the requested number of calls.
+
+Two modes:
+- 'cprofile': deterministic cProfile per call, aggregated into one pstats
+  dump (open with pstats or snakeviz).
+- 'sampling': a thread samples the stacks of threads inside a target every
+  interval and counts them as collapsed stacks ("a;b;c count"), the input
+  format of flamegraph.pl and speedscope.
+"""
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+PROFILE_MODES = ('cprofile', 'sampling')
+
+
+class _StatsSnapshot:
+    """Raw cProfile stats (e.g. from the training process) in the shape pstats.Stats loads"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class RequestProfiler:
+    """Profiles calls to selected methods of one object (the service's TrustChainRiskML)"""
+
+    def __init__(self, target, methods):
+        self.target = target
+        self.methods = tuple(methods)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._sampler = None
+        self._active_threads = {}
+        self.remaining = None
+        self.reset()
+        self.enabled = False
+        self.settings = {}
+
+    def reset(self):
+        """Drop everything collected so far"""
+        with self._lock:
+            self.stats = None
+            self.stacks = Counter()
+            self.profiled_calls = Counter()
+            self.samples = 0
+            self.started_at = None
+
+    def enable(self, mode='cprofile', requests=None, sample_rate=1.0, methods=None, interval_ms=1.0):
+        """Profile the next `requests` calls (None: until disabled), each with probability sample_rate"""
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profiling mode {mode}; expected one of {', '.join(PROFILE_MODES)}")
+        methods = tuple(methods or self.methods)
+        unknown = set(methods) - set(self.methods)
+        if unknown:
+            raise ValueError(f"Cannot profile {', '.join(sorted(unknown))}; expected some of {', '.join(self.methods)}")
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+
+        self.disable()
+        with self._lock:
+            self.settings = {'mode': mode, 'requests': requests, 'sample_rate': sample_rate,
+                             'methods': list(methods), 'interval_ms': interval_ms}
+            self.remaining = requests
+            self.started_at = self.started_at or datetime.now().isoformat()
+            self.enabled = True
+
+        for name in methods:
+            setattr(self.target, name, self._wrap(name, getattr(type(self.target), name)))
+        if mode == 'sampling':
+            self._sampler = threading.Thread(target=self._sample, args=(interval_ms / 1000,),
+                                             name='ml-profiler', daemon=True)
+            self._sampler.start()
+
+    def disable(self):
+        """Remove the wrappers; collected results are kept until reset()"""
+        with self._lock:
+            self.enabled = False
+        for name in self.methods:
+            self.target.__dict__.pop(name, None)
+        sampler, self._sampler = self._sampler, None
+        if sampler is not None and sampler is not threading.current_thread():
+            sampler.join()
+
+    def wants(self, name):
+        """Claim one profiled call for name, counting it against the request budget"""
+        with self._lock:
+            if not self.enabled or name not in self.settings['methods']:
+                return False
+            if self.settings['sample_rate'] < 1 and random.random() >= self.settings['sample_rate']:
+                return False
+            if self.remaining is not None:
+                if self.remaining <= 0:
+                    return False
+                self.remaining -= 1
+            self.profiled_calls[name] += 1
+            return True
+
+    def add_stats(self, name, raw_stats):
+        """Merge cProfile stats recorded elsewhere (the training job process)"""
+        with self._lock:
+            snapshot = _StatsSnapshot(raw_stats)
+            if self.stats is None:
+                self.stats = pstats.Stats(snapshot)
+            else:
+                self.stats.add(snapshot)
+
+    def status(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'settings': self.settings,
+                'remaining': self.remaining if self.enabled else None,
+                'started_at': self.started_at,
+                'profiled_calls': dict(self.profiled_calls),
+                'stack_samples': self.samples,
+                'has_pstats': self.stats is not None
+            }
+
+    def pstats_bytes(self):
+        """Aggregated cProfile results in the marshal format pstats.Stats(path) reads"""
+        with self._lock:
+            return marshal.dumps(self.stats.stats) if self.stats is not None else None
+
+    def pstats_text(self, limit=40):
+        with self._lock:
+            if self.stats is None:
+                return None
+            out = io.StringIO()
+            self.stats.stream = out
+            self.stats.sort_stats('cumulative').print_stats(limit)
+            return out.getvalue()
+
+    def collapsed_stacks(self):
+        with self._lock:
+            return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+    def stop_if_exhausted(self):
+        """Switch profiling off once the request budget is used up, restoring the unwrapped methods"""
+        if self.enabled and self.remaining is not None and self.remaining <= 0:
+            self.disable()
+
+    def _wrap(self, name, function):
+        profiler = self
+
+        def profiled(*args, **kwargs):
+            # Only the outermost profiled call on a thread records
+            if getattr(profiler._local, 'depth', 0) or not profiler.wants(name):
+                return function(profiler.target, *args, **kwargs)
+
+            profiler._local.depth = 1
+            try:
+                if profiler.settings['mode'] == 'cprofile':
+                    profile = cProfile.Profile()
+                    try:
+                        return profile.runcall(function, profiler.target, *args, **kwargs)
+                    finally:
+                        with profiler._lock:
+                            if profiler.stats is None:
+                                profiler.stats = pstats.Stats(profile)
+                            else:
+                                profiler.stats.add(profile)
+                else:
+                    thread_id = threading.get_ident()
+                    profiler._active_threads[thread_id] = name
+                    try:
+                        return function(profiler.target, *args, **kwargs)
+                    finally:
+                        profiler._active_threads.pop(thread_id, None)
+            finally:
+                profiler._local.depth = 0
+                profiler.stop_if_exhausted()
+
+        profiled.__wrapped__ = function
+        return profiled
+
+    def _sample(self, interval):
+        while self.enabled:
+            frames = sys._current_frames()
+            for thread_id, name in list(self._active_threads.items()):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                    frame = frame.f_back
+                with self._lock:
+                    self.stacks[';'.join(reversed(stack))] += 1
+                    self.samples += 1
+            del frames
+            time.sleep(interval)
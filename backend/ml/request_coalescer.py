@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+
+class RequestCoalescer:
+    """Gathers concurrent single requests into batches for one vectorized call.
+
+    Request threads submit() an item and block; a dispatcher thread collects
+    items until window_seconds have passed since the first one or max_batch
+    are waiting, calls score_batch(items) once and hands each caller its own
+    result. The dispatcher is started on first use, so a coalescer created
+    before gunicorn forks still gets a thread in every worker.
+    """
+
+    def __init__(self, score_batch, window_seconds=0.002, max_batch=64):
+        self.score_batch = score_batch
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self._pending = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    def submit(self, item, timeout=None):
+        """Queue item and wait for its result (exceptions from score_batch are re-raised)"""
+        future = Future()
+        with self._cond:
+            self._ensure_dispatcher()
+            self._pending.append((item, future))
+            self._cond.notify()
+        return future.result(timeout)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'window_ms': self.window_seconds * 1000,
+                'max_batch': self.max_batch,
+                'batches': self.batches,
+                'items': self.items,
+                'largest_batch': self.largest_batch,
+                'mean_batch': self.items / self.batches if self.batches else 0.0
+            }
+
+    def _ensure_dispatcher(self):
+        # Threads don't survive fork: a worker inherits _thread but not the thread
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='ml-coalescer', daemon=True)
+            self._thread.start()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = time.monotonic() + self.window_seconds
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+
+            self.batches += 1
+            self.items += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                results = self.score_batch([item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,117 @@
+import numpy as np
+
+
+class RiskPercentileIndex:
+    """Every bidder's baseline risk score per bid type, kept sorted for population queries.
+
+    Scores are the model's score without bid-specific adjustments (no bid
+    amount or budget). With the ascending order per bid type, a bidder's
+    percentile is a binary search, the k riskiest or safest bidders are a
+    slice, and a histogram is one binary search per bin edge.
+
+    Instances are immutable: refreshed() returns a new index for new data
+    or models, reusing the scores of bidders whose features did not change
+    under an unchanged model and merging the rescored rows into the
+    existing order.
+    """
+
+    def __init__(self, bidder_index, data_version, model_version, models, scores, orders):
+        self.bidder_index = bidder_index
+        self.data_version = data_version
+        self.model_version = model_version
+        self.models = models
+        self.scores = scores
+        self.orders = orders
+        self.sorted_scores = {bid_type: scores[bid_type][order] for bid_type, order in orders.items()}
+
+    @classmethod
+    def build(cls, bidder_index, data_version, model_version, models, score):
+        """Score every row; score(bid_type, rows) returns baseline scores for those rows"""
+        rows = np.arange(len(bidder_index))
+        scores = {bid_type: score(bid_type, rows) for bid_type in models}
+        orders = {bid_type: np.argsort(values, kind='stable') for bid_type, values in scores.items()}
+        return cls(bidder_index, data_version, model_version, models, scores, orders)
+
+    def refreshed(self, bidder_index, data_version, model_version, models, score):
+        """Index for new data and/or models, rescoring only what changed.
+
+        models maps bid type -> the (model, scaler) pair in use; a bid type
+        whose pair is not the same objects as before is rescored in full.
+        """
+        old_rows = self._matching_rows(bidder_index)
+        if old_rows is None:
+            return self.build(bidder_index, data_version, model_version, models, score)
+
+        # Rows whose bidder existed before with identical features
+        matched = old_rows >= 0
+        unchanged = matched.copy()
+        unchanged[matched] = (
+            np.all(bidder_index.features[matched] == self.bidder_index.features[old_rows[matched]], axis=1)
+            & (bidder_index.contract_values[matched] == self.bidder_index.contract_values[old_rows[matched]])
+        )
+        changed_rows = np.flatnonzero(~unchanged)
+
+        # Old row -> new row for the unchanged rows, -1 for the rest
+        new_of_old = np.full(len(self.bidder_index), -1, dtype=np.intp)
+        new_of_old[old_rows[unchanged]] = np.flatnonzero(unchanged)
+
+        scores, orders = {}, {}
+        for bid_type, pair in models.items():
+            previous = self.models.get(bid_type)
+            if previous is None or previous[0] is not pair[0] or previous[1] is not pair[1]:
+                scores[bid_type] = score(bid_type, np.arange(len(bidder_index)))
+                orders[bid_type] = np.argsort(scores[bid_type], kind='stable')
+                continue
+
+            values = np.empty(len(bidder_index), dtype=np.float64)
+            values[unchanged] = self.scores[bid_type][old_rows[unchanged]]
+            values[changed_rows] = score(bid_type, changed_rows)
+            scores[bid_type] = values
+
+            # Two sorted runs (kept rows in their old order, rescored rows sorted);
+            # the stable sort (timsort) merges them in linear time
+            kept = new_of_old[self.orders[bid_type]]
+            kept = kept[kept >= 0]
+            rescored = changed_rows[np.argsort(values[changed_rows], kind='stable')]
+            candidates = np.concatenate([kept, rescored])
+            orders[bid_type] = candidates[np.argsort(values[candidates], kind='stable')]
+
+        return RiskPercentileIndex(bidder_index, data_version, model_version, models, scores, orders)
+
+    def _matching_rows(self, bidder_index):
+        """Old row of each new row by address (-1 if new), or None when rows can't be matched"""
+        if bidder_index is self.bidder_index:
+            return np.arange(len(bidder_index))
+
+        import pandas as pd
+
+        old = pd.Index(self.bidder_index.column('bidder_address'))
+        new = pd.Index(bidder_index.column('bidder_address'))
+        if not (old.is_unique and new.is_unique) or old.dtype != new.dtype:
+            return None
+        return old.get_indexer(new)
+
+    def population(self, bid_type):
+        return len(self.sorted_scores[bid_type])
+
+    def percentile(self, bid_type, row):
+        """(score, percent of bidders scoring at or below it, rank from the riskiest)"""
+        score = self.scores[bid_type][row]
+        sorted_scores = self.sorted_scores[bid_type]
+        at_or_below = int(np.searchsorted(sorted_scores, score, side='right'))
+        return float(score), 100.0 * at_or_below / len(sorted_scores), len(sorted_scores) - at_or_below + 1
+
+    def extremes(self, bid_type, k, riskiest=True, offset=0):
+        """Rows of the k riskiest (or safest) bidders after skipping offset"""
+        order = self.orders[bid_type]
+        if riskiest:
+            stop = max(0, len(order) - offset)
+            return order[max(0, stop - k):stop][::-1]
+        return order[offset:offset + k]
+
+    def histogram(self, bid_type, edges):
+        """Bidder counts per [edge_i, edge_i+1) bin, the last bin closed"""
+        sorted_scores = self.sorted_scores[bid_type]
+        bounds = np.searchsorted(sorted_scores, edges, side='left')
+        bounds[-1] = np.searchsorted(sorted_scores, edges[-1], side='right')
+        return np.diff(bounds)
@@ -0,0 +1,177 @@
+import queue
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+
+class ShadowScorer:
+    """Scores a sample of live assessments with a candidate model bundle, off the request path.
+
+    offer() runs on the request thread after the response is built: it
+    samples, and puts the served assessment on a bounded queue without
+    blocking (a full queue drops the item and counts it). A worker thread
+    drains the queue in batches, scores them with the candidate through
+    the service's vectorized scoring, and records how far the candidate's
+    scores are from the served ones and how long it took.
+    """
+
+    def __init__(self, risk_ml, queue_size=10000, max_batch=256, latency_window=1000):
+        self.risk_ml = risk_ml
+        self.max_batch = max_batch
+        self.bundle = None
+        self.candidate_version = None
+        self.sample_rate = 0.0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._latency_window = latency_window
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = None
+            self.sampled = 0
+            self.dropped = 0
+            self.missing = 0
+            self.errors = 0
+            self.last_error = None
+            # Per bid type: [compared, sum |diff|, max |diff|, category changes, candidate higher]
+            self.by_bid_type = {}
+            self.batch_seconds = deque(maxlen=self._latency_window)
+            self.batch_rows = deque(maxlen=self._latency_window)
+            self.queue_delay_seconds = deque(maxlen=self._latency_window)
+
+    def start(self, bundle, sample_rate):
+        """Shadow-score a sample_rate fraction of offered assessments with bundle, from fresh stats"""
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+        self.reset()
+        self.started_at = datetime.now().isoformat()
+        self.sample_rate = sample_rate
+        self.candidate_version = getattr(bundle, 'registry_version', None)
+        self.bundle = bundle
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='ml-shadow-scoring', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop sampling; queued items are still scored and the stats kept"""
+        self.bundle = None
+
+    @property
+    def active(self):
+        return self.bundle is not None
+
+    def offer(self, assessment, bid_amount=None, project_budget=None):
+        """Queue a served assessment for shadow scoring, if sampled; never blocks"""
+        bundle = self.bundle
+        if bundle is None or 'error' in assessment or random.random() >= self.sample_rate:
+            return
+        self.sampled += 1
+        try:
+            self._queue.put_nowait((assessment['bidder_address'], assessment['bid_type'], bid_amount, project_budget,
+                                    assessment['risk_score'], bundle, time.perf_counter()))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._score(batch)
+            except Exception as e:
+                self.errors += len(batch)
+                self.last_error = str(e)
+                print(f"Error in shadow scoring: {e}")
+
+    def _score(self, batch):
+        """Score a batch with the candidate it was sampled for, grouped by bid type"""
+        bidder_index = self.risk_ml.bidder_index
+        groups = {}
+        for item in batch:
+            bidder_address, bid_type, bid_amount, project_budget, served_score, bundle, offered_at = item
+            row = bidder_index.lookup(bidder_address) if bidder_index is not None else None
+            if row is None:
+                self.missing += 1
+                continue
+            groups.setdefault((bid_type, bundle), []).append((row, bid_amount, project_budget, served_score, offered_at))
+
+        for (bid_type, bundle), items in groups.items():
+            rows, bid_amounts, project_budgets, served, offered_at = (np.array(column, dtype=np.float64)
+                                                                      for column in zip(*items))
+            rows = rows.astype(np.intp)
+            dequeued = time.perf_counter()
+            scores = self.risk_ml._score_matrix(
+                bidder_index.features[rows], bidder_index.contract_values[rows], bid_type,
+                bid_amounts, project_budgets, bundle=bundle
+            )
+            seconds = time.perf_counter() - dequeued
+            self._record(bid_type, served, scores, seconds, dequeued - offered_at)
+
+    def _record(self, bid_type, served, scores, seconds, queue_delays):
+        diff = scores - served
+        category_changes = np.count_nonzero(np.digitize(scores, (30, 70)) != np.digitize(served, (30, 70)))
+        with self._lock:
+            totals = self.by_bid_type.setdefault(bid_type, [0, 0.0, 0.0, 0, 0])
+            totals[0] += len(diff)
+            totals[1] += float(np.abs(diff).sum())
+            totals[2] = max(totals[2], float(np.abs(diff).max()))
+            totals[3] += int(category_changes)
+            totals[4] += int(np.count_nonzero(diff > 0))
+            self.batch_seconds.append(seconds)
+            self.batch_rows.append(len(diff))
+            self.queue_delay_seconds.extend(queue_delays.tolist())
+
+    def stats(self):
+        with self._lock:
+            by_bid_type = {
+                bid_type: {
+                    'compared': compared,
+                    'mean_abs_diff': total_abs / compared,
+                    'max_abs_diff': max_abs,
+                    'category_disagreement_rate': changes / compared,
+                    'candidate_higher_rate': higher / compared
+                }
+                for bid_type, (compared, total_abs, max_abs, changes, higher) in self.by_bid_type.items()
+            }
+            compared = sum(totals[0] for totals in self.by_bid_type.values())
+            total_abs = sum(totals[1] for totals in self.by_bid_type.values())
+            changes = sum(totals[3] for totals in self.by_bid_type.values())
+            batch_seconds = np.array(self.batch_seconds)
+            batch_rows = np.array(self.batch_rows)
+            queue_delays = np.array(self.queue_delay_seconds)
+
+        def percentiles_ms(values):
+            if not len(values):
+                return None
+            return {'p50': float(np.percentile(values, 50)) * 1000, 'p99': float(np.percentile(values, 99)) * 1000}
+
+        return {
+            'active': self.bundle is not None,
+            'candidate_version': self.candidate_version,
+            'sample_rate': self.sample_rate,
+            'started_at': self.started_at,
+            'sampled': self.sampled,
+            'queued': self._queue.qsize(),
+            'dropped': self.dropped,
+            'missing': self.missing,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'compared': compared,
+            'mean_abs_diff': total_abs / compared if compared else None,
+            'category_disagreement_rate': changes / compared if compared else None,
+            'by_bid_type': by_bid_type,
+            # Candidate scoring time per batch and per row, and how long items waited in the queue
+            'batch_latency_ms': percentiles_ms(batch_seconds),
+            'ms_per_row': float(batch_seconds.sum() / batch_rows.sum()) * 1000 if len(batch_rows) else None,
+            'queue_delay_ms': percentiles_ms(queue_delays)
+        }
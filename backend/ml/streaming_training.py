@@ -0,0 +1,125 @@
+"""Chunked training for datasets that don't fit in memory.
+
+The dataset is streamed in chunks (from the compact copy when it is fresh,
+otherwise from the CSV). Scalers are fitted with partial_fit, so they end up
+with the same statistics a full fit would give, and the model is either
+
+- 'reservoir': the usual candidate search on a fixed-size uniform sample
+  of each bid type, drawn in the same pass, or
+- 'sgd': an SGDRegressor trained with partial_fit over several passes.
+
+Peak memory is one chunk plus the samples, whatever the dataset size.
+"""
+import numpy as np
+
+from compact_dataset import CompactDataset, compact_dataset_path, is_fresh
+from features import calculate_risk_labels
+
+STREAMING_METHODS = ('reservoir', 'sgd')
+
+
+def iter_chunks(csv_path, columns, chunksize, skip_rows=0):
+    """DataFrames of at most chunksize rows covering the dataset in order, after the first skip_rows"""
+    compact_path = compact_dataset_path(csv_path)
+    if is_fresh(compact_path, csv_path):
+        dataset = CompactDataset(compact_path)
+        for start in range(skip_rows, len(dataset), chunksize):
+            yield dataset.to_frame(columns, rows=slice(start, start + chunksize))
+        return
+
+    import pandas as pd
+    if not skip_rows:
+        yield from pd.read_csv(csv_path, usecols=columns, chunksize=chunksize)
+        return
+    # Skipping a line count (header included) is done by the C parser without tokenizing
+    names = pd.read_csv(csv_path, nrows=0).columns
+    yield from pd.read_csv(csv_path, usecols=columns, chunksize=chunksize, skiprows=skip_rows + 1,
+                           header=None, names=names)
+
+
+class Reservoir:
+    """Uniform sample without replacement of a stream of (X, y) rows.
+
+    Every row gets a random priority and the sample_size lowest are kept
+    (bottom-k sampling), so whole chunks are merged at once.
+    """
+
+    def __init__(self, sample_size, n_features, rng):
+        self.sample_size = sample_size
+        self.rng = rng
+        self.X = np.empty((0, n_features), dtype=np.float64)
+        self.y = np.empty(0, dtype=np.float64)
+        self.priority = np.empty(0, dtype=np.float64)
+        self.seen = 0
+
+    def add(self, X, y):
+        self.seen += len(y)
+        X = np.concatenate([self.X, X])
+        y = np.concatenate([self.y, y])
+        priority = np.concatenate([self.priority, self.rng.random(len(y) - len(self.y))])
+        if len(y) > self.sample_size:
+            keep = np.argpartition(priority, self.sample_size)[:self.sample_size]
+            X, y, priority = X[keep], y[keep], priority[keep]
+        self.X, self.y, self.priority = X, y, priority
+
+
+def _bid_type_chunks(chunk, bid_types, feature_names):
+    """(bid_type, X frame, labels) for each bid type present in a chunk"""
+    for bid_type in bid_types:
+        rows = chunk[chunk['bid_type'] == bid_type]
+        if len(rows):
+            yield bid_type, rows[feature_names], calculate_risk_labels(rows, bid_type)
+
+
+def stream_statistics(csv_path, feature_names, bid_types, chunksize, sample_size=None, seed=42):
+    """One pass: partial_fit a StandardScaler per bid type and optionally reservoir-sample rows.
+
+    Returns (scalers, reservoirs, counts); reservoirs is empty without a sample_size.
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    columns = ['bid_type', *feature_names]
+    rng = np.random.default_rng(seed)
+    scalers, reservoirs, counts = {}, {}, {}
+
+    for chunk in iter_chunks(csv_path, columns, chunksize):
+        for bid_type, X, y in _bid_type_chunks(chunk, bid_types, feature_names):
+            # Fitted on frames, as in fit_models, so the scaler records feature names
+            scalers.setdefault(bid_type, StandardScaler()).partial_fit(X)
+            counts[bid_type] = counts.get(bid_type, 0) + len(y)
+            if sample_size:
+                reservoir = reservoirs.setdefault(bid_type, Reservoir(sample_size, len(feature_names), rng))
+                reservoir.add(X.to_numpy(dtype=np.float64), y)
+
+    return scalers, reservoirs, counts
+
+
+def train_sgd(csv_path, feature_names, scalers, chunksize, epochs=5, seed=42):
+    """Fit an SGDRegressor per bid type with partial_fit, one chunk at a time.
+
+    Returns (models, mse) where mse is the progressive validation error of
+    the last pass: each chunk is scored before the model learns from it.
+    """
+    from sklearn.linear_model import SGDRegressor
+
+    columns = ['bid_type', *feature_names]
+    rng = np.random.default_rng(seed)
+    models = {bid_type: SGDRegressor(random_state=seed) for bid_type in scalers}
+    squared_error, rows = {}, {}
+
+    for epoch in range(epochs):
+        last = epoch == epochs - 1
+        for chunk in iter_chunks(csv_path, columns, chunksize):
+            for bid_type, X, y in _bid_type_chunks(chunk, scalers, feature_names):
+                X = scalers[bid_type].transform(X)
+                # Shuffle within the chunk; the file order is often sorted by time or bidder
+                order = rng.permutation(len(y))
+                X, y = X[order], y[order]
+                model = models[bid_type]
+                if last and hasattr(model, 'coef_'):
+                    squared_error[bid_type] = squared_error.get(bid_type, 0.0) + float(np.sum((model.predict(X) - y) ** 2))
+                    rows[bid_type] = rows.get(bid_type, 0) + len(y)
+                model.partial_fit(X, y)
+
+    mse = {bid_type: squared_error[bid_type] / rows[bid_type] for bid_type in rows}
+    return models, mse
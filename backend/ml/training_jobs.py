@@ -0,0 +1,403 @@
+import contextlib
+import cProfile
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+LOCK_FILE = 'jobs.lock'
+
+
+def run_training_job(csv_path, options, profile=False, state_dir=None, job_id=None):
+    """Load the dataset, fit and save models; runs inside the training process.
+    
+    With profile, the result also carries the job's raw cProfile stats.
+    With state_dir, the job's shared record is marked running first.
+    """
+    if state_dir is not None:
+        with _locked(state_dir):
+            record = _read_record(state_dir, job_id)
+            if record is not None:
+                record.update(status='running', started_at=datetime.now().isoformat())
+                _write_record(state_dir, record)
+    if not profile:
+        return _train(csv_path, options)
+
+    profiler = cProfile.Profile()
+    result = profiler.runcall(_train, csv_path, options)
+    profiler.create_stats()
+    result['profile'] = profiler.stats
+    return result
+
+
+def _train(csv_path, options):
+    from compact_dataset import read_dataset
+    from ml_service import TrustChainRiskML
+    from model_registry import file_sha256
+
+    started_at = datetime.now().isoformat()
+    start = time.perf_counter()
+
+    trainer = TrustChainRiskML()
+    if trainer.registry.production_version() is None:
+        # The first registered version carries over bid types served from the loose model files
+        trainer.load_models()
+    options = dict(options)
+    promote = options.pop('promote', True)
+    if options.pop('streaming', False):
+        # Reads the dataset chunk by chunk while fitting, so there is no separate load step
+        loaded = start
+        models, scalers, metrics = trainer.fit_models_streaming(csv_path, **options)
+    else:
+        historical_data = read_dataset(csv_path)
+        loaded = time.perf_counter()
+        models, scalers, metrics = trainer.fit_models(historical_data, **options)
+    fitted = time.perf_counter()
+
+    version = trainer.save_models(models, scalers, metrics, file_sha256(csv_path), promote)
+    saved = time.perf_counter()
+
+    return {
+        'models': models,
+        'scalers': scalers,
+        'metrics': metrics,
+        'registry_version': version,
+        'promoted': promote,
+        'started_at': started_at,
+        'timings': {
+            'load_seconds': loaded - start,
+            'fit_seconds': fitted - loaded,
+            'save_seconds': saved - fitted
+        }
+    }
+
+
+class TrainingJobManager:
+    """Runs train jobs in a separate process and hot-swaps the result.
+
+    The served models are only replaced, as a single bundle, once a job
+    has produced every model and scaler; failed jobs leave them untouched.
+    Jobs run with promote=False only register a candidate version.
+
+    With state_dir, processes serving the same API (gunicorn workers) share
+    the jobs: every job is also a JSON record there, written under a file
+    lock, so any process can report it and a submit in one process joins a
+    job running in another. The process that started a job runs it and
+    installs its models; the others pick up promoted models from the
+    registry. A job whose process died is marked failed.
+    """
+
+    def __init__(self, risk_ml, max_history=50, state_dir=None):
+        self.risk_ml = risk_ml
+        self.max_history = max_history
+        self.state_dir = state_dir
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        # Totals since start-up (the job history is trimmed) and the latest finished job
+        self.finished = {'succeeded': 0, 'failed': 0}
+        self.last_finished = None
+        # RequestProfiler that may ask for a job to be profiled (see profiling.py)
+        self.profiler = None
+        # Called after a job's models are installed, before waiters are released
+        self.after_install = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            # spawn: forking a threaded web server can deadlock the child
+            self._executor = ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def submit(self, csv_path, **options):
+        """Queue a training job, or return the one already in flight.
+        
+        options are passed through to TrustChainRiskML.fit_models.
+        """
+        with self._lock, self._shared_lock():
+            for job in self._jobs.values():
+                if job['status'] == 'queued':
+                    return self._view(job)
+            shared = self._active_shared_job()
+            if shared is not None:
+                return _public(shared)
+
+            job_id = uuid.uuid4().hex[:12]
+            job = {
+                'job_id': job_id,
+                'status': 'queued',
+                'csv_path': csv_path,
+                'options': options,
+                'submitted_at': datetime.now().isoformat(),
+                'started_at': None,
+                'finished_at': None,
+                'timings': {},
+                'metrics': {},
+                'model_version': None,
+                'registry_version': None,
+                'promoted': None,
+                'error': None
+            }
+            job['_submitted'] = time.perf_counter()
+            job['_done'] = threading.Event()
+            job['profiled'] = self.profiler is not None and self.profiler.wants('train_models')
+            self._save(job)
+            args = (run_training_job, csv_path, options, job['profiled'], self.state_dir, job_id)
+            try:
+                try:
+                    future = self._get_executor().submit(*args)
+                except BrokenProcessPool:
+                    self._executor = None
+                    future = self._get_executor().submit(*args)
+            except Exception as e:
+                # Not started (e.g. the process could not be spawned): record the job as failed
+                future = None
+                self._executor = None
+                job['status'] = 'failed'
+                job['error'] = f"Could not start training job: {e}"
+                job['finished_at'] = datetime.now().isoformat()
+                job['timings']['total_seconds'] = time.perf_counter() - job['_submitted']
+                self.finished['failed'] += 1
+                self.last_finished = job_id
+                job['_done'].set()
+                self._save(job)
+            else:
+                job['_future'] = future
+            self._jobs[job_id] = job
+            self._trim_history()
+            view = self._view(job)
+
+        if future is None:
+            if job['profiled']:
+                self.profiler.stop_if_exhausted()
+            return view
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        return self.get(job_id)
+
+    def get(self, job_id):
+        """Public view of a job, with 'running' derived from the future state; jobs of other processes from their record"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return self._view(job)
+        if self.state_dir is None:
+            return None
+        with self._shared_lock():
+            record = self._checked_record(_read_record(self.state_dir, job_id))
+        return _public(record) if record is not None else None
+
+    def _view(self, job):
+        """Called with the lock held"""
+        view = {k: v for k, v in job.items() if not k.startswith('_')}
+        if view['status'] == 'queued' and job['_future'].running():
+            view['status'] = 'running'
+        return view
+
+    def wait(self, job_id, timeout=None):
+        """Block until a job has finished (and its models are installed); returns its view"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            job['_done'].wait(timeout)
+            return self.get(job_id)
+
+        # Another process's job: poll its record
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            view = self.get(job_id)
+            if view is None or view['status'] in ('succeeded', 'failed'):
+                return view
+            if deadline is not None and time.monotonic() >= deadline:
+                return view
+            time.sleep(0.5)
+
+    def _finish(self, job_id, future):
+        """Done-callback: swap in the trained bundle, or record the failure"""
+        with self._lock:
+            job = self._jobs[job_id]
+
+        try:
+            result = future.result()
+
+            bundle = None
+            if result['promoted']:
+                # Refresh lookups from the same dataset the models were trained on
+                self.risk_ml.load_historical_data(job['csv_path'])
+                bundle = self.risk_ml.install_models(result['models'], result['scalers'], result['metrics'],
+                                                     result['registry_version'])
+            if result.get('profile') is not None:
+                self.profiler.add_stats('train_models', result['profile'])
+
+            with self._lock:
+                job['status'] = 'succeeded'
+                job['started_at'] = result['started_at']
+                job['metrics'] = result['metrics']
+                job['timings'] = dict(result['timings'])
+                job['model_version'] = bundle.version if bundle is not None else None
+                job['registry_version'] = result['registry_version']
+                job['promoted'] = result['promoted']
+        except Exception as e:
+            with self._lock:
+                job['status'] = 'failed'
+                job['error'] = str(e)
+            if isinstance(e, BrokenProcessPool):
+                self._executor = None
+
+        if job['status'] == 'succeeded' and job['promoted'] and self.after_install is not None:
+            try:
+                self.after_install()
+            except Exception as e:
+                print(f"Error after installing models: {e}")
+
+        with self._lock:
+            job['finished_at'] = datetime.now().isoformat()
+            job['timings']['total_seconds'] = time.perf_counter() - job['_submitted']
+            self.finished[job['status']] += 1
+            self.last_finished = job_id
+        with self._shared_lock():
+            self._save(job)
+        job['_done'].set()
+        if job['profiled']:
+            self.profiler.stop_if_exhausted()
+
+    def _trim_history(self):
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job['status'] in ('succeeded', 'failed')]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_history)]:
+            del self._jobs[job_id]
+
+        if self.state_dir is not None:
+            records = sorted(_read_records(self.state_dir), key=lambda record: record['submitted_at'])
+            finished = [record['job_id'] for record in records if record['status'] in ('succeeded', 'failed')]
+            for job_id in finished[:max(0, len(records) - self.max_history)]:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(_record_path(self.state_dir, job_id))
+
+    def _shared_lock(self):
+        return _locked(self.state_dir) if self.state_dir is not None else contextlib.nullcontext()
+
+    def _save(self, job):
+        """Write a job's shared record; called with the shared lock held"""
+        if self.state_dir is not None:
+            _write_record(self.state_dir, dict(
+                {k: v for k, v in job.items() if not k.startswith('_')}, owner_pid=os.getpid()))
+
+    def _active_shared_job(self):
+        """Queued or running job of another process, if any; called with the shared lock held"""
+        if self.state_dir is None:
+            return None
+        for record in _read_records(self.state_dir):
+            record = self._checked_record(record)
+            if record['status'] in ('queued', 'running'):
+                return record
+        return None
+
+    def _checked_record(self, record):
+        """The record, marked failed if the process running it has exited; called with the shared lock held"""
+        if record is None or record['status'] not in ('queued', 'running') or _process_alive(record['owner_pid']):
+            return record
+        record.update(status='failed', error='The process running the job exited',
+                      finished_at=datetime.now().isoformat())
+        _write_record(self.state_dir, record)
+        return record
+
+
+@contextlib.contextmanager
+def _locked(state_dir):
+    """Exclusive lock on a job state directory, across processes"""
+    import fcntl
+
+    os.makedirs(state_dir, exist_ok=True)
+    with open(os.path.join(state_dir, LOCK_FILE), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def _record_path(state_dir, job_id):
+    return os.path.join(state_dir, f'{job_id}.json')
+
+
+def _read_record(state_dir, job_id):
+    try:
+        with open(_record_path(state_dir, job_id)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _read_records(state_dir):
+    names = [name for name in os.listdir(state_dir) if name.endswith('.json')]
+    records = (_read_record(state_dir, name[:-len('.json')]) for name in names)
+    return [record for record in records if record is not None]
+
+
+def _write_record(state_dir, record):
+    path = _record_path(state_dir, record['job_id'])
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _public(record):
+    return {k: v for k, v in record.items() if k != 'owner_pid'}
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class RetrainScheduler:
+    """Submits a full training job every interval seconds.
+
+    Incremental updates only ever extend the served models; the periodic
+    full retrain re-runs the model search on the whole dataset to correct
+    the drift they accumulate.
+    """
+
+    def __init__(self, training_jobs, csv_path, interval, options=None):
+        self.training_jobs = training_jobs
+        self.csv_path = csv_path
+        self.interval = interval
+        # Called for each job's options, so they follow the current settings
+        self.options = options or dict
+        self._thread = None
+        self.submitted = 0
+        self.last_job = None
+        self.next_run_at = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='ml-retrain-scheduler', daemon=True)
+            self._thread.start()
+
+    def stats(self):
+        return {
+            'interval_seconds': self.interval,
+            'submitted': self.submitted,
+            'last_job': self.last_job,
+            'next_run_at': self.next_run_at
+        }
+
+    def _run(self):
+        while True:
+            self.next_run_at = datetime.fromtimestamp(time.time() + self.interval).isoformat()
+            time.sleep(self.interval)
+            try:
+                job = self.training_jobs.submit(self.csv_path, **self.options())
+                self.submitted += 1
+                self.last_job = job['job_id']
+            except Exception as e:
+                print(f"Error submitting scheduled retrain: {e}")
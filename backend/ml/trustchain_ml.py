@@ -7,8 +7,10 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_squared_error, r2_score
 import joblib
 import json
-from web3 import Web3
 from datetime import datetime
+from features import calculate_risk_labels, prepare_training_data
+from chain_extract import ChainExtractor
+from chain_sync import ChainSync
 
 class TrustChainRiskML:
     def __init__(self):
@@ -78,73 +80,35 @@ class TrustChainRiskML:
         else:
             return f"❌ REJECT - High risk for {bid_type}"
 
-    def extract_blockchain_data(self, contract_address, abi, web3_provider):
-        """Extract bidder data from your TrustChain smart contract"""
-        w3 = Web3(Web3.HTTPProvider(web3_provider))
-        contract = w3.eth.contract(address=contract_address, abi=abi)
-       
-        bidder_count = contract.functions.bidderCount().call()
-        bidders_data = []
-       
-        for i in range(1, bidder_count + 1):
-            bidder = contract.functions.bidders(i).call()
-           
-            # Extract additional metrics from contract
-            bids = self._get_bidder_bids(contract, bidder[1])
-            projects = self._get_bidder_projects(contract, bidder)
-           
-            bidders_data.append({
-                'bidder_address': bidder,
-                'total_projects': len(projects),
-                'completed_projects': len([p for p in projects if p['status'] == 'Completed']),
-                'abandoned_projects': len([p for p in projects if p['status'] == 'Disputed']),
-                'completion_rate': self._calculate_completion_rate(projects),
-                'average_delay_days': self._calculate_average_delay(projects),
-                'budget_overruns_percent': self._calculate_budget_overruns(projects),
-                'quality_score': bidder[3] / 2,  # Normalize reputation to quality score
-                'reputation_score': bidder,
-                'payment_disputes': self._count_payment_disputes(contract, bidder),
-                'days_since_last_project': self._days_since_last_activity(projects)
-            })
-       
-        return pd.DataFrame(bidders_data)
+    def extract_blockchain_data(self, contract_address, abi, web3_provider, **client_options):
+        """Extract bidder data from your TrustChain smart contract.
+        
+        Reads are batched JSON-RPC calls with bounded concurrency and retries;
+        client_options (batch_size, max_concurrency, max_retries, backoff,
+        timeout) tune the BatchRPCClient.
+        """
+        extractor = ChainExtractor(web3_provider, contract_address, abi, **client_options)
+        return extractor.extract()
+
+    def sync_blockchain_data(self, contract_address, abi, web3_provider, state_path='chain_state.pkl',
+                             reorg_depth=12, **client_options):
+        """Incremental version of extract_blockchain_data.
+
+        The first call does a full extraction and checkpoints it at state_path;
+        later calls only re-read what contract events since the checkpoint
+        touched. Returns (features frame, sync summary).
+        """
+        syncer = ChainSync(web3_provider, contract_address, abi, state_path,
+                           reorg_depth=reorg_depth, **client_options)
+        return syncer.sync()
 
     def prepare_training_data(self, df, bid_type):
         """Prepare and engineer features specific to each bid type"""
-        # Add bid-type specific features
-        if bid_type == 'MinRate':
-            # MinRate focuses on delivery capability
-            df['delivery_risk'] = (df['abandoned_projects'] * 2 +
-                                 df['average_delay_days'] / 30 +
-                                 df['budget_overruns_percent'] / 100)
-            df['quality_risk'] = (10 - df['quality_score']) / 10
-        
-        return df
+        return prepare_training_data(df, bid_type)
 
     def calculate_risk_labels(self, df, bid_type):
         """Calculate risk scores based on bid type specific factors"""
-        risk_scores = []
-       
-        for _, row in df.iterrows():
-            base_risk = 0
-           
-            # Common risk factors
-            base_risk += row['abandoned_projects'] * 25
-            base_risk += min(30, row['average_delay_days'] * 0.5)
-            base_risk += min(25, row['budget_overruns_percent'] * 0.3)
-            base_risk += row['payment_disputes'] * 8
-            base_risk -= row['reputation_score'] * 1.5
-           
-            # Bid-type specific adjustments
-            if bid_type == 'MinRate':
-                # Higher penalty for delivery issues
-                base_risk += (10 - row['quality_score']) * 3
-                if row['completion_rate'] < 0.8:
-                    base_risk += 20
-            
-            risk_scores.append(max(0, min(100, base_risk)))
-       
-        return risk_scores
+        return calculate_risk_labels(df, bid_type)
 
     def train_models(self, historical_data):
         """Train separate ML models for each bid type"""
@@ -153,19 +117,18 @@ class TrustChainRiskML:
             print(f"Training model for {bid_type}...")
            
             # Filter data for specific bid type
-            type_data = historical_data[historical_data['bid_type'] == bid_type].copy()
+            type_data = historical_data[historical_data['bid_type'] == bid_type]
            
             if len(type_data) < 10:
                 print(f"Insufficient data for {bid_type}, using general model")
                 continue
            
-            # Prepare features
+            # Prepare features (returns a new frame) and labels
             type_data = self.prepare_training_data(type_data, bid_type)
-            type_data['risk_score'] = self.calculate_risk_labels(type_data, bid_type)
+            y = self.calculate_risk_labels(type_data, bid_type)
            
             # Select features
             X = type_data[self.feature_names]
-            y = type_data['risk_score']
            
             # Scale features
             X_scaled = self.scalers[bid_type].fit_transform(X)
@@ -23,6 +23,24 @@ router.get('/health', async (req, res) => {
   }
 });
 
+// Readiness of the ML service (models and data loaded)
+router.get('/ready', async (req, res) => {
+  try {
+    const response = await axios.get(`${ML_SERVICE_URL}/ready`);
+    res.json({
+      success: true,
+      ml_service: response.data
+    });
+  } catch (error) {
+    res.status(503).json({
+      success: false,
+      message: error.response ? 'ML service not ready' : 'ML service unavailable',
+      ml_service: error.response ? error.response.data : undefined,
+      error: error.message
+    });
+  }
+});
+
 // Assess risk for a bidder
 router.post('/assess_risk', async (req, res) => {
   try {
@@ -69,7 +87,9 @@ router.post('/assess_risk', async (req, res) => {
 // Get bidder statistics
 router.get('/bidder_stats', async (req, res) => {
   try {
-    const response = await axios.get(`${ML_SERVICE_URL}/get_bidder_stats`);
+    const response = await axios.get(`${ML_SERVICE_URL}/get_bidder_stats`, {
+      params: req.query
+    });
     
     res.json({
       success: true,
@@ -108,6 +128,27 @@ router.post('/train_models', async (req, res) => {
   }
 });
 
+// Training job status
+router.get('/train_models/:jobId', async (req, res) => {
+  try {
+    const response = await axios.get(`${ML_SERVICE_URL}/train_models/${encodeURIComponent(req.params.jobId)}`);
+    
+    res.json({
+      success: true,
+      data: response.data
+    });
+    
+  } catch (error) {
+    console.error('ML service error:', error.response?.data || error.message);
+    
+    res.status(error.response?.status === 404 ? 404 : 500).json({
+      success: false,
+      message: 'Failed to get training job status',
+      error: error.response?.data?.error || error.message
+    });
+  }
+});
+
 // Batch risk assessment for multiple bidders
 router.post('/batch_assess_risk', async (req, res) => {
   try {
@@ -120,24 +161,14 @@ router.post('/batch_assess_risk', async (req, res) => {
       });
     }
     
-    const assessments = [];
-    
-    for (const bidder of bidders) {
-      try {
-        const response = await axios.post(`${ML_SERVICE_URL}/assess_risk`, bidder);
-        assessments.push({
-          ...bidder,
-          assessment: response.data
-        });
-      } catch (error) {
-        assessments.push({
-          ...bidder,
-          assessment: {
-            error: error.response?.data?.error || 'Assessment failed'
-          }
-        });
-      }
-    }
+    const response = await axios.post(`${ML_SERVICE_URL}/assess_risk_batch`, {
+      bids: bidders
+    });
+    
+    const assessments = bidders.map((bidder, i) => ({
+      ...bidder,
+      assessment: response.data.results[i]
+    }));
     
     res.json({
       success: true,
@@ -207,7 +207,7 @@ const MLDashboardPage: React.FC = () => {
                       onClick={async () => {
                         try {
                           await mlService.trainModels();
-                          alert('Models trained successfully!');
+                          alert('Model training started! New models go live once training completes.');
                         } catch (error: any) {
                           alert(`Training failed: ${error.message}`);
                         }